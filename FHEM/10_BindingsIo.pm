@@ -95,6 +95,8 @@ sub BindingsIo_Define {
   
   $hash->{devioLoglevel} = 0;
   $hash->{nextOpenDelay} = 10;
+  # events are only forwarded for devices subscribed by fhempy
+  BindingsIo_setEventSubscriptions($hash, [], 0);
   $hash->{BindingType} = $bindingType;
   $hash->{ReceiverQueue} = Thread::Queue->new();
   # send binary data via websocket
@@ -232,9 +234,21 @@ BindingsIo_doInit($) {
   $hash->{connecttime} = time;
 
   BindingsIo_initFrame($hash);
+  BindingsIo_setEventSubscriptions($hash, [], 0);
 
   # initialize all devices (send Define)
   my $bindingType = uc($hash->{BindingType})."TYPE";
+
+  # import all used module types in parallel before the devices are defined
+  my %moduleTypes;
+  foreach my $fhem_dev (keys %main::defs) {
+    my $devhash = $main::defs{$fhem_dev};
+    if(defined($devhash->{$bindingType}) && $devhash->{IODev}{NAME} eq $hash->{NAME}) {
+      $moduleTypes{$devhash->{$bindingType}} = 1;
+    }
+  }
+  BindingsIo_Write($hash, $hash, "preload", [sort keys %moduleTypes], {}) if (%moduleTypes);
+
   foreach my $fhem_dev (sort keys %main::defs) {
     my $devhash = $main::defs{$fhem_dev};
     if(defined($devhash->{$bindingType}) && $devhash->{IODev}{NAME} eq $hash->{NAME}) {
@@ -265,14 +279,38 @@ BindingsIo_Notify($)
     } elsif ($dev->{NAME} eq "global" && $event eq "UPDATE") {
       BindingsIo_Write($hash, $hash, "update", [], {});
       Log3 $hash, 1, "BindingsIo ($hash->{NAME}): ==> FHEMPY UPDATE STARTED...CHECK FHEMPY STATE FOR STATUS <==";
-    } else {
-      #BindingsIo_Write($hash, $dev, "event", [$event], {});
+    } elsif (BindingsIo_isEventSubscribed($hash, $devName)) {
+      BindingsIo_Write($hash, $dev, "event", [$event], {});
     }
   }
 
   return undef;
 }
 
+sub
+BindingsIo_setEventSubscriptions($$$) {
+  my ($hash, $devices, $all) = @_;
+
+  my %subscriptions = map { $_ => 1 } @{$devices};
+  $hash->{".eventSubscriptions"} = \%subscriptions;
+  $hash->{".eventSubscribeAll"} = $all;
+  if ($all) {
+    # NotifyFn is called for all devices
+    notifyRegexpChanged($hash, "");
+  } else {
+    notifyRegexpChanged($hash, join("|", "global", sort keys %subscriptions));
+  }
+}
+
+sub
+BindingsIo_isEventSubscribed($$) {
+  my ($hash, $devName) = @_;
+
+  return 0 if ($hash->{STATE} eq "disconnected" || !DevIo_IsOpen($hash));
+  return 1 if ($hash->{".eventSubscribeAll"});
+  return defined($hash->{".eventSubscriptions"}{$devName}) ? 1 : 0;
+}
+
 sub
 BindingsIo_Callback($$) {
   my ($hash, $error) = @_;
@@ -360,6 +398,9 @@ BindingsIo_Write($$$$$) {
   } elsif ($function eq "event") {
     $msg{"msgtype"} = "event";
     $waitforresponse = 0;
+  } elsif ($function eq "preload") {
+    $msg{"msgtype"} = "preload";
+    $waitforresponse = 0;
   }
 
   my $utf8msg = to_json(\%msg);
@@ -543,6 +584,8 @@ sub BindingsIo_processMessage($$$$) {
         eq "function" or $key eq "defargs" or $key eq "defargsh" or $key eq "args" or $key eq "argsh" or $key eq "id");
       $devhash->{$key} = $json->{$key};
     }
+  } elsif ($json->{msgtype} eq "event_subscriptions") {
+    BindingsIo_setEventSubscriptions($hash, $json->{devices}, $json->{all});
   } elsif ($json->{msgtype} eq "version") {
     foreach my $key (keys %$json) {
       if ($key eq "msgtype") {
@@ -550,6 +593,14 @@ sub BindingsIo_processMessage($$$$) {
       }
       readingsSingleUpdate($hash, $key, $json->{$key}, 1);
     }
+  } elsif ($json->{msgtype} eq "stats") {
+    # statistics change all the time, no events
+    readingsBeginUpdate($hash);
+    foreach my $key (keys %$json) {
+      next if ($key eq "msgtype");
+      readingsBulkUpdate($hash, $key, $json->{$key});
+    }
+    readingsEndUpdate($hash, 0);
   } elsif ($json->{msgtype} eq "command") {
     my $ret = 0;
     my %res;
@@ -26,6 +26,15 @@ class ble_monitor(generic.FhemModule):
                 ),
                 "function": "set_attr_generic",
             },
+            "duplicate_window": {
+                "default": "5",
+                "format": "int",
+                "help": (
+                    "Seconds in which identical advertisements of this device "
+                    "are dropped before parsing, 0 to disable"
+                ),
+                "function": "set_attr_generic",
+            },
         }
         self.set_attr_config(attr_config)
 
@@ -46,6 +55,9 @@ class ble_monitor(generic.FhemModule):
     def hci(self):
         return self._attr_hci_interface
 
+    def duplicate_window(self):
+        return self._attr_duplicate_window
+
     def encryption_key(self):
         if self._attr_encryption_key == "":
             return None
@@ -53,12 +65,9 @@ class ble_monitor(generic.FhemModule):
 
     async def received_data(self, data):
         try:
-            await fhem.readingsBeginUpdate(self.hash)
-            for reading in data:
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, reading, data[reading]
-                )
-            await fhem.readingsEndUpdate(self.hash, 1)
+            async with fhem.readings(self.hash) as r:
+                for reading in data:
+                    r.update_if_changed(reading, data[reading])
         except Exception:
             self.logger.exception("Failed to update readings")
 
@@ -1,14 +1,17 @@
 import asyncio
+import functools
+import time
+
 import janus
-from fhempy.lib.ble_monitor.bt_helpers import (
-    BT_INTERFACES,
-    DEFAULT_BT_INTERFACE,
-    DEFAULT_HCI_INTERFACE,
-)
+from fhempy.lib.ble_monitor.bt_helpers import BT_INTERFACES, reset_bluetooth
 from fhempy.lib.ble_monitor.hcidump import HCIdump
 
+from .. import utils
+from ..core import ble_scanner
+
 
 from .const import (
+    CONF_DEVICE_DUPLICATE_WINDOW,
     CONF_DEVICE_ENCRYPTION_KEY,
     CONF_DISCOVERY,
     CONF_MAC,
@@ -38,6 +41,9 @@ from .const import (
     DEFAULT_USE_MEDIAN,
 )
 
+# seconds to collect device changes before the configuration is applied
+RECONFIGURE_DELAY = 1
+
 
 class BLEmonitor:
     """BLE scanner."""
@@ -55,7 +61,6 @@ class BLEmonitor:
         """Init."""
         self.logger = logger
         self.dataqueue = {
-            "binary": janus.Queue(),
             "measuring": janus.Queue(),
             "tracker": janus.Queue(),
         }
@@ -77,8 +82,13 @@ class BLEmonitor:
             CONF_DISCOVERY: DEFAULT_DISCOVERY,
         }
         self.dumpthread = None
+        self.subscriptions = {}
+        self._reconfigure_handle = None
+        self.last_bt_reset = 0
         self.fhem_devices = {}
+        self.delivered = 0
         self.receive_from_queues()
+        ble_scanner.BLEScanner.get_instance().add_error_listener(self.adapter_failed)
 
     def receive_from_queues(self):
         self.task_measuring = asyncio.create_task(self.receive_from_measuring())
@@ -87,46 +97,79 @@ class BLEmonitor:
     async def receive_from_measuring(self):
         while True:
             try:
-                measuring = await self.dataqueue["measuring"].async_q.get()
-                if "mac" in measuring and measuring["mac"].lower() in self.fhem_devices:
-                    for fhem_dev in self.fhem_devices[measuring["mac"].lower()]:
-                        await fhem_dev.received_data(measuring)
+                measurings = await self.dataqueue["measuring"].async_q.get()
+                await self.deliver(measurings)
             except Exception:
                 self.logger.exception("Failed to receive_from_measuring")
-                asyncio.sleep(10)
+                await asyncio.sleep(10)
 
     async def receive_from_tracker(self):
         while True:
             try:
-                tracker = await self.dataqueue["tracker"].async_q.get()
-                if "mac" in tracker and tracker["mac"].lower() in self.fhem_devices:
-                    for fhem_dev in self.fhem_devices[tracker["mac"].lower()]:
-                        await fhem_dev.received_data(tracker)
+                trackers = await self.dataqueue["tracker"].async_q.get()
+                await self.deliver(trackers)
             except Exception:
                 self.logger.exception("Failed to receive_from_tracker")
-                asyncio.sleep(10)
+                await asyncio.sleep(10)
+
+    async def deliver(self, messages):
+        for message in messages:
+            # bleparser returns the mac with or without colons
+            simple_mac = message.get("mac", "").replace(":", "").lower()
+            for fhem_dev in self.fhem_devices.get(simple_mac, []):
+                self.delivered += 1
+                await fhem_dev.received_data(message)
+
+    def get_stats(self):
+        stats = {"delivered": self.delivered}
+        if self.dumpthread is not None:
+            stats.update(self.dumpthread.prefilter.stats)
+            stats["parsed"] = self.dumpthread.msg_cnt
+        return stats
 
     def register_device(self, fhemdevice):
         simple_mac = fhemdevice.mac().replace(":", "").lower()
         if simple_mac not in self.fhem_devices:
             self.fhem_devices[simple_mac] = []
         self.fhem_devices[simple_mac].append(fhemdevice)
-        self.config[CONF_DEVICES].append(
-            {
-                CONF_MAC: fhemdevice.mac(),
-                CONF_DEVICE_ENCRYPTION_KEY: fhemdevice.encryption_key(),
-            }
-        )
 
-        self.update_hci_interface(fhemdevice.hci())
+        self.schedule_reconfigure()
 
-        self.restart()
+    def schedule_reconfigure(self):
+        """Apply device changes once after RECONFIGURE_DELAY, further changes
+        within the delay start it again."""
+        if self._reconfigure_handle is not None:
+            self._reconfigure_handle.cancel()
+        self._reconfigure_handle = asyncio.get_event_loop().call_later(
+            RECONFIGURE_DELAY, self.reconfigure
+        )
 
-    def update_hci_interface(self, intf):
+    def reconfigure(self):
+        """Update the running HCIdump thread and the scanner subscriptions,
+        the thread is only started if it isn't running."""
+        self._reconfigure_handle = None
+        self.update_config()
+        if self.dumpthread is None or not self.dumpthread.is_alive():
+            self.restart()
+            return
+        self.logger.debug("Reconfigure BLE monitor")
+        self.dumpthread.reconfigure(self.config)
+        self.update_subscriptions()
+
+    def update_config(self):
+        # built from the current attributes, so changed devices are replaced
+        self.config[CONF_DEVICES] = []
         self.config[CONF_HCI_INTERFACE] = []
         self.config[CONF_BT_INTERFACE] = []
         for fhem_mac in self.fhem_devices:
             for fhem_dev in self.fhem_devices[fhem_mac]:
+                self.config[CONF_DEVICES].append(
+                    {
+                        CONF_MAC: fhem_dev.mac(),
+                        CONF_DEVICE_ENCRYPTION_KEY: fhem_dev.encryption_key(),
+                        CONF_DEVICE_DUPLICATE_WINDOW: fhem_dev.duplicate_window(),
+                    }
+                )
                 self.config[CONF_HCI_INTERFACE].append(fhem_dev.hci())
                 self.config[CONF_BT_INTERFACE].append(BT_INTERFACES[fhem_dev.hci()])
 
@@ -136,25 +179,32 @@ class BLEmonitor:
             self.fhem_devices[simple_mac].remove(fhemdevice)
         except Exception:
             pass
-        try:
-            self.config[CONF_DEVICES].remove(
-                {
-                    CONF_MAC: fhemdevice.mac(),
-                    CONF_DEVICE_ENCRYPTION_KEY: fhemdevice.encryption_key(),
-                }
-            )
-        except Exception:
-            pass
 
-        self.update_hci_interface(fhemdevice.hci())
-
-        self.restart()
+        self.schedule_reconfigure()
 
     def shutdown_handler(self, event):
         """Run homeassistant_stop event handler."""
         self.logger.debug("Shutdown event fired: %s", event)
         self.stop()
 
+    def adapter_failed(self, hci):
+        """Power cycle adapters which can't be opened by the BLE scanner."""
+        if (
+            self.config[CONF_BT_AUTO_RESTART] is not True
+            or hci not in self.config[CONF_HCI_INTERFACE]
+            or time.time() - self.last_bt_reset < 60
+        ):
+            return
+        self.last_bt_reset = time.time()
+        self.logger.error(
+            "Trying to power cycle Bluetooth adapter hci%i %s",
+            hci,
+            BT_INTERFACES.get(hci),
+        )
+        asyncio.create_task(
+            utils.run_blocking(functools.partial(reset_bluetooth, hci), pool="ble")
+        )
+
     def start(self):
         """Start receiving broadcasts."""
         self.logger.debug("Spawning HCIdump thread")
@@ -164,10 +214,33 @@ class BLEmonitor:
             dataqueue=self.dataqueue,
         )
         self.dumpthread.start()
+        self.update_subscriptions()
+
+    def update_subscriptions(self):
+        """Subscribe to the used adapters, subscriptions of adapters which are
+        still used are kept."""
+        hcis = []
+        if "disable" not in self.config[CONF_BT_INTERFACE]:
+            hcis = list(dict.fromkeys(self.config[CONF_HCI_INTERFACE]))
+        scanner = ble_scanner.BLEScanner.get_instance()
+        for hci in hcis:
+            if hci not in self.subscriptions:
+                self.subscriptions[hci] = scanner.subscribe(
+                    self.dumpthread.feed,
+                    hci=hci,
+                    active=self.config[CONF_ACTIVE_SCAN] is True,
+                )
+        for hci in list(self.subscriptions):
+            if hci not in hcis:
+                scanner.unsubscribe(self.subscriptions.pop(hci))
 
     def stop(self):
         """Stop HCIdump thread(s)."""
         result = True
+        scanner = ble_scanner.BLEScanner.get_instance()
+        for subscription in self.subscriptions.values():
+            scanner.unsubscribe(subscription)
+        self.subscriptions = {}
         if self.dumpthread is None:
             self.logger.debug("BLE monitor stopped")
             return True
@@ -183,6 +256,5 @@ class BLEmonitor:
 
     def restart(self):
         """Restart scanning."""
-        # wait 3s for other restarts and restart only once
         self.stop()
         self.start()
@@ -21,6 +21,7 @@ CONF_DEVICE_USE_MEDIAN = "use_median"
 CONF_DEVICE_RESTORE_STATE = "restore_state"
 CONF_DEVICE_RESET_TIMER = "reset_timer"
 CONF_DEVICE_TRACK = "track_device"
+CONF_DEVICE_DUPLICATE_WINDOW = "duplicate_window"
 CONF_DEVICE_TRACKER_SCAN_INTERVAL = "tracker_scan_interval"
 CONF_DEVICE_TRACKER_CONSIDER_HOME = "consider_home"
 CONF_DEVICE_DELETE_DEVICE = "delete device"
@@ -50,6 +51,7 @@ DEFAULT_DEVICE_TRACKER_SCAN_INTERVAL = 20
 DEFAULT_DEVICE_TRACKER_CONSIDER_HOME = 180
 DEFAULT_DEVICE_TRACK = False
 DEFAULT_DEVICE_DELETE_DEVICE = False
+DEFAULT_DEVICE_DUPLICATE_WINDOW = 5
 
 # regex constants for configuration schema
 MAC_REGEX = "(?i)^(?:[0-9A-F]{2}[:]){5}(?:[0-9A-F]{2})$"
@@ -1,29 +1,21 @@
 """Passive BLE monitor integration."""
 import asyncio
+from collections import deque
 from threading import Thread
 
-import aioblescan as aiobs
-from datetime import datetime
-
 from bleparser import BleParser
 
-from fhempy.lib.ble_monitor.bt_helpers import reset_bluetooth, BT_INTERFACES
-
 from .const import (
     CONF_DEVICES,
-    CONF_ACTIVE_SCAN,
-    CONF_BT_AUTO_RESTART,
-    CONF_BT_INTERFACE,
     CONF_DEVICE_ENCRYPTION_KEY,
     CONF_DEVICE_TRACK,
-    CONF_HCI_INTERFACE,
     CONF_GATEWAY_ID,
     CONF_REPORT_UNKNOWN,
     CONF_DISCOVERY,
-    MEASUREMENT_DICT,
 )
 
 from .helper import dict_get_or_clean, dict_get_or, identifier_clean
+from .prefilter import PreFilter
 
 
 class HCIdump(Thread):
@@ -34,22 +26,31 @@ class HCIdump(Thread):
         Thread.__init__(self)
         self.logger = logger
         self.logger.debug("HCIdump thread: Init")
-        self.dataqueue_bin = dataqueue["binary"]
         self.dataqueue_meas = dataqueue["measuring"]
         self.dataqueue_tracker = dataqueue["tracker"]
-        self._event_loop = None
-        self._joining = False
+        self._event_loop = asyncio.new_event_loop()
         self.evt_cnt = 0
-        self.config = config
-        self._interfaces = config[CONF_HCI_INTERFACE]
-        self._active = int(config[CONF_ACTIVE_SCAN] is True)
-        self.discovery = True
+        self.msg_cnt = 0
+        self._pending = deque()
+        self._scheduled = False
         self.filter_duplicates = True
-        self.aeskeys = {}
-        self.sensor_whitelist = []
-        self.tracker_whitelist = []
+        self.prefilter = None
+        self.load_config(config)
+
+        # prepare the ble_parser
+        self.ble_parser = BleParser(
+            report_unknown=self.report_unknown,
+            discovery=self.discovery,
+            filter_duplicates=self.filter_duplicates,
+            sensor_whitelist=self.sensor_whitelist,
+            tracker_whitelist=self.tracker_whitelist,
+            aeskeys=self.aeskeys,
+        )
+
+    def load_config(self, config):
+        """Prepare whitelists and keys, called on the fhempy event loop."""
+        self.config = config
         self.report_unknown = False
-        self.last_bt_reset = datetime.now()
         if self.config[CONF_REPORT_UNKNOWN]:
             self.report_unknown = self.config[CONF_REPORT_UNKNOWN]
             self.logger.info(
@@ -57,231 +58,144 @@ class HCIdump(Thread):
                 "be ready for a huge output",
                 self.report_unknown,
             )
-        # prepare device:key lists to speedup parser
-        if self.config[CONF_DEVICES]:
-            for device in self.config[CONF_DEVICES]:
-                if (
-                    CONF_DEVICE_ENCRYPTION_KEY in device
-                    and device[CONF_DEVICE_ENCRYPTION_KEY]
-                ):
-                    p_id = bytes.fromhex(dict_get_or_clean(device).lower())
-                    p_key = bytes.fromhex(device[CONF_DEVICE_ENCRYPTION_KEY].lower())
-                    self.aeskeys[p_id] = p_key
-                else:
-                    continue
-        self.logger.debug("%s encryptors mac:key pairs loaded", len(self.aeskeys))
-
-        # prepare sensor whitelist to speedup parser
-        if (
+        self.aeskeys = self._load_aeskeys()
+        self.discovery = not (
             isinstance(self.config[CONF_DISCOVERY], bool)
             and self.config[CONF_DISCOVERY] is False
-        ):
-            self.discovery = False
-            if self.config[CONF_DEVICES]:
-                for device in self.config[CONF_DEVICES]:
-                    self.sensor_whitelist.append(dict_get_or(device))
-
-        # remove duplicates from sensor whitelist
-        self.sensor_whitelist = list(dict.fromkeys(self.sensor_whitelist))
-        self.logger.debug(
-            "sensor whitelist: [%s]", ", ".join(self.sensor_whitelist).upper()
         )
-        for i, key in enumerate(self.sensor_whitelist):
-            self.sensor_whitelist[i] = bytes.fromhex(identifier_clean(key))
-        self.logger.debug(
-            "%s sensor whitelist item(s) loaded", len(self.sensor_whitelist)
+        self.sensor_whitelist = self._load_sensor_whitelist()
+
+        # checked on the fhempy event loop, before events cross threads
+        prefilter = PreFilter.from_devices(
+            self.config[CONF_DEVICES], discovery=self.discovery
         )
+        if self.prefilter is not None:
+            prefilter.stats = self.prefilter.stats
+            prefilter.last_seen = self.prefilter.last_seen
+        self.prefilter = prefilter
+
+        self.tracker_whitelist = self._load_tracker_whitelist()
+
+    def _load_aeskeys(self):
+        """Prepare device:key lists to speedup parser."""
+        aeskeys = {}
+        for device in self.config[CONF_DEVICES] or []:
+            if (
+                CONF_DEVICE_ENCRYPTION_KEY in device
+                and device[CONF_DEVICE_ENCRYPTION_KEY]
+            ):
+                p_id = bytes.fromhex(dict_get_or_clean(device).lower())
+                p_key = bytes.fromhex(device[CONF_DEVICE_ENCRYPTION_KEY].lower())
+                aeskeys[p_id] = p_key
+        self.logger.debug("%s encryptors mac:key pairs loaded", len(aeskeys))
+        return aeskeys
+
+    def _load_sensor_whitelist(self):
+        """Prepare sensor whitelist to speedup parser, only used without
+        discovery."""
+        sensor_whitelist = []
+        if not self.discovery:
+            for device in self.config[CONF_DEVICES] or []:
+                sensor_whitelist.append(dict_get_or(device))
 
-        # prepare device tracker list to speedup parser
-        if self.config[CONF_DEVICES]:
-            for device in self.config[CONF_DEVICES]:
-                if CONF_DEVICE_TRACK in device and device[CONF_DEVICE_TRACK]:
-                    track_key = bytes.fromhex(dict_get_or_clean(device))
-                    self.tracker_whitelist.append(track_key)
-                else:
-                    continue
+        # remove duplicates from sensor whitelist
+        sensor_whitelist = list(dict.fromkeys(sensor_whitelist))
+        self.logger.debug("sensor whitelist: [%s]", ", ".join(sensor_whitelist).upper())
+        sensor_whitelist = [
+            bytes.fromhex(identifier_clean(key)) for key in sensor_whitelist
+        ]
+        self.logger.debug("%s sensor whitelist item(s) loaded", len(sensor_whitelist))
+        return sensor_whitelist
+
+    def _load_tracker_whitelist(self):
+        """Prepare device tracker list to speedup parser."""
+        tracker_whitelist = []
+        for device in self.config[CONF_DEVICES] or []:
+            if CONF_DEVICE_TRACK in device and device[CONF_DEVICE_TRACK]:
+                tracker_whitelist.append(bytes.fromhex(dict_get_or_clean(device)))
         self.logger.debug(
-            "%s device tracker(s) being monitored", len(self.tracker_whitelist)
+            "%s device tracker(s) being monitored", len(tracker_whitelist)
         )
-
-        # prepare the ble_parser
-        self.ble_parser = BleParser(
-            report_unknown=self.report_unknown,
-            discovery=self.discovery,
-            filter_duplicates=self.filter_duplicates,
-            sensor_whitelist=self.sensor_whitelist,
-            tracker_whitelist=self.tracker_whitelist,
-            aeskeys=self.aeskeys,
+        return tracker_whitelist
+
+    def reconfigure(self, config):
+        """Swap whitelists and keys of the running parser, the parser state
+        (e.g. last packet ids) is kept."""
+        self.load_config(config)
+        self._event_loop.call_soon_threadsafe(
+            self.update_parser,
+            self.report_unknown,
+            self.discovery,
+            self.sensor_whitelist,
+            self.tracker_whitelist,
+            self.aeskeys,
         )
 
-    def process_hci_events(self, data, gateway_id=""):
-        """Parse HCI events."""
-        self.evt_cnt += 1
-        if len(data) < 12:
+    def update_parser(
+        self, report_unknown, discovery, sensor_whitelist, tracker_whitelist, aeskeys
+    ):
+        """Runs in the HCIdump thread, between two batches."""
+        self.ble_parser.report_unknown = report_unknown
+        self.ble_parser.discovery = discovery
+        self.ble_parser.sensor_whitelist = sensor_whitelist
+        self.ble_parser.tracker_whitelist = tracker_whitelist
+        self.ble_parser.aeskeys = aeskeys
+        self.logger.debug("HCIdump thread: parser reconfigured")
+
+    def process_hci_events(self, gateway_id=""):
+        """Parse all pending HCI events, the messages are put into the queues
+        as one list per batch."""
+        self._scheduled = False
+        sensor_msgs = []
+        tracker_msgs = []
+        while self._pending:
+            data = self._pending.popleft()
+            self.evt_cnt += 1
+            sensor_msg, tracker_msg = self.ble_parser.parse_data(data)
+            if sensor_msg:
+                sensor_msgs.append(sensor_msg)
+            if tracker_msg:
+                tracker_msg[CONF_GATEWAY_ID] = gateway_id
+                tracker_msgs.append(tracker_msg)
+        self.msg_cnt += len(sensor_msgs) + len(tracker_msgs)
+        if sensor_msgs:
+            self.dataqueue_meas.sync_q.put_nowait(sensor_msgs)
+        if tracker_msgs:
+            self.dataqueue_tracker.sync_q.put_nowait(tracker_msgs)
+
+    def feed(self, advertisement):
+        """Pass an advertisement from the BLE scanner to the parser thread."""
+        if self._event_loop.is_closed() or not self.prefilter.check(advertisement.raw):
             return
-        sensor_msg, tracker_msg = self.ble_parser.parse_data(data)
-        if sensor_msg:
-            measurements = list(sensor_msg.keys())
-            device_type = sensor_msg["type"]
-            sensor_list = (
-                MEASUREMENT_DICT[device_type][0] + MEASUREMENT_DICT[device_type][1]
-            )
-            binary_list = MEASUREMENT_DICT[device_type][2] + ["battery"]
-            measuring = any(x in measurements for x in sensor_list)
-            binary = any(x in measurements for x in binary_list)
-            if binary == measuring:
-                self.dataqueue_bin.sync_q.put_nowait(sensor_msg)
-                self.dataqueue_meas.sync_q.put_nowait(sensor_msg)
-            else:
-                if binary is True:
-                    self.dataqueue_bin.sync_q.put_nowait(sensor_msg)
-                if measuring is True:
-                    self.dataqueue_meas.sync_q.put_nowait(sensor_msg)
-        if tracker_msg:
-            tracker_msg[CONF_GATEWAY_ID] = gateway_id
-            self.dataqueue_tracker.sync_q.put_nowait(tracker_msg)
+        self._pending.append(advertisement.raw)
+        # one wakeup of the parser thread for all events until it runs
+        if not self._scheduled:
+            self._scheduled = True
+            self._event_loop.call_soon_threadsafe(self.process_hci_events)
 
     def run(self):
-        """Run HCIdump thread."""
-        while True:
-            self.logger.debug("HCIdump thread: Run")
-            mysocket = {}
-            fac = {}
-            conn = {}
-            btctrl = {}
-            interface_is_ok = {}
-            interfaces_to_reset = []
-            initialized_evt = {}
-            if self._event_loop is None:
-                self._event_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._event_loop)
-            if "disable" not in self.config[CONF_BT_INTERFACE]:
-                for hci in self._interfaces:
-                    interface_is_ok[hci] = False
-                    try:
-                        mysocket[hci] = aiobs.create_bt_socket(hci)
-                    except OSError as error:
-                        self.logger.error(
-                            "HCIdump thread: OS error (hci%i): %s", hci, error
-                        )
-                    else:
-                        fac[hci] = getattr(
-                            self._event_loop, "_create_connection_transport"
-                        )(mysocket[hci], aiobs.BLEScanRequester, None, None)
-                        conn[hci], btctrl[hci] = self._event_loop.run_until_complete(
-                            fac[hci]
-                        )
-                        # Wait up to five seconds for aioblescan BLEScanRequester to initialize
-                        initialized_evt[hci] = getattr(btctrl[hci], "_initialized")
-                        self.logger.debug(
-                            "HCIdump thread: BLEScanRequester._initialized is %s for hci%i, "
-                            " waiting for connection...",
-                            initialized_evt[hci].is_set(),
-                            hci,
-                        )
-                        try:
-                            self._event_loop.run_until_complete(
-                                asyncio.wait_for(initialized_evt[hci].wait(), 5)
-                            )
-                        except asyncio.TimeoutError:
-                            self.logger.error(
-                                "HCIdump thread: Something wrong - interface hci%i not ready,"
-                                " and will be skipped for current scan period.",
-                                hci,
-                            )
-                        else:
-                            btctrl[hci].process = self.process_hci_events
-                            self.logger.debug("HCIdump thread: connected to hci%i", hci)
-                            try:
-                                self._event_loop.run_until_complete(
-                                    btctrl[hci].send_scan_request(self._active)
-                                )
-                            except RuntimeError as error:
-                                self.logger.error(
-                                    "HCIdump thread: Runtime error while sending scan request on hci%i: %s.",
-                                    hci,
-                                    error,
-                                )
-                            else:
-                                interface_is_ok[hci] = True
-                                self.logger.debug(
-                                    "HCIdump thread: BLEScanRequester._initialized is %s for hci%i, "
-                                    " connection established, send_scan_request succeeded.",
-                                    initialized_evt[hci].is_set(),
-                                    hci,
-                                )
-                    if (interface_is_ok[hci] is False) and (
-                        self.config[CONF_BT_AUTO_RESTART] is True
-                    ):
-                        interfaces_to_reset.append(hci)
-                if interfaces_to_reset:
-                    ts_now = datetime.now()
-                    if (ts_now - self.last_bt_reset).seconds > 60:
-                        for iface in interfaces_to_reset:
-                            self.logger.error(
-                                "HCIdump thread: Trying to power cycle Bluetooth adapter hci%i %s,"
-                                " will try to use it next scan period.",
-                                iface,
-                                BT_INTERFACES[iface],
-                            )
-                            reset_bluetooth(iface)
-                        self.last_bt_reset = ts_now
-            self.logger.debug("HCIdump thread: start main event_loop")
-            try:
-                self._event_loop.run_forever()
-            finally:
-                self.logger.debug("HCIdump thread: main event_loop stopped, finishing.")
-                if "disable" not in self.config[CONF_BT_INTERFACE]:
-                    for hci in self._interfaces:
-                        if interface_is_ok[hci] is True:
-                            try:
-                                self._event_loop.run_until_complete(
-                                    btctrl[hci].stop_scan_request()
-                                )
-                            except RuntimeError as error:
-                                self.logger.error(
-                                    "HCIdump thread: Runtime error while stop scan request on hci%i: %s.",
-                                    hci,
-                                    error,
-                                )
-                            except KeyError:
-                                self.logger.debug(
-                                    "HCIdump thread: Key error while stop scan request on hci%i",
-                                    hci,
-                                )
-                        try:
-                            conn[hci].close()
-                        except KeyError:
-                            self.logger.debug(
-                                "HCIdump thread: Key error while closing connection on hci%i",
-                                hci,
-                            )
-                self._event_loop.run_until_complete(asyncio.sleep(0))
-            if self._joining is True:
-                break
-            self.logger.debug("HCIdump thread: Scanning will be restarted")
-            self.logger.debug(
-                "%i HCI events processed for previous period", self.evt_cnt
-            )
-            self.evt_cnt = 0
-        self._event_loop.close()
+        """Run HCIdump thread, HCI events are received by the BLE scanner."""
+        self.logger.debug("HCIdump thread: Run")
+        asyncio.set_event_loop(self._event_loop)
+        try:
+            self._event_loop.run_forever()
+        finally:
+            self._event_loop.close()
+        self.logger.debug(
+            "%i HCI events processed, %i messages parsed, pre-filter: %s",
+            self.evt_cnt,
+            self.msg_cnt,
+            self.prefilter.stats,
+        )
         self.logger.debug("HCIdump thread: Run finished")
 
     def join(self, timeout=1):
         """Join HCIdump thread."""
         self.logger.debug("HCIdump thread: joining")
-        self._joining = True
         try:
             self._event_loop.call_soon_threadsafe(self._event_loop.stop)
-        except AttributeError as error:
+        except RuntimeError as error:
             self.logger.debug("%s", error)
         finally:
             Thread.join(self, timeout)
             self.logger.debug("HCIdump thread: joined")
-
-    def restart(self):
-        """Restarting scanner."""
-        try:
-            self._event_loop.call_soon_threadsafe(self._event_loop.stop)
-        except AttributeError as error:
-            self.logger.debug("%s", error)
@@ -0,0 +1,79 @@
+"""Checks on raw HCI advertising reports before they reach the parser thread."""
+import time
+
+from .const import (
+    CONF_DEVICE_DUPLICATE_WINDOW,
+    CONF_MAC,
+    DEFAULT_DEVICE_DUPLICATE_WINDOW,
+)
+
+# forget payloads of foreign devices if discovery is enabled
+MAX_SEEN = 4096
+
+
+def raw_mac(mac: str) -> bytes:
+    """MAC in the byte order of the HCI event."""
+    return bytes.fromhex(mac.replace(":", ""))[::-1]
+
+
+class PreFilter:
+    """Whitelist and duplicate filter for advertisements.
+
+    whitelist maps the raw MAC to the duplicate window in seconds, None lets
+    all devices pass. Identical payloads of one MAC are dropped within the
+    window, 0 disables it.
+    """
+
+    def __init__(
+        self, whitelist=None, duplicate_window=DEFAULT_DEVICE_DUPLICATE_WINDOW
+    ):
+        self.whitelist = whitelist
+        self.duplicate_window = duplicate_window
+        self.last_seen = {}
+        self.stats = {"received": 0, "filtered": 0, "duplicates": 0, "passed": 0}
+
+    @staticmethod
+    def from_devices(devices, discovery=False):
+        if discovery:
+            return PreFilter()
+        whitelist = {}
+        for device in devices:
+            if not device.get(CONF_MAC):
+                # uuid devices can't be filtered by MAC
+                return PreFilter()
+            whitelist[raw_mac(device[CONF_MAC])] = device.get(
+                CONF_DEVICE_DUPLICATE_WINDOW, DEFAULT_DEVICE_DUPLICATE_WINDOW
+            )
+        return PreFilter(whitelist)
+
+    def check(self, data: bytes) -> bool:
+        """True if the LE advertising report in data should be parsed."""
+        self.stats["received"] += 1
+        if data[3] == 0x0D:
+            mac = data[8:14]
+            payload = data[29:]
+        else:
+            mac = data[7:13]
+            # without RSSI
+            payload = data[14:-1]
+
+        if self.whitelist is None:
+            window = self.duplicate_window
+        else:
+            window = self.whitelist.get(mac)
+            if window is None:
+                self.stats["filtered"] += 1
+                return False
+
+        if window:
+            now = time.monotonic()
+            last = self.last_seen.get(mac)
+            if last is not None and last[0] == payload and now - last[1] < window:
+                self.stats["duplicates"] += 1
+                return False
+            if len(self.last_seen) >= MAX_SEEN:
+                self.last_seen = {}
+            self.last_seen[mac] = (payload, now)
+
+        self.stats["passed"] += 1
+        return True
@@ -11,11 +11,11 @@ from bluepy.btle import (
     BTLEDisconnectError,
     Peripheral,
     ScanEntry,
-    Scanner,
 )
 from fhempy.lib.generic import FhemModule
 
 from .. import fhem, utils
+from ..core import ble_scanner
 
 
 class PeripheralTimeout(Peripheral):
@@ -77,10 +77,11 @@ class scanner:
 
     def __init__(self, logger):
         self.logger = logger
-        self.loop = asyncio.get_event_loop()
         self._mac_listener = {}
         self._mac_lastfound = {}
-        self._scan_task = None
+        self._mac_lastadv = {}
+        self._subscription = None
+        self._check_task = None
         self._scan_interval = 10
         self._scan_duration = 10
         self._iface = 0
@@ -93,35 +94,41 @@ class scanner:
 
     def register_mac_listener(self, mac, listener):
         self._mac_listener[mac.lower()] = listener
-        if self._scan_task is None:
-            self._scan_task = asyncio.create_task(self.loop_scan())
+        self._subscribe()
+        if self._check_task is None:
+            self._check_task = asyncio.create_task(self.loop_check())
 
     def unregister_mac_listener(self, mac):
+        mac = mac.lower()
         if mac in self._mac_listener:
             del self._mac_listener[mac]
+        self._subscribe()
         if len(self._mac_listener) == 0:
-            if self._scan_task:
-                self._scan_task.cancel()
-                self._scan_task = None
-
-    def handleDiscovery(self, dev, isNewDev, isNewData):
-        asyncio.run_coroutine_threadsafe(
-            self.handle_discovery(dev, isNewDev, isNewData), self.loop
-        ).result()
-
-    async def handle_discovery(self, dev, isNewDev, isNewData):
-        if dev.addr.lower() in self._mac_listener:
-            self.logger.debug(f"found {dev.addr.lower()}")
-            if isNewDev:
-                self._mac_lastfound[dev.addr.lower()] = time.time()
-                name = ""
-                if dev.getValueText(ScanEntry.SHORT_LOCAL_NAME):
-                    name = dev.getValueText(ScanEntry.SHORT_LOCAL_NAME)
-                else:
-                    name = dev.getValueText(ScanEntry.COMPLETE_LOCAL_NAME)
-                await getattr(self._mac_listener[dev.addr.lower()], "update_readings")(
-                    "present", dev.addr.lower(), name, dev.rssi
-                )
+            if self._check_task:
+                self._check_task.cancel()
+                self._check_task = None
+
+    def _subscribe(self):
+        # one subscription for all listened macs at the shared scanner
+        hub = ble_scanner.BLEScanner.get_instance()
+        if self._subscription:
+            hub.unsubscribe(self._subscription)
+            self._subscription = None
+        if len(self._mac_listener) > 0:
+            # active scan to receive the device name
+            self._subscription = hub.subscribe(
+                self.handle_advertisement,
+                hci=self._iface,
+                macs=list(self._mac_listener),
+                active=True,
+            )
+
+    def handle_advertisement(self, adv):
+        self._mac_lastfound[adv.mac] = time.time()
+        if adv.name or adv.mac not in self._mac_lastadv:
+            self._mac_lastadv[adv.mac] = (adv.name, adv.rssi)
+        else:
+            self._mac_lastadv[adv.mac] = (self._mac_lastadv[adv.mac][0], adv.rssi)
 
     def set_scan_interval(self, scan_interval):
         self._scan_interval = scan_interval
@@ -130,38 +137,31 @@ class scanner:
         self._scan_duration = scan_duration
 
     def set_hci_device(self, hci_nr):
-        self._iface = hci_nr
+        if self._iface != hci_nr:
+            self._iface = hci_nr
+            self._subscribe()
 
-    async def loop_scan(self):
+    async def loop_check(self):
         while True:
-            for mac in self._mac_lastfound:
-                self._mac_lastfound[mac] = 0
-            try:
-                await utils.run_blocking(functools.partial(self._do_scan))
-            except Exception:
-                self.logger.error("Failed to do scan")
-            for mac in self._mac_listener:
+            await asyncio.sleep(self._scan_interval)
+            # absent if not seen within the last scan period
+            min_lastfound = time.time() - self._scan_interval - self._scan_duration
+            for mac in list(self._mac_listener):
                 try:
-                    if mac not in self._mac_lastfound or self._mac_lastfound[mac] == 0:
+                    if self._mac_lastfound.get(mac, 0) < min_lastfound:
                         await getattr(self._mac_listener[mac], "update_readings")(
                             "absent", mac, "", 0
                         )
                     else:
+                        (name, rssi) = self._mac_lastadv[mac]
+                        await getattr(self._mac_listener[mac], "update_readings")(
+                            "present", mac, name, rssi
+                        )
                         await getattr(
                             self._mac_listener[mac], "check_update_characteristics"
                         )()
                 except Exception:
                     self.logger.exception("Failed to handle updates after scan")
-            await asyncio.sleep(self._scan_interval)
-
-    def _do_scan(self):
-        self.scanner = Scanner(self._iface).withDelegate(self)
-        try:
-            self.scanner.scan(self._scan_duration)
-        except BTLEDisconnectError:
-            return
-        except Exception as ex:
-            self.logger.error(f"Failed to scan: {ex}")
 
 
 class ble_presence(FhemModule):
@@ -232,12 +232,13 @@ class ble_presence(FhemModule):
                     ADDR_TYPE_PUBLIC,
                     self._hci_nr,
                     5,
-                )
+                ),
+                pool="ble",
             )
         except Exception:
             return
         services = await utils.run_blocking(
-            functools.partial(self._peripheral.getServices)
+            functools.partial(self._peripheral.getServices), pool="ble"
         )
         await fhem.readingsBeginUpdate(self.hash)
         try:
@@ -254,7 +255,7 @@ class ble_presence(FhemModule):
                                 reading = "battery"
                             try:
                                 val = await utils.run_blocking(
-                                    functools.partial(char.read)
+                                    functools.partial(char.read), pool="ble"
                                 )
                             except Exception:
                                 val = "failed"
@@ -300,7 +301,7 @@ class ble_presence(FhemModule):
         scanner.get_instance(self.logger).set_scan_duration(self._attr_scan_duration)
 
     async def set_attr_hci_device(self, hash):
-        self._hci_nr = re.search(r"\d+$", self._attr_hci_device)[0]
+        self._hci_nr = int(re.search(r"\d+$", self._attr_hci_device)[0])
         scanner.get_instance(self.logger).set_hci_device(self._hci_nr)
 
     # FHEM FUNCTION
@@ -1,5 +1,4 @@
 import asyncio
-import concurrent
 import datetime
 import functools
 import re
@@ -95,10 +94,7 @@ class ble_reset(FhemModule):
                 return
 
     async def ble_reset_once(self):
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            await asyncio.get_event_loop().run_in_executor(
-                pool, functools.partial(self.do_ble_reset)
-            )
+        await utils.run_blocking(functools.partial(self.do_ble_reset), pool="ble")
         now = datetime.datetime.now()
         await fhem.readingsSingleUpdate(
             self.hash, "lastreset", f"{now.hour:02}:{now.minute:02}", 1
@@ -1,12 +1,14 @@
 import asyncio
 import codecs
 import functools
-import time
 
-from .. import fhem, generic, utils
-from ..core import ble
+from .. import fhem, generic
+from ..core import ble_async, ble_scheduler
 
 DEFAULT_TIMEOUT = 1
+BLE_RETRIES = 10
+# measuring waits up to 60s for the notification
+MEASURE_TIMEOUT = 70
 
 
 class blue_connect(generic.FhemModule):
@@ -33,7 +35,7 @@ class blue_connect(generic.FhemModule):
             return "Usage: define my_blueconnect fhempy blue_connect MAC"
         self._mac = args[3]
         self.hash["MAC"] = self._mac
-        self._conn = ble.BTLEConnection(
+        self._conn = ble_async.AsyncBTLEConnection(
             self._mac,
             keep_connected=True,
         )
@@ -68,33 +70,15 @@ class blue_connect(generic.FhemModule):
         )
         self.water_conductivity = round(float(raw_conductivity) / 0.4134)
 
-    def blocking_measure(self):
-        for cnt in range(0, 10):
-            try:
-                # enable notifications
-                self._conn.write_characteristic(0x0014, b"\x01\x00")
-                # start measuring
-                self._conn.write_characteristic(0x0012, b"\x01", 60)
-                break
-            except BrokenPipeError:
-                self.logger.error("BrokenPipeError, reconnect BLE")
-                self._conn.disconnect()
-                self._conn.stop_helper()
-            except Exception:
-                self.logger.exception("Failed to write characteristics")
-                time.sleep(10)
+    async def ble_measure(self):
+        # enable notifications
+        await self._conn.write_characteristic(0x0014, b"\x01\x00")
+        # start measuring
+        await self._conn.write_characteristic(0x0012, b"\x01", 60)
 
-    def blocking_read_others(self):
-        for cnt in range(0, 10):
-            try:
-                data = self._conn.read_characteristic(0x18)
-                self.other_18 = codecs.encode(data, "hex")
-            except BrokenPipeError:
-                self.logger.error("BrokenPipeError, reconnect BLE")
-                self._conn.stop_helper()
-            except Exception:
-                self.logger.exception("Failed to read characteristics")
-                time.sleep(10)
+    async def ble_read_others(self):
+        data = await self._conn.read_characteristic(0x18)
+        self.other_18 = codecs.encode(data, "hex")
 
     async def update_loop(self):
         while True:
@@ -109,16 +93,36 @@ class blue_connect(generic.FhemModule):
     async def keep_connected(self):
         while True:
             try:
-                async with self._ble_lock:
-                    await utils.run_blocking(
-                        functools.partial(self.blocking_read_others)
-                    )
+                await self._retry_in_slot(self.ble_read_others)
             except asyncio.CancelledError:
                 break
             except Exception:
                 self.logger.exception("Failed to update readings")
             await asyncio.sleep(60)
 
+    async def _run_in_slot(self, fct, timeout=ble_scheduler.SLOT_TIMEOUT):
+        try:
+            await ble_scheduler.BLEConnectionScheduler.get_instance().run_async(
+                self._mac,
+                functools.partial(self._conn.call_on_iface, fct),
+                timeout=timeout,
+            )
+        finally:
+            await ble_scheduler.update_stats_readings(self.hash, self._mac)
+
+    async def _retry_in_slot(self, fct, timeout=ble_scheduler.SLOT_TIMEOUT):
+        # one slot per attempt, the adapter is free while waiting for a retry
+        for cnt in range(0, BLE_RETRIES):
+            try:
+                async with self._ble_lock:
+                    await self._run_in_slot(fct, timeout=timeout)
+                return
+            except ble_async.BLEDisconnectError as ex:
+                self.logger.error(f"{ex}, reconnect BLE")
+            except Exception:
+                self.logger.exception(f"Failed to run {fct.__name__}")
+                await asyncio.sleep(10)
+
     async def measure_once(self):
         self.water_temp = 0
         self.water_orp = 0
@@ -126,8 +130,7 @@ class blue_connect(generic.FhemModule):
         self.water_conductivity = 0
         self.water_salt = 0
 
-        async with self._ble_lock:
-            await utils.run_blocking(functools.partial(self.blocking_measure))
+        await self._retry_in_slot(self.ble_measure, timeout=MEASURE_TIMEOUT)
         await fhem.readingsBeginUpdate(self.hash)
         await fhem.readingsBulkUpdate(self.hash, "unknown_handle_18", self.other_18)
         await fhem.readingsBulkUpdate(self.hash, "temperature", self.water_temp)
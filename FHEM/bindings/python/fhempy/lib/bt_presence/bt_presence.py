@@ -36,7 +36,7 @@ class bt_presence(FhemModule):
                 device_name = None
                 for i in range(0, 2):
                     device_name = await utils.run_blocking(
-                        functools.partial(self.lookup_name, self._address)
+                        functools.partial(self.lookup_name, self._address), pool="ble"
                     )
                     if device_name:
                         break
@@ -44,7 +44,7 @@ class bt_presence(FhemModule):
                 if device_name:
                     self._btrssi = BluetoothRSSI(self._address)
                     rssi = await utils.run_blocking(
-                        functools.partial(self._btrssi.request_rssi)
+                        functools.partial(self._btrssi.request_rssi), pool="ble"
                     )
                     self._btrssi.close()
                     rssi = rssi[0]
@@ -93,6 +93,17 @@ class BTLEConnection(btle.DefaultDelegate):
                 except Exception:
                     pass
 
+    def set_iface(self, iface):
+        """Try this interface first on the next connect."""
+        iface = str(iface)
+        if iface in self._ifaces:
+            self._iface_idx = self._ifaces.index(iface)
+
+    def call_on_iface(self, function, iface):
+        """Used with BLEConnectionScheduler.run to connect via the slot iface."""
+        self.set_iface(iface)
+        return function()
+
     def next_iface(self):
         self._nr_conn_errors += 1
         self._iface_idx = (self._iface_idx + 1) % len(self._ifaces)
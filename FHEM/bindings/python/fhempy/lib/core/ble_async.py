@@ -0,0 +1,299 @@
+"""
+Asyncio GATT transport, talks to bluepy's bluepy-helper through a pipe so
+connects, reads, writes and notifications never block the event loop.
+"""
+import asyncio
+import binascii
+import logging
+
+from .ble_scheduler import get_hci_interfaces
+
+DEFAULT_TIMEOUT = 1
+CONNECT_TIMEOUT = 10
+RESPONSE_TIMEOUT = 10
+
+logger = logging.getLogger(__name__)
+
+
+class BLEError(Exception):
+    def __init__(self, message, resp=None):
+        super().__init__(message)
+        self.resp = resp
+
+
+class BLEDisconnectError(BLEError):
+    pass
+
+
+class BLEGattError(BLEError):
+    pass
+
+
+def helper_exe():
+    from bluepy import btle
+
+    return btle.helperExe
+
+
+def parse_response(line):
+    """Parse one bluepy-helper response line, same format as bluepy."""
+    resp = {}
+    for item in line.rstrip().split("\x1e"):
+        (tag, tval) = item.split("=", 1)
+        if len(tval) == 0:
+            val = None
+        elif tval[0] in ("$", "'"):
+            val = tval[1:]
+        elif tval[0] == "h":
+            val = int(tval[1:], 16)
+        elif tval[0] == "b":
+            val = binascii.a2b_hex(tval[1:])
+        else:
+            raise BLEError(f"Cannot understand response value {tval!r}")
+        resp.setdefault(tag, []).append(val)
+    return resp
+
+
+class AsyncBTLEConnection:
+    """GATT connection to one device. All coroutines can be cancelled, the
+    helper process is killed then and the next call connects again."""
+
+    def __init__(
+        self,
+        mac,
+        keep_connected=False,
+        connection_established_callback=None,
+        max_retries=5,
+        addr_type="public",
+    ):
+        self._mac = mac
+        self._addr_type = addr_type
+        self._ifaces = get_hci_interfaces()
+        self._iface_idx = 0
+        self._keep_connected = keep_connected
+        self._connection_established_callback = connection_established_callback
+        self._max_retries = max_retries
+        self._callbacks = {}
+        self._proc = None
+        self._reader = None
+        self._responses = None
+        self._connected = False
+        self._notified = asyncio.Event()
+        self._connect_lock = asyncio.Lock()
+        self._cmd_lock = asyncio.Lock()
+
+    @property
+    def mac(self):
+        return self._mac
+
+    @property
+    def is_connected(self):
+        return self._proc is not None and self._connected
+
+    def set_max_retries(self, max_retries):
+        self._max_retries = max_retries
+
+    def set_keep_connected(self, new_state):
+        self._keep_connected = new_state
+        if new_state is False and self._proc is not None:
+            asyncio.ensure_future(self.disconnect())
+
+    def set_iface(self, iface):
+        """Try this interface first on the next connect."""
+        iface = int(iface)
+        if iface in self._ifaces:
+            self._iface_idx = self._ifaces.index(iface)
+
+    async def call_on_iface(self, coroutine_function, iface):
+        """Used with BLEConnectionScheduler.run_async to connect via the slot
+        iface."""
+        self.set_iface(iface)
+        return await coroutine_function()
+
+    def set_callback(self, handle, function):
+        """function(data) is called on the event loop for each notification of
+        handle, use "all" for all handles."""
+        self._callbacks.setdefault(handle, []).append(function)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._keep_connected is False:
+            await self.disconnect()
+
+    async def connect(self, timeout=CONNECT_TIMEOUT):
+        if self.is_connected:
+            return
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            logger.debug(f"Trying to connect to {self._mac}")
+            errors = 0
+            while True:
+                iface = self._ifaces[self._iface_idx]
+                try:
+                    await self._connect(iface, timeout)
+                    break
+                except (BLEError, asyncio.TimeoutError) as ex:
+                    errors += 1
+                    logger.debug(
+                        f"Unable to connect to {self._mac} using hci{iface}: {ex!r}"
+                    )
+                    # two tries per iface
+                    if errors >= len(self._ifaces) * self._max_retries * 2:
+                        raise
+                    if errors % 2 == 0:
+                        self._iface_idx = (self._iface_idx + 1) % len(self._ifaces)
+            logger.debug(f"Connected to {self._mac} using hci{iface}")
+        if self._connection_established_callback is not None:
+            await self._connection_established_callback(self._mac)
+
+    async def _connect(self, iface, timeout):
+        await self._start_helper(iface)
+        try:
+            resp = await self._command(
+                f"conn {self._mac} {self._addr_type} hci{iface}\n", "stat", timeout
+            )
+            while resp["state"][0] == "tryconn":
+                resp = await self._wait_response("stat", timeout)
+            if resp["state"][0] != "conn":
+                raise BLEDisconnectError(f"Failed to connect to {self._mac}", resp)
+        except BaseException:
+            self._stop_helper()
+            raise
+        self._connected = True
+
+    async def disconnect(self):
+        if self._proc is None:
+            return
+        proc = self._proc
+        try:
+            if self._connected:
+                await self._command("disc\n", "stat")
+        except Exception as ex:
+            logger.debug(f"Failed to disconnect from {self._mac}: {ex!r}")
+        finally:
+            self._stop_helper()
+        await proc.wait()
+
+    async def read_characteristic(self, handle):
+        async with self:
+            resp = await self._command(f"rd {handle:X}\n", "rd")
+            return resp["d"][0]
+
+    async def write_characteristic(
+        self, handle, value, timeout=DEFAULT_TIMEOUT, with_response=True
+    ):
+        """Write value to handle, afterwards wait up to timeout seconds for a
+        notification. Returns True if a notification was received."""
+        async with self:
+            logger.debug(
+                f"Writing {value.hex()} to {handle} with with_response={with_response}"
+            )
+            self._notified.clear()
+            cmd = "wrr" if with_response else "wr"
+            await self._command(f"{cmd} {handle:X} {value.hex()}\n", "wr")
+            if timeout:
+                return await self.wait_for_notification(timeout)
+        return False
+
+    async def wait_for_notification(self, timeout):
+        try:
+            await asyncio.wait_for(self._notified.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _start_helper(self, iface):
+        self._stop_helper()
+        self._proc = await asyncio.create_subprocess_exec(
+            helper_exe(),
+            str(iface),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._responses = asyncio.Queue()
+        self._reader = asyncio.create_task(
+            self._read_responses(self._proc, self._responses)
+        )
+
+    def _stop_helper(self):
+        self._connected = False
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._proc is not None:
+            if self._proc.returncode is None:
+                try:
+                    self._proc.kill()
+                except ProcessLookupError:
+                    pass
+            self._proc = None
+
+    async def _read_responses(self, proc, responses):
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    resp = parse_response(line.decode())
+                except (BLEError, ValueError):
+                    logger.debug(f"Invalid response from bluepy-helper: {line!r}")
+                    continue
+                if resp.get("rsp", [None])[0] in ("ntfy", "ind"):
+                    self._handle_notification(resp["hnd"][0], resp["d"][0])
+                else:
+                    responses.put_nowait(resp)
+        finally:
+            # wakes up a waiting command
+            responses.put_nowait(None)
+
+    def _handle_notification(self, handle, data):
+        logger.debug(f"Got notification from {self._mac} {handle}: {data.hex()}")
+        self._notified.set()
+        for callback in self._callbacks.get(handle, []) + self._callbacks.get(
+            "all", []
+        ):
+            try:
+                callback(data)
+            except Exception:
+                logger.exception(f"Failed to handle notification from {self._mac}")
+
+    async def _command(self, cmd, want, timeout=RESPONSE_TIMEOUT):
+        async with self._cmd_lock:
+            if self._proc is None:
+                raise BLEDisconnectError(f"Not connected to {self._mac}")
+            try:
+                self._proc.stdin.write(cmd.encode())
+                await self._proc.stdin.drain()
+                return await self._wait_response(want, timeout)
+            except OSError as ex:
+                self._stop_helper()
+                raise BLEDisconnectError(f"bluepy-helper for {self._mac}: {ex}")
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                # the helper is out of sync with us now
+                self._stop_helper()
+                raise
+
+    async def _wait_response(self, want, timeout):
+        while True:
+            resp = await asyncio.wait_for(self._responses.get(), timeout)
+            if resp is None:
+                self._stop_helper()
+                raise BLEDisconnectError(f"bluepy-helper for {self._mac} exited")
+            rsp = resp.get("rsp", [None])[0]
+            if rsp == want:
+                return resp
+            if rsp == "stat" and resp.get("state") == ["disc"]:
+                self._stop_helper()
+                raise BLEDisconnectError(f"Device {self._mac} disconnected", resp)
+            if rsp == "err":
+                code = resp.get("code", [None])[0]
+                if code == "atterr":
+                    raise BLEGattError(f"GATT request to {self._mac} failed", resp)
+                raise BLEError(f"Error from bluepy-helper ({code})", resp)
+            # management and scan responses are not used
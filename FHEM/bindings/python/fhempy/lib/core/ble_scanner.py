@@ -0,0 +1,388 @@
+"""
+Shared BLE scanner, runs one scan per HCI adapter on the fhempy event loop
+and dispatches the advertisements to all subscribed modules.
+"""
+import asyncio
+import logging
+import time
+
+import aioblescan as aiobs
+
+logger = logging.getLogger(__name__)
+
+# seconds to wait for the adapter and before opening it again after an error
+INIT_TIMEOUT = 5
+RETRY_INTERVAL = 30
+# the scan is restarted if no HCI events were received for this many seconds,
+# e.g. after an adapter reset
+WATCHDOG_TIMEOUT = 120
+
+AD_TYPE_UUID16 = (0x02, 0x03)
+AD_TYPE_UUID128 = (0x06, 0x07)
+AD_TYPE_NAME = (0x08, 0x09)
+AD_TYPE_SERVICE_DATA16 = 0x16
+AD_TYPE_MANUFACTURER_DATA = 0xFF
+
+
+class Advertisement:
+    """LE advertising report, AD structures are parsed on first access."""
+
+    def __init__(self, hci, mac, rssi, raw, ad_start, ad_end):
+        self.hci = hci
+        self.mac = mac
+        self.rssi = rssi
+        self.raw = raw
+        self._ad_start = ad_start
+        self._ad_end = ad_end
+        self._parsed = False
+        self._name = ""
+        self._service_uuids = []
+        self._service_data = {}
+        self._manufacturer_data = {}
+
+    def _parse(self):
+        self._parsed = True
+        data = self.raw
+        pos = self._ad_start
+        while pos + 1 < self._ad_end:
+            size = data[pos]
+            if size == 0 or pos + 1 + size > self._ad_end:
+                break
+            ad_type = data[pos + 1]
+            parser = self._AD_PARSERS.get(ad_type)
+            if parser is not None:
+                start = pos + 2
+                end = pos + 1 + size
+                parser(self, data[start:end])
+            pos += size + 1
+
+    def _parse_uuid16(self, value):
+        for i in range(0, len(value) - 1, 2):
+            uuid_end = i + 2
+            self._service_uuids.append(value[i:uuid_end][::-1].hex())
+
+    def _parse_uuid128(self, value):
+        for i in range(0, len(value) - 15, 16):
+            uuid_end = i + 16
+            self._service_uuids.append(format_uuid128(value[i:uuid_end]))
+
+    def _parse_name(self, value):
+        self._name = value.decode("utf-8", "replace")
+
+    def _parse_service_data16(self, value):
+        if len(value) < 2:
+            return
+        uuid = value[1::-1].hex()
+        self._service_data[uuid] = value[2:]
+        if uuid not in self._service_uuids:
+            self._service_uuids.append(uuid)
+
+    def _parse_manufacturer_data(self, value):
+        if len(value) < 2:
+            return
+        company_id = int.from_bytes(value[:2], "little")
+        self._manufacturer_data[company_id] = value[2:]
+
+    _AD_PARSERS = {
+        **dict.fromkeys(AD_TYPE_UUID16, _parse_uuid16),
+        **dict.fromkeys(AD_TYPE_UUID128, _parse_uuid128),
+        **dict.fromkeys(AD_TYPE_NAME, _parse_name),
+        AD_TYPE_SERVICE_DATA16: _parse_service_data16,
+        AD_TYPE_MANUFACTURER_DATA: _parse_manufacturer_data,
+    }
+
+    @property
+    def name(self) -> str:
+        if not self._parsed:
+            self._parse()
+        return self._name
+
+    @property
+    def service_uuids(self) -> list:
+        """16 bit UUIDs as 4 hex digits (e.g. fe95), 128 bit UUIDs as string."""
+        if not self._parsed:
+            self._parse()
+        return self._service_uuids
+
+    @property
+    def service_data(self) -> dict:
+        if not self._parsed:
+            self._parse()
+        return self._service_data
+
+    @property
+    def manufacturer_data(self) -> dict:
+        if not self._parsed:
+            self._parse()
+        return self._manufacturer_data
+
+
+def format_uuid128(value: bytes) -> str:
+    uuid = value[::-1].hex()
+    return "-".join([uuid[:8], uuid[8:12], uuid[12:16], uuid[16:20], uuid[20:]])
+
+
+def parse_advertisement(hci, data: bytes):
+    """Parse a HCI LE advertising report, returns None for other events."""
+    if len(data) < 12 or data[1] != 0x3E:
+        return None
+    # same checks as bleparser, so no event is hidden from ble_monitor
+    is_ext = data[3] == 0x0D
+    if not is_ext and data[3] != 0x02:
+        return None
+    ad_start = 29 if is_ext else 14
+    if len(data) < ad_start:
+        return None
+    ad_size = data[ad_start - 1]
+    msg_length = data[2] + 3
+    if msg_length != len(data) or msg_length != ad_start + ad_size + (
+        0 if is_ext else 1
+    ):
+        return None
+    rssi = data[18 if is_ext else msg_length - 1]
+    if rssi > 127:
+        rssi -= 256
+    mac = data[8:14] if is_ext else data[7:13]
+    mac = ":".join(f"{b:02x}" for b in mac[::-1])
+    return Advertisement(hci, mac, rssi, data, ad_start, ad_start + ad_size)
+
+
+class ScanRequester(aiobs.BLEScanRequester):
+    def __init__(self):
+        super().__init__()
+        self.lost = asyncio.Event()
+
+    def connection_lost(self, exc):
+        super().connection_lost(exc)
+        self.lost.set()
+
+
+class Subscription:
+    def __init__(self, callback, hci, macs, service_uuids, active):
+        self.callback = callback
+        self.hci = hci
+        self.macs = [mac.lower() for mac in macs or []]
+        self.service_uuids = [uuid.lower() for uuid in service_uuids or []]
+        self.active = active
+
+
+class HCIAdapter:
+    def __init__(self, scanner, hci):
+        self.scanner = scanner
+        self.hci = hci
+        self.subscriptions = []
+        self.by_mac = {}
+        self.by_uuid = {}
+        self.everything = []
+        self.active = False
+        self.conn = None
+        self.btctrl = None
+        self.task = None
+        self.last_event = 0
+        self.stats = {
+            "events": 0,
+            "advertisements": 0,
+            "dispatched": 0,
+            "errors": 0,
+            "restarts": 0,
+        }
+
+    @property
+    def scanning(self):
+        return self.btctrl is not None
+
+    def update_index(self):
+        self.by_mac = {}
+        self.by_uuid = {}
+        self.everything = []
+        for sub in self.subscriptions:
+            for mac in sub.macs:
+                self.by_mac.setdefault(mac, []).append(sub)
+            for uuid in sub.service_uuids:
+                self.by_uuid.setdefault(uuid, []).append(sub)
+            if not sub.macs and not sub.service_uuids:
+                self.everything.append(sub)
+
+        active = any(sub.active for sub in self.subscriptions)
+        if active != self.active:
+            self.active = active
+            if self.scanning:
+                asyncio.create_task(self._send_scan_request())
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self._start_scan()
+            except asyncio.CancelledError:
+                self.close()
+                raise
+            except Exception as ex:
+                self.stats["errors"] += 1
+                logger.error(f"Failed to start scan on hci{self.hci}: {ex}")
+                self.close()
+                self.scanner.adapter_failed(self.hci)
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                self.close()
+                raise
+            self.stats["restarts"] += 1
+            self.close()
+
+    async def _start_scan(self):
+        loop = asyncio.get_running_loop()
+        sock = aiobs.create_bt_socket(self.hci)
+        fac = getattr(loop, "_create_connection_transport")(
+            sock, ScanRequester, None, None
+        )
+        self.conn, btctrl = await fac
+        await asyncio.wait_for(btctrl._initialized.wait(), INIT_TIMEOUT)
+        btctrl.process = self.process
+        await btctrl.send_scan_request(self.active)
+        self.btctrl = btctrl
+        self.last_event = time.monotonic()
+        logger.debug(f"Scanning on hci{self.hci}")
+
+    async def _watch(self):
+        # returns if the scan has to be restarted
+        while True:
+            timeout = self.last_event + WATCHDOG_TIMEOUT - time.monotonic()
+            if timeout <= 0:
+                logger.warning(
+                    f"No events from hci{self.hci} for {WATCHDOG_TIMEOUT}s, "
+                    "restarting scan"
+                )
+                return
+            try:
+                await asyncio.wait_for(self.btctrl.lost.wait(), timeout)
+            except asyncio.TimeoutError:
+                continue
+            logger.warning(f"Lost connection to hci{self.hci}, restarting scan")
+            return
+
+    async def _send_scan_request(self):
+        try:
+            await self.btctrl.stop_scan_request()
+            await self.btctrl.send_scan_request(self.active)
+        except Exception:
+            logger.exception(f"Failed to change scan mode on hci{self.hci}")
+
+    def close(self):
+        self.btctrl = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    async def _stop_scan(self):
+        if self.btctrl is not None:
+            try:
+                await self.btctrl.stop_scan_request()
+            except Exception as ex:
+                logger.debug(f"Failed to stop scan on hci{self.hci}: {ex}")
+        self.close()
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        asyncio.create_task(self._stop_scan())
+
+    def process(self, data):
+        self.stats["events"] += 1
+        self.last_event = time.monotonic()
+        adv = parse_advertisement(self.hci, data)
+        if adv is None:
+            return
+        self.stats["advertisements"] += 1
+
+        subs = self.by_mac.get(adv.mac, [])
+        if self.by_uuid:
+            for uuid in adv.service_uuids:
+                subs = subs + self.by_uuid.get(uuid, [])
+        if self.everything:
+            subs = subs + self.everything
+
+        for sub in subs:
+            self.stats["dispatched"] += 1
+            try:
+                sub.callback(adv)
+            except Exception:
+                logger.exception(f"Failed to handle advertisement from {adv.mac}")
+
+
+class BLEScanner:
+    # one scanner for all modules, callbacks are called on the event loop
+    # and must not block:
+    # sub = BLEScanner.get_instance().subscribe(callback, macs=["aa:bb:..."])
+
+    instance = None
+
+    @staticmethod
+    def get_instance():
+        if BLEScanner.instance is None:
+            BLEScanner.instance = BLEScanner()
+        return BLEScanner.instance
+
+    def __init__(self):
+        self.adapters = {}
+        self.error_listeners = []
+
+    def subscribe(self, callback, hci=0, macs=None, service_uuids=None, active=False):
+        """Subscribe to advertisements of macs and/or service UUIDs, all
+        advertisements are received if both are empty. An active scan is used
+        if at least one subscriber requests it."""
+        sub = Subscription(callback, hci, macs, service_uuids, active)
+        adapter = self.adapters.get(hci)
+        if adapter is None:
+            adapter = self.adapters[hci] = HCIAdapter(self, hci)
+        adapter.subscriptions.append(sub)
+        adapter.update_index()
+        adapter.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        adapter = self.adapters.get(sub.hci)
+        if adapter is None or sub not in adapter.subscriptions:
+            return
+        adapter.subscriptions.remove(sub)
+        adapter.update_index()
+        if len(adapter.subscriptions) == 0:
+            adapter.stop()
+            del self.adapters[sub.hci]
+
+    def add_error_listener(self, listener):
+        """listener(hci) is called if an adapter can't be opened."""
+        if listener not in self.error_listeners:
+            self.error_listeners.append(listener)
+
+    def remove_error_listener(self, listener):
+        if listener in self.error_listeners:
+            self.error_listeners.remove(listener)
+
+    def adapter_failed(self, hci):
+        for listener in self.error_listeners:
+            try:
+                listener(hci)
+            except Exception:
+                logger.exception("Failed to call adapter error listener")
+
+    def get_stats(self):
+        return {
+            f"hci{hci}": dict(
+                adapter.stats,
+                scanning=adapter.scanning,
+                subscriptions=len(adapter.subscriptions),
+            )
+            for hci, adapter in self.adapters.items()
+        }
+
+    def stop(self):
+        for adapter in self.adapters.values():
+            adapter.stop()
+        self.adapters = {}
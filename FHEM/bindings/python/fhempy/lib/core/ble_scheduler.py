@@ -0,0 +1,184 @@
+import asyncio
+import functools
+import logging
+import os
+import re
+import time
+
+from .. import fhem, utils
+
+logger = logging.getLogger(__name__)
+
+# default time box for one connection slot in seconds
+SLOT_TIMEOUT = 60
+SYSFS_BLUETOOTH = "/sys/class/bluetooth"
+
+
+def get_hci_interfaces():
+    try:
+        ifaces = [
+            int(m[1])
+            for m in map(re.compile(r"^hci(\d+)$").match, os.listdir(SYSFS_BLUETOOTH))
+            if m
+        ]
+    except OSError:
+        ifaces = []
+    return sorted(ifaces) or [0]
+
+
+class AdapterSlot:
+    def __init__(self, hci):
+        self.hci = hci
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.stats = {"slots": 0, "timeouts": 0, "busy_time": 0}
+
+    @property
+    def load(self):
+        return self.waiting + int(self.lock.locked())
+
+
+class BLEConnectionScheduler:
+    # grants exclusive connection slots per HCI adapter, so only one GATT
+    # connection is set up at a time on each adapter:
+    # result = await BLEConnectionScheduler.get_instance().run(mac, fct)
+    # fct(hci) is called in the ble pool with the adapter number of the slot
+
+    instance = None
+
+    @staticmethod
+    def get_instance():
+        if BLEConnectionScheduler.instance is None:
+            BLEConnectionScheduler.instance = BLEConnectionScheduler()
+        return BLEConnectionScheduler.instance
+
+    def __init__(self):
+        self.adapters = {hci: AdapterSlot(hci) for hci in get_hci_interfaces()}
+        self.device_stats = {}
+
+    def get_adapter(self, mac, hci=None):
+        if hci is not None:
+            if hci not in self.adapters:
+                self.adapters[hci] = AdapterSlot(hci)
+            return self.adapters[hci]
+        # least loaded adapter, prefer the last one which worked for this mac
+        last_hci = self.device_stats.get(mac, {}).get("hci")
+        return min(
+            self.adapters.values(),
+            key=lambda adapter: (adapter.load, adapter.hci != last_hci, adapter.hci),
+        )
+
+    async def run(self, mac, function, hci=None, timeout=SLOT_TIMEOUT):
+        """Run function(hci) in an exclusive slot, all reads and writes for one
+        device should be done within one function. hci=None uses the least
+        loaded adapter. Raises asyncio.TimeoutError after timeout seconds, the
+        adapter stays locked until the blocking function returns."""
+        mac = mac.lower()
+        adapter = await self._acquire(mac, hci)
+        start = time.time()
+        future = asyncio.ensure_future(
+            utils.run_blocking(functools.partial(function, adapter.hci), pool="ble")
+        )
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            adapter.stats["timeouts"] += 1
+            self._update_stats(mac, adapter, start, False)
+            raise
+        except Exception:
+            self._update_stats(mac, adapter, start, False)
+            raise
+        finally:
+            if future.done():
+                self._release(adapter, start)
+            else:
+                future.add_done_callback(lambda fut: self._release(adapter, start, fut))
+        self._update_stats(mac, adapter, start, True)
+        return result
+
+    async def run_async(self, mac, coroutine_function, hci=None, timeout=SLOT_TIMEOUT):
+        """Like run, but awaits coroutine_function(hci) on the event loop. It is
+        cancelled after timeout seconds, which releases the slot right away."""
+        mac = mac.lower()
+        adapter = await self._acquire(mac, hci)
+        start = time.time()
+        try:
+            result = await asyncio.wait_for(coroutine_function(adapter.hci), timeout)
+        except asyncio.TimeoutError:
+            adapter.stats["timeouts"] += 1
+            self._update_stats(mac, adapter, start, False)
+            raise
+        except Exception:
+            self._update_stats(mac, adapter, start, False)
+            raise
+        finally:
+            self._release(adapter, start)
+        self._update_stats(mac, adapter, start, True)
+        return result
+
+    async def _acquire(self, mac, hci):
+        adapter = self.get_adapter(mac, hci)
+        adapter.waiting += 1
+        try:
+            await adapter.lock.acquire()
+        finally:
+            adapter.waiting -= 1
+        return adapter
+
+    def _release(self, adapter, start, future=None):
+        if future is not None and not future.cancelled() and future.exception():
+            logger.debug(f"Slot on hci{adapter.hci} failed: {future.exception()}")
+        adapter.stats["slots"] += 1
+        adapter.stats["busy_time"] += time.time() - start
+        adapter.lock.release()
+
+    def _update_stats(self, mac, adapter, start, success):
+        stats = self.device_stats.setdefault(
+            mac,
+            {
+                "success": 0,
+                "failed": 0,
+                "last_latency": 0,
+                "avg_latency": 0,
+                "last_success": 0,
+                "hci": None,
+            },
+        )
+        latency = time.time() - start
+        stats["last_latency"] = round(latency, 2)
+        if success:
+            stats["success"] += 1
+            stats["last_success"] = time.time()
+            stats["hci"] = adapter.hci
+            # exponential moving average of successful slots
+            if stats["avg_latency"] == 0:
+                stats["avg_latency"] = latency
+            stats["avg_latency"] = round(stats["avg_latency"] * 0.8 + latency * 0.2, 2)
+        else:
+            stats["failed"] += 1
+        logger.debug(
+            f"{mac} on hci{adapter.hci}: "
+            f"{'success' if success else 'failed'} after {latency:.1f}s"
+        )
+
+    def get_stats(self, mac=None):
+        if mac is not None:
+            return dict(self.device_stats.get(mac.lower(), {}))
+        return {
+            "adapters": {
+                f"hci{hci}": dict(adapter.stats, load=adapter.load)
+                for hci, adapter in self.adapters.items()
+            },
+            "devices": {mac: dict(stats) for mac, stats in self.device_stats.items()},
+        }
+
+
+async def update_stats_readings(hash, mac):
+    """Write the slot statistics of mac to the ble_* readings of hash."""
+    stats = BLEConnectionScheduler.get_instance().get_stats(mac)
+    if not stats:
+        return
+    async with fhem.readings(hash) as r:
+        r.update_if_changed("ble_success", stats["success"])
+        r.update_if_changed("ble_failed", stats["failed"])
+        r.update_if_changed("ble_latency", stats["avg_latency"])
@@ -0,0 +1,137 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# number of workers per pool, can be changed with --pool-size
+# io: network, file and other blocking library calls
+# cpu: CPU heavy work like parsing or image processing
+# ble: bluetooth operations, small to avoid adapter contention
+# process: process pool for picklable CPU heavy functions, 0 = use cpu pool
+pool_sizes = {"io": 32, "cpu": 2, "ble": 4, "process": 0}
+# functions which loop until the device is undefined get an own thread each,
+# they would block the workers of a bounded pool forever
+LONGRUNNING = "longrunning"
+
+_executors = {}
+_lock = threading.Lock()
+thread_stats = {"started": 0, "running": 0}
+
+
+class NamedExecutor:
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        if name == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers
+            )
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="fhempy_" + name
+            )
+        self.stats = {
+            "submitted": 0,
+            "pending": 0,
+            "max_pending": 0,
+            "saturated": 0,
+            "run_time_max": 0,
+        }
+
+    async def run(self, function):
+        if self.stats["pending"] >= self.max_workers:
+            # all workers are busy, function has to wait
+            self.stats["saturated"] += 1
+            if self.stats["saturated"] % 100 == 1:
+                logger.warning(
+                    f"Executor {self.name} saturated "
+                    f"({self.stats['pending']} pending, {self.max_workers} workers)"
+                )
+        self.stats["submitted"] += 1
+        self.stats["pending"] += 1
+        self.stats["max_pending"] = max(
+            self.stats["max_pending"], self.stats["pending"]
+        )
+        start = time.time()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, function
+            )
+        finally:
+            self.stats["pending"] -= 1
+            self.stats["run_time_max"] = max(
+                self.stats["run_time_max"], time.time() - start
+            )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def set_pool_sizes(sizes_str):
+    # format: io=32,cpu=2,ble=4
+    for pool_size in sizes_str.split(","):
+        (name, size) = pool_size.split("=")
+        if name not in pool_sizes:
+            raise ValueError(f"Unknown pool {name}, use one of {list(pool_sizes)}")
+        pool_sizes[name] = int(size)
+
+
+def get_executor(name):
+    if name == "process" and pool_sizes["process"] == 0:
+        name = "cpu"
+    with _lock:
+        if name not in _executors:
+            _executors[name] = NamedExecutor(name, pool_sizes[name])
+        return _executors[name]
+
+
+async def run(function, pool="io"):
+    if pool == LONGRUNNING:
+        return await run_in_thread(function)
+    return await get_executor(pool).run(function)
+
+
+def _set_future(future, result, exception):
+    thread_stats["running"] -= 1
+    if future.cancelled():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+async def run_in_thread(function):
+    # own daemon thread, cancelling doesn't stop the function
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def target():
+        (result, exception) = (None, None)
+        try:
+            result = function()
+        except BaseException as ex:
+            exception = ex
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_set_future, future, result, exception)
+
+    thread_stats["started"] += 1
+    thread_stats["running"] += 1
+    threading.Thread(target=target, name="fhempy_longrunning", daemon=True).start()
+    return await future
+
+
+def get_stats():
+    stats = {name: executor.stats.copy() for name, executor in _executors.items()}
+    stats[LONGRUNNING] = thread_stats.copy()
+    return stats
+
+
+def shutdown():
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
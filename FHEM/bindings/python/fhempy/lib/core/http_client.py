@@ -0,0 +1,207 @@
+import asyncio
+import collections
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+
+import aiohttp
+
+from . import executor
+
+logger = logging.getLogger(__name__)
+
+# connection pool settings shared by all fhempy modules
+limit = 100
+limit_per_host = 8
+dns_cache_ttl = 300
+keepalive_timeout = 30
+
+# directory for fetch(..., disk_cache=True)
+cache_dir = os.path.join(os.getcwd(), ".fhempy", "http_cache")
+# max. number of responses kept in memory, least recently used are dropped
+cache_size = 256
+# expired responses are kept this many seconds for revalidation
+cache_max_stale = 3600
+
+_connector = None
+_session = None
+# key => {"status", "text", "etag", "last_modified", "expires"}
+_cache = collections.OrderedDict()
+# key => running fetch task, used to share one request between callers
+_inflight = {}
+cache_stats = {"hits": 0, "not_modified": 0, "coalesced": 0, "fetched": 0}
+
+
+def get_connector():
+    global _connector
+    if _connector is None or _connector.closed:
+        _connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            ttl_dns_cache=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout,
+        )
+    return _connector
+
+
+def get_session():
+    # shared session without cookies, do not close it
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=get_connector(),
+            connector_owner=False,
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+    return _session
+
+
+def create_session(**kwargs):
+    # own session (e.g. for cookies or default headers) which uses the shared
+    # connection pool, has to be closed by the caller:
+    # async with http_client.create_session() as session:
+    return aiohttp.ClientSession(
+        connector=get_connector(), connector_owner=False, **kwargs
+    )
+
+
+async def close():
+    global _connector, _session
+    session = _session
+    connector = _connector
+    _session = None
+    _connector = None
+    try:
+        if session is not None:
+            await session.close()
+        if connector is not None:
+            await connector.close()
+            # give open ssl connections time to close
+            await asyncio.sleep(0.25)
+    except Exception:
+        logger.exception("Failed to close http client")
+
+
+class CachedResponse:
+    def __init__(self, status, text, from_cache=False):
+        self.status = status
+        self.text = text
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _cache_key(url, headers):
+    key = url
+    if headers:
+        key += json.dumps(headers, sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key):
+    entry = _cache.get(key)
+    if entry is not None:
+        _cache.move_to_end(key)
+    return entry
+
+
+def _cache_put(key, entry):
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    stale = time.time() - cache_max_stale
+    for old_key in [k for (k, e) in _cache.items() if e["expires"] < stale]:
+        del _cache[old_key]
+    while len(_cache) > cache_size:
+        _cache.popitem(last=False)
+
+
+def _read_disk_cache(key):
+    try:
+        with open(os.path.join(cache_dir, key + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_disk_cache(key, entry):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, key + ".json"), "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+    except OSError:
+        logger.exception(f"Failed to write http cache {key}")
+
+
+async def fetch(url, headers=None, ttl=0, disk_cache=False, trust_env=False):
+    # GET url and cache successful responses for ttl seconds, afterwards the
+    # cached response is revalidated with If-None-Match/If-Modified-Since.
+    # Concurrent calls for the same url and headers share one request.
+    # trust_env=True uses the proxy settings from the environment.
+    key = _cache_key(url, headers)
+    entry = _cache_get(key)
+    if entry is None and disk_cache:
+        entry = await executor.run(functools.partial(_read_disk_cache, key))
+        if entry is not None:
+            _cache_put(key, entry)
+    if entry is not None and entry["expires"] > time.time():
+        cache_stats["hits"] += 1
+        return CachedResponse(entry["status"], entry["text"], True)
+
+    if key in _inflight:
+        cache_stats["coalesced"] += 1
+        return await asyncio.shield(_inflight[key])
+
+    task = asyncio.create_task(_fetch(key, url, headers, ttl, disk_cache, trust_env))
+    _inflight[key] = task
+    task.add_done_callback(lambda t: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _fetch(key, url, headers, ttl, disk_cache, trust_env):
+    req_headers = dict(headers or {})
+    entry = _cache.get(key)
+    if entry is not None:
+        if entry["etag"]:
+            req_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            req_headers["If-Modified-Since"] = entry["last_modified"]
+
+    if trust_env:
+        async with create_session(
+            trust_env=True, cookie_jar=aiohttp.DummyCookieJar()
+        ) as session:
+            return await _get(session, key, url, req_headers, entry, ttl, disk_cache)
+    return await _get(get_session(), key, url, req_headers, entry, ttl, disk_cache)
+
+
+async def _get(session, key, url, req_headers, entry, ttl, disk_cache):
+    async with session.get(url, headers=req_headers) as resp:
+        if resp.status == 304 and entry is not None:
+            cache_stats["not_modified"] += 1
+            entry["expires"] = time.time() + ttl
+            return CachedResponse(entry["status"], entry["text"], True)
+
+        cache_stats["fetched"] += 1
+        text = await resp.text()
+        if resp.status != 200:
+            return CachedResponse(resp.status, text)
+
+        entry = {
+            "status": resp.status,
+            "text": text,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "expires": time.time() + ttl,
+        }
+        _cache_put(key, entry)
+        if disk_cache:
+            await executor.run(functools.partial(_write_disk_cache, key, entry))
+        return CachedResponse(resp.status, text)
+
+
+def clear_cache():
+    _cache.clear()
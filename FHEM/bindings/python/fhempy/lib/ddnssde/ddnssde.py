@@ -1,10 +1,10 @@
 import asyncio
 
-import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from fhempy.lib import utils
 
 from .. import fhem, generic
+from ..core import http_client
 
 
 class ddnssde(generic.FhemModule):
@@ -77,7 +77,7 @@ class ddnssde(generic.FhemModule):
         await fhem.readingsEndUpdate(self.hash, 1)
 
     async def get_json_data(self, url):
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with http_client.create_session(trust_env=True) as session:
             async with session.get(url, headers=ddnssde.headers) as resp:
                 if resp.status == 200:
                     return await resp.json()
@@ -150,7 +150,7 @@ class ddnssde(generic.FhemModule):
         await utils.handle_define_attr(self._conf_attr, self, self.hash)
 
     async def login(self):
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with http_client.create_session(trust_env=True) as session:
             async with session.get("https://ddnss.de/") as resp:
                 if resp.status != 200:
                     raise Exception(f"Open ddnss.de failed with status {resp.status}")
@@ -175,36 +175,45 @@ class ddnssde(generic.FhemModule):
             self.cookie_jar = session.cookie_jar
 
     async def retrieve_ddnss_data(self):
-        async with aiohttp.ClientSession(cookie_jar=self.cookie_jar) as session:
+        async with http_client.create_session(cookie_jar=self.cookie_jar) as session:
             async with session.get(
                 "https://ddnss.de/ua/index.php", headers=ddnssde.headers
             ) as resp:
                 data = await resp.text()
-                soup = BeautifulSoup(data, "html.parser")
-                well_class = soup.find("div", {"class": "well"})
-                if well_class is None:
+                if not await utils.parse_html(data, self.extract_account_data):
                     return False
-                self.update_key = well_class.find("b").text
-                self.ddnss_mail = well_class.findAll("p")[1].text
-                self.ddnss_login = well_class.findAll("p")[2].text
                 self.update_key_ready.set()
 
             async with session.get(
                 "https://ddnss.de/ua/vhosts_list.php", headers=ddnssde.headers
             ) as resp:
                 data = await resp.text()
-                soup = BeautifulSoup(data, "html.parser")
-                self.hostnames = {}
-                hostarr = soup.find("tbody").findAll("tr")
-                for host in hostarr:
-                    hostdetailsarr = host.findAll("td")
-                    hostname = hostdetailsarr[1].find("u").text.split()[0]
-                    ip = hostdetailsarr[2].text.split()[-1]
-                    last_upd = hostdetailsarr[3].text
-                    self.hostnames[hostname] = {"ip": ip, "last_update": last_upd}
+                self.hostnames = await utils.parse_html(
+                    data, self.extract_hostnames, SoupStrainer("tbody")
+                )
 
             return True
 
+    def extract_account_data(self, soup):
+        well_class = soup.find("div", {"class": "well"})
+        if well_class is None:
+            return False
+        self.update_key = well_class.find("b").text
+        self.ddnss_mail = well_class.findAll("p")[1].text
+        self.ddnss_login = well_class.findAll("p")[2].text
+        return True
+
+    def extract_hostnames(self, soup):
+        hostnames = {}
+        hostarr = soup.find("tbody").findAll("tr")
+        for host in hostarr:
+            hostdetailsarr = host.findAll("td")
+            hostname = hostdetailsarr[1].find("u").text.split()[0]
+            ip = hostdetailsarr[2].text.split()[-1]
+            last_upd = hostdetailsarr[3].text
+            hostnames[hostname] = {"ip": ip, "last_update": last_upd}
+        return hostnames
+
     async def update_ip_loop(self):
         while True:
             if self._attr_hostname == "-":
@@ -232,7 +241,7 @@ class ddnssde(generic.FhemModule):
             )
 
     async def set_ddnss_ip(self):
-        async with aiohttp.ClientSession(cookie_jar=self.cookie_jar) as session:
+        async with http_client.create_session(cookie_jar=self.cookie_jar) as session:
             async with session.get(
                 f"http://ddnss.de/upd.php?key={self.update_key}"
                 + f"&host={self._attr_hostname.replace('_','.')}",
@@ -1,34 +1,41 @@
 import asyncio
-import logging
 
-from bleak import discover
 from fhempy.lib.generic import FhemModule
 
 from .. import fhem
+from ..core import ble_scanner
 
 
 class discover_ble(FhemModule):
     def __init__(self, logger):
         super().__init__(logger)
-        # disable bleak discovery messages
-        logging.getLogger("bleak.backends.bluezdbus.discovery").setLevel(logging.ERROR)
         self.hash = None
         self.blescanTask = None
+        self.subscription = None
+        self.found_devices = {}
+
+    def handle_advertisement(self, adv):
+        if adv.name:
+            self.found_devices[adv.mac] = adv
 
     async def runBleScan(self):
         while True:
+            # collect advertisements of the shared BLE scanner
+            await asyncio.sleep(60)
+            devices = list(self.found_devices.values())
+            self.found_devices = {}
             try:
-                devices = await discover()
                 for d in devices:
+                    address = d.mac.upper()
                     if d.name == "GfBT Project":
                         if not await fhem.checkIfDeviceExists(
-                            self.hash, "TYPE", "GFPROBT", "MAC", d.address
+                            self.hash, "TYPE", "GFPROBT", "MAC", address
                         ):
                             self.logger.debug(
                                 "create device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
@@ -36,9 +43,9 @@ class discover_ble(FhemModule):
                                 self.hash,
                                 d.name
                                 + "_"
-                                + d.address.replace(":", "")
+                                + address.replace(":", "")
                                 + " GFPROBT '"
-                                + d.address
+                                + address
                                 + "'",
                             )
                         else:
@@ -46,19 +53,19 @@ class discover_ble(FhemModule):
                                 "existing device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
                     elif d.name == "CC-RT-BLE":
                         if not await fhem.checkIfDeviceExists(
-                            self.hash, "PYTHONTYPE", "eq3bt", "MAC", d.address
+                            self.hash, "PYTHONTYPE", "eq3bt", "MAC", address
                         ):
                             self.logger.debug(
                                 "create device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
@@ -66,9 +73,9 @@ class discover_ble(FhemModule):
                                 self.hash,
                                 d.name
                                 + "_"
-                                + d.address.replace(":", "")
+                                + address.replace(":", "")
                                 + " fhempy eq3bt '"
-                                + d.address
+                                + address
                                 + "'",
                             )
                         else:
@@ -76,19 +83,19 @@ class discover_ble(FhemModule):
                                 "existing device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
                     elif d.name[0:7] == "Expert_":
                         if not await fhem.checkIfDeviceExists(
-                            self.hash, "PYTHONTYPE", "nespresso_ble", "MAC", d.address
+                            self.hash, "PYTHONTYPE", "nespresso_ble", "MAC", address
                         ):
                             self.logger.debug(
                                 "create device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
@@ -96,9 +103,9 @@ class discover_ble(FhemModule):
                                 self.hash,
                                 d.name
                                 + "_"
-                                + d.address.replace(":", "")
+                                + address.replace(":", "")
                                 + " fhempy nespresso_ble '"
-                                + d.address
+                                + address
                                 + "'",
                             )
                         else:
@@ -106,7 +113,7 @@ class discover_ble(FhemModule):
                                 "existing device: "
                                 + d.name
                                 + " / "
-                                + d.address
+                                + address
                                 + " / rssi: "
                                 + str(d.rssi)
                             )
@@ -115,13 +122,13 @@ class discover_ble(FhemModule):
                             "found unhandled device: "
                             + d.name
                             + ", "
-                            + d.address
+                            + address
                             + ", rssi: "
                             + str(d.rssi)
                         )
             except Exception:
                 self.logger.error("BLE Scan failed, retry in 600s", exc_info=True)
-            await asyncio.sleep(600)
+            await asyncio.sleep(540)
 
     # FHEM FUNCTION
     async def Define(self, hash, args, argsh):
@@ -138,3 +145,15 @@ class discover_ble(FhemModule):
             self.blescanTask.cancel()
 
         self.blescanTask = self.create_async_task(self.runBleScan())
+        if self.subscription is None:
+            # active scan to receive the device names
+            self.subscription = ble_scanner.BLEScanner.get_instance().subscribe(
+                self.handle_advertisement, active=True
+            )
+
+    # FHEM FUNCTION
+    async def Undefine(self, hash):
+        if self.subscription:
+            ble_scanner.BLEScanner.get_instance().unsubscribe(self.subscription)
+            self.subscription = None
+        await super().Undefine(hash)
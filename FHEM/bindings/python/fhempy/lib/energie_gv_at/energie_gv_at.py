@@ -1,10 +1,8 @@
 import asyncio
 import datetime
-import json
-
-import aiohttp
 
 from .. import fhem, generic
+from ..core import http_client
 
 
 class energie_gv_at(generic.FhemModule):
@@ -40,21 +38,19 @@ class energie_gv_at(generic.FhemModule):
                 "User-Agent": "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
             }
             try:
-                async with aiohttp.ClientSession(headers=headers) as session:
-                    async with session.get(energie_gv_at.URL_PEAK_HOURS) as resp:
-                        if resp.status == 200:
-                            r_json = json.loads(await resp.text())
-                            await self.handle_response(r_json)
-                        else:
-                            await fhem.readingsSingleUpdate(
-                                self.hash,
-                                "state",
-                                f"failed: HTTP error {resp.status}",
-                                1,
-                            )
-                            self.logger.error(
-                                f"Failed to fetch, failed with status {resp.status}"
-                            )
+                resp = await http_client.fetch(energie_gv_at.URL_PEAK_HOURS, headers)
+                if resp.status == 200:
+                    await self.handle_response(resp.json())
+                else:
+                    await fhem.readingsSingleUpdate(
+                        self.hash,
+                        "state",
+                        f"failed: HTTP error {resp.status}",
+                        1,
+                    )
+                    self.logger.error(
+                        f"Failed to fetch, failed with status {resp.status}"
+                    )
             except Exception as ex:
                 self.logger.exception("Failed to update")
                 await fhem.readingsSingleUpdate(
@@ -1,14 +1,12 @@
 import asyncio
-import concurrent.futures
 import functools
 import random
 import time
 from datetime import datetime
 from enum import IntEnum
 
-from dbus import DBusException
-
-from .. import fhem, generic, utils
+from .. import fhem, generic
+from ..core import ble_scheduler
 from . import eq3btsmart as eq3
 from .connection import BTLEConnection
 
@@ -119,33 +117,12 @@ class eq3bt(generic.FhemModule):
         await fhem.readingsSingleUpdateIfChanged(self.hash, "presence", "offline", 1)
         await fhem.readingsSingleUpdateIfChanged(self.hash, "state", "connecting", 1)
 
-        # handle missing dbus configuration
-        try:
-            self.thermostat = FhemThermostat(
-                self.logger,
-                self._mac,
-                keep_connection=self._attr_keep_connected == "on",
-                max_retries=self._attr_max_retries,
-            )
-        except DBusException:
-            dbus_conf_err = (
-                "Please add following configuration to /etc/dbus-1/system.d/bluetooth.conf:\n"
-                '<policy user="fhem">\n'
-                '    <allow own="org.bluez"/>\n'
-                '    <allow send_destination="org.bluez"/>\n'
-                '    <allow send_interface="org.bluez.GattCharacteristic1"/>\n'
-                '    <allow send_interface="org.bluez.GattDescriptor1"/>\n'
-                '    <allow send_interface="org.freedesktop.DBus.ObjectManager"/>\n'
-                '    <allow send_interface="org.freedesktop.DBus.Properties"/>\n'
-                "</policy>\n\n"
-                "ATTENTION: On remote device change the user account above to the one which runs fhempy (e.g. pi)\n\n"
-                "Restart dbus afterwards: sudo systemctl restart dbus"
-            )
-            self.logger.error(dbus_conf_err)
-            await fhem.readingsSingleUpdateIfChanged(
-                self.hash, "state", dbus_conf_err, 1
-            )
-            return dbus_conf_err
+        self.thermostat = FhemThermostat(
+            self.logger,
+            self._mac,
+            keep_connection=self._attr_keep_connected == "on",
+            max_retries=self._attr_max_retries,
+        )
 
         self.create_async_task(self.check_online())
         self.create_async_task(self.consumption_rotate())
@@ -213,10 +190,7 @@ class eq3bt(generic.FhemModule):
 
     async def update_all(self):
         self.logger.debug("start update_all")
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            await asyncio.get_event_loop().run_in_executor(
-                pool, functools.partial(self.thermostat.update_all)
-            )
+        await self.run_in_slot(self.thermostat.update_all, timeout=120)
         await self.update_all_readings()
 
     async def update_all_readings(self):
@@ -360,8 +334,20 @@ class eq3bt(generic.FhemModule):
                     await fhem.readingsBulkUpdateIfChanged(self.hash, reading, value)
         await fhem.readingsEndUpdate(self.hash, 1)
 
+    def blocking_call(self, fct, hci):
+        self.thermostat.set_iface(hci)
+        fct()
+
+    async def run_in_slot(self, fct, timeout=ble_scheduler.SLOT_TIMEOUT):
+        try:
+            await ble_scheduler.BLEConnectionScheduler.get_instance().run(
+                self._mac, functools.partial(self.blocking_call, fct), timeout=timeout
+            )
+        finally:
+            await ble_scheduler.update_stats_readings(self.hash, self._mac)
+
     async def set_and_update(self, fct):
-        await utils.run_blocking(fct)
+        await self.run_in_slot(fct)
         await self.update_readings()
 
     def string_to_seconds(self, timestr):
@@ -519,6 +505,9 @@ class FhemThermostat(eq3.Thermostat):
     def set_keep_connection(self, new_state):
         self.set_keep_connected(new_state)
 
+    def set_iface(self, iface):
+        self._conn.set_iface(iface)
+
     def update_all(self):
         super().update()
         super().query_id()
@@ -1,17 +1,17 @@
 import asyncio
+import itertools
 import json
 import logging
 import os
 import platform
-import random
 import socket
 import time
 import traceback
 from datetime import datetime
 
-import aiohttp
 import websockets
 
+from .core import http_client
 from .version import __version__
 
 logger = logging.getLogger(__name__)
@@ -20,6 +20,28 @@ logger.setLevel(logging.ERROR)
 function_active = []
 update_locks = {}
 wsconnection = None
+await_ids = itertools.count(1)
+
+# commands waiting until they are allowed to be sent: {name: [future, ...]}
+command_waiters = {}
+command_stats = {
+    "waiting": 0,
+    "max_waiting": 0,
+    "waited": 0,
+    "wait_time_total": 0,
+    "wait_time_max": 0,
+}
+
+# interval for sending the command statistics to the BindingsIo device
+COMMAND_STATS_INTERVAL = 300
+
+# last known reading values per device, used to decide
+# readingsBulkUpdateIfChanged locally: {name: {reading: (value, time)}}
+readings_cache = {}
+# values are cached from the replies to fhempy's own updates, changes done in
+# FHEM (setreading, deletereading, userReadings) are only noticed for devices
+# with event listeners, so entries are trusted for this many seconds
+READINGS_CACHE_TTL = 300
 
 # TODO use run_coroutine_threadsafe if asyncio.get_event_loop() == None
 # this would make all functions threadsafe
@@ -30,8 +52,63 @@ def updateConnection(ws):
     wsconnection = ws
 
 
+def _isReadingUnchanged(name, reading, value):
+    if name not in readings_cache or reading not in readings_cache[name]:
+        return False
+    (cached_value, cached_time) = readings_cache[name][reading]
+    return cached_value == value and time.time() - cached_time < READINGS_CACHE_TTL
+
+
+def _cacheReading(name, reading, value):
+    if name not in readings_cache:
+        readings_cache[name] = {}
+    readings_cache[name][reading] = (value, time.time())
+
+
+def _uncacheReading(name, reading):
+    if name in readings_cache:
+        readings_cache[name].pop(reading, None)
+
+
+def updateReadingsCache(name, reading, value):
+    # only keep readings of devices which are handled by fhempy
+    if name in readings_cache:
+        readings_cache[name][reading] = (value, time.time())
+
+
+def clearReadingsCache(name):
+    if name in readings_cache:
+        del readings_cache[name]
+
+
+def renameReadingsCache(old_name, new_name):
+    if old_name in readings_cache:
+        readings_cache[new_name] = readings_cache.pop(old_name)
+
+
+async def seedReadingsCache(hash):
+    cmd = (
+        "my %fhempy_readings;; "
+        + "foreach my $rd (keys %{$defs{'"
+        + hash["NAME"]
+        + "'}{READINGS}}) {"
+        + "  $fhempy_readings{$rd} = $defs{'"
+        + hash["NAME"]
+        + "'}{READINGS}{$rd}{VAL};;"
+        + "}"
+        + "return \\%fhempy_readings;;"
+    )
+    res = await sendCommandHash(hash, cmd)
+    if isinstance(res, dict):
+        now = time.time()
+        readings_cache[hash["NAME"]] = {
+            reading: (convertValue(value), now) for reading, value in res.items()
+        }
+
+
 def setFunctionActive(hash):
     function_active.append(hash["NAME"])
+    _wakeCommandWaiters()
 
 
 def setFunctionInactive(hash):
@@ -41,6 +118,66 @@ def setFunctionInactive(hash):
             f"Set wrong function inactive, tried {hash['NAME']}, "
             f"current function_active: {function_active},{element}"
         )
+    _wakeCommandWaiters()
+
+
+def _canSendCommand(name):
+    # while FHEM waits for a function to finish,
+    # only commands of that device are handled by FHEM
+    return len(function_active) == 0 or function_active[-1] == name
+
+
+def _wakeCommandWaiters():
+    if len(function_active) == 0:
+        names = list(command_waiters)
+    elif function_active[-1] in command_waiters:
+        names = [function_active[-1]]
+    else:
+        return
+    for name in names:
+        for fut in command_waiters.pop(name):
+            if not fut.done():
+                fut.set_result(True)
+
+
+async def _waitForCommandSlot(name):
+    if _canSendCommand(name):
+        return 0
+    start = time.time()
+    command_stats["waiting"] += 1
+    command_stats["max_waiting"] = max(
+        command_stats["max_waiting"], command_stats["waiting"]
+    )
+    try:
+        while not _canSendCommand(name):
+            fut = asyncio.get_running_loop().create_future()
+            if name not in command_waiters:
+                command_waiters[name] = []
+            command_waiters[name].append(fut)
+            try:
+                await fut
+            finally:
+                if name in command_waiters and fut in command_waiters[name]:
+                    command_waiters[name].remove(fut)
+                    if len(command_waiters[name]) == 0:
+                        del command_waiters[name]
+    finally:
+        command_stats["waiting"] -= 1
+    duration = time.time() - start
+    command_stats["waited"] += 1
+    command_stats["wait_time_total"] += duration
+    command_stats["wait_time_max"] = max(command_stats["wait_time_max"], duration)
+    return duration
+
+
+def getCommandStats():
+    stats = command_stats.copy()
+    stats["queued_devices"] = len(command_waiters)
+    if stats["waited"] > 0:
+        stats["wait_time_avg"] = stats["wait_time_total"] / stats["waited"]
+    else:
+        stats["wait_time_avg"] = 0
+    return stats
 
 
 async def getDeviceHashName(hash, typeinternal, typevalue, internal, value):
@@ -83,6 +220,32 @@ async def AttrVal(name, attr, default):
     return await sendCommandName(name, cmd)
 
 
+async def AttrValMany(name, attr_defaults):
+    # get multiple attributes with one command, attr_defaults: {attr: default}
+    attrs = list(attr_defaults)
+    if len(attrs) == 0:
+        return {}
+    cmd = (
+        "return ["
+        + ",".join(
+            "AttrVal('"
+            + name
+            + "', '"
+            + attr
+            + "', '"
+            + convertValue(attr_defaults[attr]).replace("'", "\\'")
+            + "')"
+            for attr in attrs
+        )
+        + "];;"
+    )
+    res = await sendCommandName(name, cmd)
+    if not isinstance(res, list) or len(res) != len(attrs):
+        logger.error(f"Failed to get attributes {attrs} of {name}: {res}")
+        return {attr: attr_defaults[attr] for attr in attrs}
+    return dict(zip(attrs, res))
+
+
 async def InternalVal(name, internal, default):
     cmd = "InternalVal('" + name + "', '" + internal + "', '" + default + "')"
     return await sendCommandName(name, cmd)
@@ -107,49 +270,70 @@ async def readingsBeginUpdate(hash):
     return await sendCommandHash(hash, cmd)
 
 
-async def readingsBulkUpdateIfChanged(hash, reading, value):
-    try:
-        value = convertValue(value)
-        cmd = (
-            "readingsBulkUpdateIfChanged($defs{'"
-            + hash["NAME"]
+def _readingsBulkUpdateIfChangedCmd(name, reading, value):
+    value = convertValue(value)
+    return (
+        "readingsBulkUpdateIfChanged($defs{'"
+        + name
+        + "'},'"
+        + reading
+        + "','"
+        + value.replace("'", "\\'")
+        + "');;"
+    )
+
+
+def _readingsBulkUpdateCmd(name, reading, value, changed=None):
+    value = convertValue(value)
+    if changed is None:
+        return (
+            "readingsBulkUpdate($defs{'"
+            + name
             + "'},'"
             + reading
             + "','"
             + value.replace("'", "\\'")
             + "');;"
         )
-        return await sendCommandHash(hash, cmd)
+    return (
+        "readingsBulkUpdate($defs{'"
+        + name
+        + "'},'"
+        + reading
+        + "','"
+        + value.replace("'", "\\'")
+        + "', "
+        + str(changed)
+        + ");;"
+    )
+
+
+async def _sendReadingsUpdate(hash, cmd, values):
+    # cache the values only after FHEM confirmed the update
+    (success, ret) = await _sendCommandName(hash["NAME"], cmd)
+    for reading, value in values:
+        if success:
+            _cacheReading(hash["NAME"], reading, value)
+        else:
+            _uncacheReading(hash["NAME"], reading)
+    return ret
+
+
+async def readingsBulkUpdateIfChanged(hash, reading, value):
+    try:
+        value = convertValue(value)
+        if _isReadingUnchanged(hash["NAME"], reading, value):
+            return ""
+        cmd = _readingsBulkUpdateIfChangedCmd(hash["NAME"], reading, value)
+        return await _sendReadingsUpdate(hash, cmd, [(reading, value)])
     except Exception:
         logger.exception("Failed to do readingsBulkUpdateIfChanged")
 
 
 async def readingsBulkUpdate(hash, reading, value, changed=None):
     try:
-        value = convertValue(value)
-        if changed is None:
-            cmd = (
-                "readingsBulkUpdate($defs{'"
-                + hash["NAME"]
-                + "'},'"
-                + reading
-                + "','"
-                + value.replace("'", "\\'")
-                + "');;"
-            )
-        else:
-            cmd = (
-                "readingsBulkUpdate($defs{'"
-                + hash["NAME"]
-                + "'},'"
-                + reading
-                + "','"
-                + value.replace("'", "\\'")
-                + "', "
-                + str(changed)
-                + ");;"
-            )
-        return await sendCommandHash(hash, cmd)
+        cmd = _readingsBulkUpdateCmd(hash["NAME"], reading, value, changed)
+        return await _sendReadingsUpdate(hash, cmd, [(reading, convertValue(value))])
     except Exception:
         logger.exception("Failed to do readingsBulkUpdate")
 
@@ -177,14 +361,16 @@ async def readingsSingleUpdate(hash, reading, value, do_trigger):
             + str(do_trigger)
             + ")"
         )
-        return await sendCommandHash(hash, cmd)
+        return await _sendReadingsUpdate(hash, cmd, [(reading, value)])
 
 
 async def readingsSingleUpdateIfChanged(hash, reading, value, do_trigger):
+    value = convertValue(value)
+    if _isReadingUnchanged(hash["NAME"], reading, value):
+        return ""
     if hash["NAME"] not in update_locks:
         update_locks[hash["NAME"]] = asyncio.Lock()
     async with update_locks[hash["NAME"]]:
-        value = convertValue(value)
         cmd = (
             "readingsBeginUpdate($defs{'"
             + hash["NAME"]
@@ -200,7 +386,78 @@ async def readingsSingleUpdateIfChanged(hash, reading, value, do_trigger):
             + str(do_trigger)
             + ");;"
         )
-        return await sendCommandHash(hash, cmd)
+        return await _sendReadingsUpdate(hash, cmd, [(reading, value)])
+
+
+class ReadingsUpdate:
+    """Collects reading updates and sends them to FHEM as one command.
+
+    Use it via fhem.readings():
+        async with fhem.readings(self.hash) as r:
+            r.update_if_changed("state", "on")
+            r.update("power", 12.3)
+    """
+
+    def __init__(self, hash, do_trigger=1):
+        self.hash = hash
+        self.do_trigger = do_trigger
+        self._cmds = []
+        self._values = []
+
+    def update_if_changed(self, reading, value):
+        try:
+            value = convertValue(value)
+            if _isReadingUnchanged(self.hash["NAME"], reading, value):
+                return
+            self._values.append((reading, value))
+            self._cmds.append(
+                _readingsBulkUpdateIfChangedCmd(self.hash["NAME"], reading, value)
+            )
+        except Exception:
+            logger.exception("Failed to do readingsBulkUpdateIfChanged")
+
+    def update(self, reading, value, changed=None):
+        try:
+            self._values.append((reading, convertValue(value)))
+            self._cmds.append(
+                _readingsBulkUpdateCmd(self.hash["NAME"], reading, value, changed)
+            )
+        except Exception:
+            logger.exception("Failed to do readingsBulkUpdate")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
+        return False
+
+    async def flush(self):
+        if len(self._cmds) == 0:
+            return
+        name = self.hash["NAME"]
+        cmd = (
+            "readingsBeginUpdate($defs{'"
+            + name
+            + "'});;"
+            + "".join(self._cmds)
+            + "readingsEndUpdate($defs{'"
+            + name
+            + "'},"
+            + str(self.do_trigger)
+            + ");;"
+        )
+        values = self._values
+        self._cmds = []
+        self._values = []
+        if name not in update_locks:
+            update_locks[name] = asyncio.Lock()
+        async with update_locks[name]:
+            return await _sendReadingsUpdate(self.hash, cmd, values)
+
+
+def readings(hash, do_trigger=1):
+    return ReadingsUpdate(hash, do_trigger)
 
 
 async def CommandDefine(hash, definition: str):
@@ -232,6 +489,7 @@ async def CommandAttr(hash, attrdef):
 
 
 async def CommandDeleteReading(hash, deldef):
+    clearReadingsCache(deldef.split(" ")[0])
     cmd = 'CommandDeleteReading(undef, "' + deldef + '")'
     return await sendCommandHash(hash, cmd)
 
@@ -273,11 +531,13 @@ def convertValue(value):
 async def get_github_data():
     res_json = {}
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.github.com/repos/fhempy/fhempy/releases/latest"
-            ) as resp:
-                res_json = await resp.json()
+        # shared by all connections, cached on disk to survive restarts
+        resp = await http_client.fetch(
+            "https://api.github.com/repos/fhempy/fhempy/releases/latest",
+            ttl=3600,
+            disk_cache=True,
+        )
+        res_json = resp.json()
     except Exception:
         logger.exception("Failed to get github fhempy data")
     return res_json
@@ -304,6 +564,25 @@ async def send_latest_release():
         await asyncio.sleep(3600 * 12)
 
 
+async def send_command_stats():
+    while True:
+        await asyncio.sleep(COMMAND_STATS_INTERVAL)
+        try:
+            stats = getCommandStats()
+            msg = {
+                "msgtype": "stats",
+                "commands_waiting_max": stats["max_waiting"],
+                "commands_waited": stats["waited"],
+                "commands_wait_avg": round(stats["wait_time_avg"], 3),
+                "commands_wait_max": round(stats["wait_time_max"], 3),
+            }
+            msg = json.dumps(msg, ensure_ascii=False)
+            logger.debug("<<< WS: " + msg)
+            await wsconnection.send(msg)
+        except Exception:
+            logger.exception("Failed to send command statistics")
+
+
 async def send_version():
     msg = {
         "msgtype": "version",
@@ -323,7 +602,7 @@ async def send_version():
 async def send_and_wait(name, cmd):
     fut = asyncio.get_running_loop().create_future()
     msg = {
-        "awaitId": random.randint(10000000, 99999999),
+        "awaitId": next(await_ids),
         "NAME": name,
         "msgtype": "command",
         "command": cmd,
@@ -342,50 +621,54 @@ async def send_and_wait(name, cmd):
             logger.error("Failed to set result, received: " + rmsg)
 
     global wsconnection
-    wsconnection.register_msg_listener(listener, msg["awaitId"])
-    msg = json.dumps(msg, ensure_ascii=False)
-    logger.debug("<<< WS: " + msg)
+    connection = wsconnection
+    awaitid = msg["awaitId"]
+    await connection.register_msg_listener(listener, awaitid)
     try:
-        await wsconnection.send(msg)
-        logger.debug("message sent successfully")
-    except websockets.exceptions.ConnectionClosed:
-        logger.error("Connection closed, can't send message.")
-    except Exception as e:
-        logger.error("Failed to send message via websocket: " + e)
-        fut.set_exception(Exception("Failed to send message via websocket"))
-
-    return await fut
-
-
-async def sendCommandName(name, cmd, hash=None):
-    ret = ""
+        msg = json.dumps(msg, ensure_ascii=False)
+        logger.debug("<<< WS: " + msg)
+        try:
+            await connection.send(msg)
+            logger.debug("message sent successfully")
+        except websockets.exceptions.ConnectionClosed:
+            logger.error("Connection closed, can't send message.")
+        except Exception as e:
+            logger.error(f"Failed to send message via websocket: {e}")
+            fut.set_exception(Exception("Failed to send message via websocket"))
+
+        return await fut
+    finally:
+        # listener is already removed if reply was received,
+        # this cleans up on timeout and cancellation
+        connection.unregister_msg_listener(awaitid)
+
+
+async def _sendCommandName(name, cmd):
+    # returns (success, result), success is False if FHEM didn't reply
     timeout = 60
     try:
         logger.debug("sendCommandName START")
-        start = time.time()
-        while len(function_active) != 0:
-            if function_active[-1] == name:
-                break
-            await asyncio.sleep(0.1)
-        end = time.time()
-        duration = end - start
+        duration = await _waitForCommandSlot(name)
         if duration > 5:
             logger.error(f"sendCommandName took {duration}s to send: {cmd}")
         # wait max 60s for reply from FHEM
         jsonmsg = await asyncio.wait_for(send_and_wait(name, cmd), timeout)
         logger.debug("sendCommandName END")
-        ret = json.loads(jsonmsg)["result"]
+        return (True, json.loads(jsonmsg)["result"])
     except asyncio.TimeoutError:
         logger.error(f"NO RESPONSE since {timeout}s: " + cmd)
-        ret = ""
+        return (False, "")
     except asyncio.CancelledError:
         # task was cancelled
-        pass
+        return (False, "")
     except Exception as e:
-        logger.error("Exception while waiting for reply: " + e)
+        logger.error("Exception while waiting for reply: " + str(e))
         traceback.format_exc()
-        ret = str(e)
+        return (False, str(e))
 
+
+async def sendCommandName(name, cmd, hash=None):
+    (success, ret) = await _sendCommandName(name, cmd)
     return ret
 
 
@@ -1,10 +1,9 @@
 import asyncio
-import functools
 
-import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 
 from .. import fhem, generic, utils
+from ..core import http_client
 
 
 class fhem_forum(generic.FhemModule):
@@ -67,24 +66,22 @@ class fhem_forum(generic.FhemModule):
 
     async def get_fhem_data(self, url):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers={"cookie": "FHEM-Forum588=" + self.cookie},
-                ) as resp:
-                    if resp.status == 200:
-                        return await self.handle_response(await resp.text(), url)
-                    else:
-                        await fhem.readingsSingleUpdate(
-                            self.hash,
-                            "state",
-                            f"failed: HTTP error {resp.status}",
-                            1,
-                        )
-                        self.logger.error(
-                            f"Failed to fetch {self.update_url}, "
-                            f"failed with status {resp.status}"
-                        )
+            resp = await http_client.fetch(
+                url, {"cookie": "FHEM-Forum588=" + self.cookie}, ttl=60
+            )
+            if resp.status == 200:
+                return await self.handle_response(resp.text, url)
+            else:
+                await fhem.readingsSingleUpdate(
+                    self.hash,
+                    "state",
+                    f"failed: HTTP error {resp.status}",
+                    1,
+                )
+                self.logger.error(
+                    f"Failed to fetch {self.update_url}, "
+                    f"failed with status {resp.status}"
+                )
         except Exception:
             self.logger.exception("Failed to update")
 
@@ -97,8 +94,7 @@ class fhem_forum(generic.FhemModule):
                 return True
         return False
 
-    def get_soup_entries(self, response):
-        soup = BeautifulSoup(response, "html.parser")
+    def get_soup_entries(self, soup):
         tbody = soup.find("tbody")
         if tbody is None:
             return []
@@ -116,8 +112,8 @@ class fhem_forum(generic.FhemModule):
                 reading = "unread"
                 keywords = self._attr_keywords_unread
 
-            entries = await utils.run_blocking(
-                functools.partial(self.get_soup_entries, response)
+            entries = await utils.parse_html(
+                response, self.get_soup_entries, SoupStrainer("tbody")
             )
 
             i = 1
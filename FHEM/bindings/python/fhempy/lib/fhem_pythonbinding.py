@@ -15,18 +15,25 @@ import traceback
 import websockets
 
 from . import fhem, pkg_installer, utils, version
+from .core import executor, http_client
 from .core.zeroconf import zeroconf
 
 logger = logging.getLogger(__name__)
 
 loadedModuleInstances = {}
 moduleLoadingRunning = {}
+# FHEMPYTYPE => imported module with successfully checked dependencies
+loadedModuleTypes = {}
 zc_info = None
 
 pip_lock = asyncio.Lock()
 
 connection_start = 0
 fct_timeout = 60
+# max number of commands sent to FHEM which are waiting for a reply
+max_pending_commands = 1000
+# max number of Define functions running at the same time
+max_concurrent_defines = 10
 
 stop_event = asyncio.Event()
 exit_code = 0
@@ -75,6 +82,7 @@ async def pybinding(websocket, path):
     await activate_internal_modules()
     await fhem.send_version()
     asyncio.create_task(fhem.send_latest_release())
+    asyncio.create_task(fhem.send_command_stats())
     try:
         async for message in websocket:
             asyncio.create_task(pb.onMessage(message))
@@ -94,12 +102,25 @@ class fhempy:
     def __init__(self, websocket):
         self.wsconnection = websocket
         self.shutdown_started = 0
-        self._event_listener = []
-        self._msg_listeners = []
+        # {(event_device, event_name): [callback, ...]}
+        # None for device or name subscribes to all of them
+        self._event_listeners = {}
+        self._event_subscriptions = ([], False)
+        self._msg_listeners = {}
+        self._msg_listener_slots = asyncio.Semaphore(max_pending_commands)
         self.msg_received_time = {}
+        self._define_slots = asyncio.Semaphore(max_concurrent_defines)
+        self._module_type_loads = {}
 
-    def register_msg_listener(self, listener, awaitid):
-        self._msg_listeners.append({"func": listener, "awaitId": awaitid})
+    async def register_msg_listener(self, listener, awaitid):
+        # wait if too many commands are waiting for a reply
+        await self._msg_listener_slots.acquire()
+        self._msg_listeners[awaitid] = listener
+
+    def unregister_msg_listener(self, awaitid):
+        if awaitid in self._msg_listeners:
+            del self._msg_listeners[awaitid]
+            self._msg_listener_slots.release()
 
     async def send(self, msg):
         if stop_event.is_set():
@@ -210,14 +231,13 @@ class fhempy:
             await self.sendBackError(hash, "fhempy failed to handle message")
 
     async def handle_message(self, msg, hash):
-        if "awaitId" in hash and len(self._msg_listeners) > 0:
-            removeElement = None
-            for listener in self._msg_listeners:
-                if listener["awaitId"] == hash["awaitId"]:
-                    listener["func"](msg)
-                    removeElement = listener
-            if removeElement:
-                self._msg_listeners.remove(removeElement)
+        if "awaitId" in hash:
+            listener = self._msg_listeners.get(hash["awaitId"])
+            if listener is None:
+                logger.debug(f"No listener for awaitId {hash['awaitId']}")
+                return
+            self.unregister_msg_listener(hash["awaitId"])
+            listener(msg)
         else:
             if hash["msgtype"] == "update":
                 await self.update_and_exit(hash)
@@ -233,44 +253,63 @@ class fhempy:
                 await self.handle_function(hash, msg)
             elif hash["msgtype"] == "event":
                 await self.handle_event(hash, msg)
+            elif hash["msgtype"] == "preload":
+                asyncio.create_task(self.preload_module_types(hash["args"]))
 
     def register_event_listener(self, event_device, event_name, callback):
-        self._event_listener.append(
-            {
-                "event_device": event_device,
-                "event_name": event_name,
-                "callback": callback,
-            }
-        )
+        key = (event_device, event_name)
+        if key not in self._event_listeners:
+            self._event_listeners[key] = []
+        self._event_listeners[key].append(callback)
+        self.update_event_subscriptions()
 
     def unregister_event_listener(self, event_device, event_name, callback):
-        self._event_listener.remove(
-            {
-                "event_device": event_device,
-                "event_name": event_name,
-                "callback": callback,
-            }
+        key = (event_device, event_name)
+        self._event_listeners[key].remove(callback)
+        if len(self._event_listeners[key]) == 0:
+            del self._event_listeners[key]
+        self.update_event_subscriptions()
+
+    def update_event_subscriptions(self):
+        # tell FHEM for which devices events need to be forwarded
+        devices = sorted(
+            set(device for (device, name) in self._event_listeners if device)
         )
+        subscribe_all = any(device is None for (device, name) in self._event_listeners)
+        if (devices, subscribe_all) == self._event_subscriptions:
+            return
+        self._event_subscriptions = (devices, subscribe_all)
+        msg = {
+            "msgtype": "event_subscriptions",
+            "devices": devices,
+            "all": subscribe_all,
+        }
+        msg = json.dumps(msg, ensure_ascii=False)
+        logger.debug("<<< WS: " + msg)
+        asyncio.create_task(self.send(msg))
 
     async def handle_event(self, hash, msg):
         event = f"{hash['args'][0]}"
         event_device = hash["NAME"]
-        event_arr = event.split(": ")
+        event_arr = event.split(": ", 1)
         if len(event_arr) > 1:
             event_name = event_arr[0]
             event_value = event_arr[1]
         else:
             event_name = "state"
             event_value = event_arr[0]
-
-        for listener in self._event_listener:
-            if (
-                event_device == listener["event_device"]
-                or listener["event_device"] is None
-            ) and (
-                event_name == listener["event_name"] or listener["event_name"] is None
-            ):
-                await listener["callback"](event_device, event_name, event_value)
+        fhem.updateReadingsCache(event_device, event_name, event_value)
+
+        for key in (
+            (event_device, event_name),
+            (event_device, None),
+            (None, event_name),
+            (None, None),
+        ):
+            if key not in self._event_listeners:
+                continue
+            for callback in list(self._event_listeners[key]):
+                await callback(event_device, event_name, event_value)
 
     async def handle_function(self, hash, msg):
         ret = ""
@@ -315,11 +354,10 @@ class fhempy:
                 fhem_reply_done = True
 
                 try:
-                    await self.check_and_install_dependencies(hash)
-
-                    module_object = await self.import_module(hash)
+                    module_object = await self.load_module_type(hash)
 
-                    await self.define_module(hash, module_object)
+                    async with self._define_slots:
+                        await self.define_module(hash, module_object)
                 except asyncio.TimeoutError:
                     errorMsg = (
                         f"Function execution >{fct_timeout}s, "
@@ -364,7 +402,13 @@ class fhempy:
 
         if nmInstance is not None:
             try:
-                ret = await self.execute_function(hash, fhem_reply_done, nmInstance)
+                if hash["function"] == "Define":
+                    async with self._define_slots:
+                        ret = await self.execute_function(
+                            hash, fhem_reply_done, nmInstance
+                        )
+                else:
+                    ret = await self.execute_function(hash, fhem_reply_done, nmInstance)
             except asyncio.TimeoutError:
                 errorMsg = (
                     f"Function execution >{fct_timeout}s, "
@@ -394,6 +438,7 @@ class fhempy:
         if hash["function"] == "Undefine":
             if hash["NAME"] in loadedModuleInstances:
                 del loadedModuleInstances[hash["NAME"]]
+            fhem.clearReadingsCache(hash["NAME"])
 
     async def define_module(self, hash, module_object):
         # create instance of class with logger
@@ -402,6 +447,7 @@ class fhempy:
         moduleLogger.setLevel(
             self.getLogLevel(await fhem.AttrVal(hash["NAME"], "verbose", "3"))
         )
+        await fhem.seedReadingsCache(hash)
         loadedModuleInstances[hash["NAME"]] = target_class(moduleLogger)
         del moduleLoadingRunning[hash["NAME"]]
         if hash["function"] != "Define":
@@ -449,6 +495,7 @@ class fhempy:
     async def rename_device(self, hash, old_name, new_name):
         loadedModuleInstances[new_name] = loadedModuleInstances[old_name]
         del loadedModuleInstances[old_name]
+        fhem.renameReadingsCache(old_name, new_name)
         await self.sendBackReturn(hash, "")
         loadedModuleInstances[new_name].hash["NAME"] = new_name
 
@@ -485,6 +532,10 @@ class fhempy:
             asyncio.get_event_loop().remove_signal_handler(signal.SIGINT)
 
     async def undefine_all(self):
+        await self.undefine_all_devices()
+        await http_client.close()
+
+    async def undefine_all_devices(self):
         tasks = []
         for name in loadedModuleInstances:
             dev_instance = loadedModuleInstances[name]
@@ -519,6 +570,50 @@ class fhempy:
         except Exception:
             logger.exception("Undefined failed")
 
+    async def load_module_type(self, hash):
+        # dependency check and import run only once per FHEMPYTYPE,
+        # all devices of the same type wait for the same load
+        fhempytype = hash["FHEMPYTYPE"]
+        if fhempytype in loadedModuleTypes:
+            return loadedModuleTypes[fhempytype]
+        if fhempytype not in self._module_type_loads:
+            self._module_type_loads[fhempytype] = asyncio.create_task(
+                self._load_module_type(hash)
+            )
+        load_task = self._module_type_loads[fhempytype]
+        try:
+            return await asyncio.shield(load_task)
+        finally:
+            if (
+                load_task.done()
+                and self._module_type_loads.get(fhempytype) is load_task
+            ):
+                del self._module_type_loads[fhempytype]
+
+    async def preload_module_types(self, fhempytypes):
+        # sent by FHEM before the first Defines, imports all used module types
+        # in parallel
+        await asyncio.gather(
+            *[self._preload_module_type(fhempytype) for fhempytype in fhempytypes]
+        )
+
+    async def _preload_module_type(self, fhempytype):
+        try:
+            deps_ok = await utils.run_blocking(
+                functools.partial(pkg_installer.check_dependencies, fhempytype)
+            )
+            # missing dependencies are installed by the Define
+            if deps_ok:
+                await self.load_module_type({"FHEMPYTYPE": fhempytype})
+        except Exception:
+            logger.debug(f"Failed to preload {fhempytype}", exc_info=True)
+
+    async def _load_module_type(self, hash):
+        await self.check_and_install_dependencies(hash)
+        module_object = await self.import_module(hash)
+        loadedModuleTypes[hash["FHEMPYTYPE"]] = module_object
+        return module_object
+
     async def import_module(self, hash):
         # import module
         pymodule = "fhempy.lib." + hash["FHEMPYTYPE"] + "." + hash["FHEMPYTYPE"]
@@ -575,13 +670,25 @@ class fhempy:
 
 
 def usage():
-    print("Usage: fhempy [-h|--help] [-v|--version] [-i|--ip] [-p|--port] [-l|--local]")
+    print(
+        "Usage: fhempy [-h|--help] [-v|--version] [-i|--ip] [-p|--port] [-l|--local] "
+        "[--max-defines] [--max-pending] [--pool-size]"
+    )
     print("  --local   Use only if you run fhempy on your FHEM machine")
     print(
         "  --ip      "
         "Specify the IP address for FHEM connection setup (default: local ip)"
     )
     print("  --port    Specify the port fhempy runs on (default: 15733)")
+    print(
+        "  --max-defines "
+        "Max number of devices which are defined at the same time (default: 10)"
+    )
+    print(
+        "  --max-pending "
+        "Max number of commands waiting for a reply from FHEM (default: 1000)"
+    )
+    print("  --pool-size Number of threads per pool, e.g. io=32,cpu=2,ble=4,process=0")
     print("  --version Print version and exit")
     print("  --help    This help text")
 
@@ -596,7 +703,17 @@ async def async_main():
         opts, args = getopt.getopt(
             sys.argv[1:],
             "dhvli:p:",
-            ["help", "version", "ip=", "port=", "local", "debug"],
+            [
+                "help",
+                "version",
+                "ip=",
+                "port=",
+                "local",
+                "debug",
+                "max-defines=",
+                "max-pending=",
+                "pool-size=",
+            ],
         )
     except getopt.GetoptError as err:
         logger.error(err)
@@ -646,9 +763,22 @@ def handle_cmdline_options(opts):
             local = True
         elif o in ("-d", "--debug"):
             logging.getLogger("").setLevel(logging.DEBUG)
+        elif o in ("--max-defines", "--max-pending", "--pool-size"):
+            handle_limit_option(o, a)
     return ip, port, local
 
 
+def handle_limit_option(o, a):
+    global max_concurrent_defines
+    global max_pending_commands
+    if o == "--max-defines":
+        max_concurrent_defines = int(a)
+    elif o == "--max-pending":
+        max_pending_commands = int(a)
+    elif o == "--pool-size":
+        executor.set_pool_sizes(a)
+
+
 async def advertise_fhempy(ip, port):
     # running on remote peer, start zeroconf for autodiscovery
     if ip is None:
@@ -715,6 +845,7 @@ def run():
             # loop.run_until_complete(loop.shutdown_asyncgens())
             # loop.run_until_complete(loop.shutdown_default_executor())
         finally:
+            executor.shutdown()
             asyncio.set_event_loop(None)
             loop.close()
 
@@ -6,11 +6,12 @@ import time
 from dataclasses import dataclass
 from datetime import datetime
 
-import aiohttp
 from Cryptodome.Cipher import PKCS1_OAEP
 from Cryptodome.Hash import SHA384
 from Cryptodome.PublicKey import RSA
 
+from ..core import http_client
+
 
 @dataclass
 class SignalSet:
@@ -169,7 +170,7 @@ class FusionSolarRestApi:
 
     async def login(self):
         try:
-            async with aiohttp.ClientSession(trust_env=True) as session:
+            async with http_client.create_session(trust_env=True) as session:
                 resp = await self.get_jsessionid(session)
 
                 fusion_pubkey_json = await self.get_pubkey(session)
@@ -322,7 +323,7 @@ class FusionSolarRestApi:
     async def _get(self, url, headers, max_retries=5, params={}):
         try:
             response = {}
-            async with aiohttp.ClientSession(
+            async with http_client.create_session(
                 trust_env=True, headers=headers, cookie_jar=self._cookies
             ) as session:
                 retry = 1
@@ -1,10 +1,7 @@
 import asyncio
-import functools
-
-import aiohttp
-from bs4 import BeautifulSoup
 
 from .. import fhem, generic, utils
+from ..core import http_client
 
 
 class geizhals(generic.FhemModule):
@@ -59,19 +56,11 @@ class geizhals(generic.FhemModule):
         self.create_async_task(self.update_loop())
 
     async def update_product_page_infos(self):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                self.url,
-                headers=geizhals.headers,
-            ) as resp:
-                if resp.status == 200:
-                    html = await resp.text()
-                    await utils.run_blocking(
-                        functools.partial(self.handle_product_page, html)
-                    )
-
-    def handle_product_page(self, html):
-        soup = BeautifulSoup(html, "html.parser")
+        resp = await http_client.fetch(self.url, geizhals.headers, ttl=60)
+        if resp.status == 200:
+            await utils.parse_html(resp.text, self.handle_product_page)
+
+    def handle_product_page(self, soup):
         self.product_name = soup.find(
             "h1", {"class": "variant__header__headline"}
         ).text[1:-1]
@@ -95,7 +84,7 @@ class geizhals(generic.FhemModule):
             data = {"id": self.product_id, "params": {"days": 31, "loc": self.location}}
             try:
                 await fhem.readingsBeginUpdate(self.hash)
-                async with aiohttp.ClientSession() as session:
+                async with http_client.create_session() as session:
                     async with session.post(
                         "https://geizhals.at/api/gh0/price_history",
                         headers=geizhals.headers,
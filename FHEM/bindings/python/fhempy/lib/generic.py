@@ -163,19 +163,20 @@ class FhemModule:
         self.hash = hash
         self._defargs = args
         self._defargsh = argsh
-        check_init_done = await fhem.init_done(self.hash)
+        check_init_done, attr_values, self.readme_str, _ = await asyncio.gather(
+            fhem.init_done(self.hash),
+            fhem.AttrValMany(self.hash["NAME"], {"room": "", "group": ""}),
+            utils.run_blocking(functools.partial(self._get_readme_content)),
+            utils.handle_define_attr(self._conf_attr, self, hash),
+        )
         if check_init_done == 1:
-            if await fhem.AttrVal(self.hash["NAME"], "room", "") == "":
+            if attr_values["room"] == "":
                 await fhem.CommandAttr(self.hash, f"{self.hash['NAME']} room fhempy")
-            if await fhem.AttrVal(self.hash["NAME"], "group", "") == "":
+            if attr_values["group"] == "":
                 await fhem.CommandAttr(
                     self.hash,
                     (f"{self.hash['NAME']} group " f"{self.hash['FHEMPYTYPE']}"),
                 )
-        self.readme_str = await utils.run_blocking(
-            functools.partial(self._get_readme_content)
-        )
-        await utils.handle_define_attr(self._conf_attr, self, hash)
 
     # FHEM FUNCTION
     async def Attr(self, hash, args, argsh):
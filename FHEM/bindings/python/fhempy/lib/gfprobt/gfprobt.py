@@ -3,8 +3,8 @@ import functools
 import struct
 import time
 
-from .. import fhem, generic, utils
-from ..core import ble
+from .. import fhem, generic
+from ..core import ble_async, ble_scheduler
 
 DEFAULT_TIMEOUT = 1
 
@@ -81,7 +81,7 @@ class gfprobt(generic.FhemModule):
             return "Usage: define irrigation_control fhempy gfprobt <MAC>"
         self._mac = args[3]
         self.hash["MAC"] = self._mac
-        self._conn = ble.BTLEConnection(
+        self._conn = ble_async.AsyncBTLEConnection(
             self._mac,
             keep_connected=True,
             connection_established_callback=self.write_password,
@@ -93,65 +93,68 @@ class gfprobt(generic.FhemModule):
             self._conn.set_keep_connected(False)
         return await super().Undefine(self.hash)
 
-    # write_password is running in another thread
-    def write_password(self, mac):
-        self._conn.write_characteristic(HANDLE_RW_PASSWORD, b"123456")
+    async def write_password(self, mac):
+        await self._conn.write_characteristic(HANDLE_RW_PASSWORD, b"123456")
 
     async def set_update(self, hash, params):
         self.create_async_task(self.update_once())
 
     async def set_on(self, hash, params):
         onseconds = params["onseconds"]
-        self.create_async_task(
-            self._blocking_set(functools.partial(self.blocking_on, onseconds))
-        )
+        self.create_async_task(self._set(functools.partial(self.ble_on, onseconds)))
 
     async def set_off(self, hash, params):
-        self.create_async_task(self._blocking_set(functools.partial(self.blocking_off)))
+        self.create_async_task(self._set(self.ble_off))
 
     async def set_toggle(self, hash, params):
-        self.create_async_task(
-            self._blocking_set(functools.partial(self.blocking_toggle))
-        )
+        self.create_async_task(self._set(self.ble_toggle))
 
     async def set_adjust(self, hash, params):
         self.create_async_task(
-            self._blocking_set(
+            self._set(
                 functools.partial(
-                    self.blocking_adjust, params["percentage"], params["duration"]
+                    self.ble_adjust, params["percentage"], params["duration"]
                 )
             )
         )
 
-    async def _blocking_set(self, fct):
+    async def _set(self, fct):
         async with self._ble_lock:
-            utils.run_blocking(fct)
+            await self._run_in_slot(fct)
 
-    def blocking_on(self, onseconds):
-        self.blocking_update_watering()
+    async def _run_in_slot(self, fct):
+        try:
+            await ble_scheduler.BLEConnectionScheduler.get_instance().run_async(
+                self._mac, functools.partial(self._conn.call_on_iface, fct)
+            )
+        finally:
+            await ble_scheduler.update_stats_readings(self.hash, self._mac)
+
+    async def ble_on(self, onseconds):
+        await self.ble_update_watering()
         if self._watering == 0:
-            self.blocking_toggle()
+            await self.ble_toggle()
 
-    def blocking_off(self):
-        self.blocking_update_watering()
+    async def ble_off(self):
+        await self.ble_update_watering()
         if self._watering == 1:
-            self.blocking_toggle()
+            await self.ble_toggle()
 
-    def blocking_toggle(self):
-        self._conn.write_characteristic(HANDLE_W_WATERING, b"\x00")
-        self._conn.write_characteristic(HANDLE_W_WATERING, b"\x01")
+    async def ble_toggle(self):
+        await self._conn.write_characteristic(HANDLE_W_WATERING, b"\x00")
+        await self._conn.write_characteristic(HANDLE_W_WATERING, b"\x01")
 
-    def blocking_adjust(self, percentage, duration):
+    async def ble_adjust(self, percentage, duration):
         duration_sec = duration * 60 * 60
 
         duration_hex = duration_sec.to_bytes(6, "little")
         percentage_hex = percentage.to_bytes(2, "little")
-        self._conn.writeCharacteristic(
+        await self._conn.write_characteristic(
             HANDLE_RW_INCREASEREDUCE, duration_hex + percentage_hex
         )
 
-        self.write_offset()
-        self.commit_code()
+        await self.write_offset()
+        await self.commit_code()
 
     async def update_loop(self):
         while True:
@@ -165,7 +168,7 @@ class gfprobt(generic.FhemModule):
 
     async def update_once(self):
         async with self._ble_lock:
-            await utils.run_blocking(functools.partial(self.blocking_update))
+            await self._run_in_slot(self.ble_update)
         await fhem.readingsBeginUpdate(self.hash)
         await fhem.readingsBulkUpdateIfChanged(
             self.hash, "state", "on" if self._watering == 1 else "off"
@@ -193,54 +196,56 @@ class gfprobt(generic.FhemModule):
         await fhem.readingsBulkUpdateIfChanged(self.hash, "devname", self._devname)
         await fhem.readingsEndUpdate(self.hash, 1)
 
-    def blocking_update_watering(self):
+    async def ble_update_watering(self):
         self._watering = struct.unpack(
-            "<b", self._conn.read_characteristic(HANDLE_R_WATERING)
+            "<b", await self._conn.read_characteristic(HANDLE_R_WATERING)
         )[0]
 
-    def blocking_update(self):
-        self.blocking_update_watering()
+    async def ble_update(self):
+        await self.ble_update_watering()
         self._battery = struct.unpack(
-            "<h", self._conn.read_characteristic(HANDLE_R_BATTERY)
+            "<h", await self._conn.read_characteristic(HANDLE_R_BATTERY)
         )[0]
         self._temperature = struct.unpack(
-            "<h", self._conn.read_characteristic(HANDLE_R_TEMPERATURE)
+            "<h", await self._conn.read_characteristic(HANDLE_R_TEMPERATURE)
         )[0]
         self._min_temp = struct.unpack(
-            "<h", self._conn.read_characteristic(HANDLE_R_MIN_TEMP)
+            "<h", await self._conn.read_characteristic(HANDLE_R_MIN_TEMP)
         )[0]
         self._max_temp = struct.unpack(
-            "<h", self._conn.read_characteristic(HANDLE_R_MAX_TEMP)
+            "<h", await self._conn.read_characteristic(HANDLE_R_MAX_TEMP)
         )[0]
-        self._firmware = self._conn.read_characteristic(HANDLE_R_FIRMWARE)
+        self._firmware = await self._conn.read_characteristic(HANDLE_R_FIRMWARE)
         self._firmware = str(self._firmware[1]) + "." + str(self._firmware[0])
-        self._devname = self._conn.read_characteristic(HANDLE_RW_DEVNAME).decode(
-            "utf-8"
-        )
-        self._eco = self._conn.read_characteristic(HANDLE_RW_ECO_PART1)
-        self._eco += self._conn.read_characteristic(HANDLE_RW_ECO_PART2)
+        self._devname = (
+            await self._conn.read_characteristic(HANDLE_RW_DEVNAME)
+        ).decode("utf-8")
+        self._eco = await self._conn.read_characteristic(HANDLE_RW_ECO_PART1)
+        self._eco += await self._conn.read_characteristic(HANDLE_RW_ECO_PART2)
         self._timeoffset = struct.unpack(
-            "<I", self._conn.read_characteristic(HANDLE_RW_TIME_OFFSET)
+            "<I", await self._conn.read_characteristic(HANDLE_RW_TIME_OFFSET)
         )[0]
-        self._devmac = str(self._conn.read_characteristic(HANDLE_R_MAC))
-        self._increasereduce = self._conn.read_characteristic(HANDLE_RW_INCREASEREDUCE)
+        self._devmac = str(await self._conn.read_characteristic(HANDLE_R_MAC))
+        self._increasereduce = await self._conn.read_characteristic(
+            HANDLE_RW_INCREASEREDUCE
+        )
         self._adjust_hours = struct.unpack("<I", self._increasereduce[0:4])[0] / 3600
         self._adjust_perc = struct.unpack("<h", self._increasereduce[4:])[0]
         self._raw_timers = {}
         for handle_timer in HANDLE_RW_TIMERS:
-            self._raw_timers[handle_timer] = self._conn.read_characteristic(
+            self._raw_timers[handle_timer] = await self._conn.read_characteristic(
                 handle_timer
             )
             self.logger.debug(self._raw_timers[handle_timer])
 
-    def write_offset(self):
+    async def write_offset(self):
         now = time.localtime()
         sec_since_mon = (
             now.tm_wday * 3600 * 24 + now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
         )
-        sec_since_mon = sec_since_mon.to_byte(4, "little")
-        self._conn.writeCharacteristic(HANDLE_RW_TIME_OFFSET, sec_since_mon)
+        sec_since_mon = sec_since_mon.to_bytes(4, "little")
+        await self._conn.write_characteristic(HANDLE_RW_TIME_OFFSET, sec_since_mon)
 
-    def commit_code(self):
-        self._conn.writeCharacteristic(HANDLE_W_COMMITCODE, b"\x00")
-        self._conn.writeCharacteristic(HANDLE_W_COMMITCODE, b"\x01")
+    async def commit_code(self):
+        await self._conn.write_characteristic(HANDLE_W_COMMITCODE, b"\x00")
+        await self._conn.write_characteristic(HANDLE_W_COMMITCODE, b"\x01")
@@ -4,9 +4,8 @@ import hashlib
 import pathlib
 from datetime import datetime
 
-import aiohttp
-
 from .. import fhem, generic
+from ..core import http_client
 
 
 class github_backup(generic.FhemModule):
@@ -94,7 +93,7 @@ class github_backup(generic.FhemModule):
 
     async def github_get(self, url):
         ret = None
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with http_client.create_session(trust_env=True) as session:
             async with session.get(url, headers=github_backup.headers) as resp:
                 if resp.status < 400:
                     ret = await resp.json()
@@ -105,7 +104,7 @@ class github_backup(generic.FhemModule):
         return ret
 
     async def github_put(self, url, json_data):
-        async with aiohttp.ClientSession(trust_env=True) as session:
+        async with http_client.create_session(trust_env=True) as session:
             async with session.put(
                 url, json=json_data, headers=github_backup.headers
             ) as resp:
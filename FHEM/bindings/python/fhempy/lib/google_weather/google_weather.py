@@ -1,13 +1,11 @@
 import asyncio
-import functools
 import json
 from random import randrange
 
-import aiohttp
-from bs4 import BeautifulSoup
 from fhempy.lib import utils
 
 from .. import fhem, generic
+from ..core import http_client
 
 
 class google_weather(generic.FhemModule):
@@ -108,21 +106,22 @@ class google_weather(generic.FhemModule):
         while True:
             # aiohttp get
             try:
-                async with aiohttp.ClientSession(trust_env=True) as session:
-                    async with session.get(self.update_url, headers=headers) as resp:
-                        if resp.status == 200:
-                            await self.handle_response(await resp.text())
-                        else:
-                            await fhem.readingsSingleUpdate(
-                                self.hash,
-                                "state",
-                                f"failed: HTTP error {resp.status}",
-                                1,
-                            )
-                            self.logger.error(
-                                f"Failed to fetch {self.update_url}, "
-                                f"failed with status {resp.status}"
-                            )
+                resp = await http_client.fetch(
+                    self.update_url, headers, ttl=60, trust_env=True
+                )
+                if resp.status == 200:
+                    await self.handle_response(resp.text)
+                else:
+                    await fhem.readingsSingleUpdate(
+                        self.hash,
+                        "state",
+                        f"failed: HTTP error {resp.status}",
+                        1,
+                    )
+                    self.logger.error(
+                        f"Failed to fetch {self.update_url}, "
+                        f"failed with status {resp.status}"
+                    )
             except Exception:
                 self.logger.exception("Failed to update")
             await asyncio.sleep(self._attr_interval * 60)
@@ -185,8 +184,7 @@ class google_weather(generic.FhemModule):
             )
         return next_days
 
-    def extract_weather(self, response):
-        soup = BeautifulSoup(response, "html.parser")
+    def extract_weather(self, soup):
         self.cur_temp = self.get_current_temperature(soup)
         cur_condition_element = self.get_current_condition(soup)
         if cur_condition_element is None:
@@ -222,8 +220,7 @@ class google_weather(generic.FhemModule):
                 break
 
     async def handle_response(self, response):
-        # bs4
-        await utils.run_blocking(functools.partial(self.extract_weather, response))
+        await utils.parse_html(response, self.extract_weather)
 
         await fhem.readingsBeginUpdate(self.hash)
         await fhem.readingsBulkUpdateIfChanged(
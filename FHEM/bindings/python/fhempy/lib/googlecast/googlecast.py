@@ -511,11 +511,10 @@ class googlecast(generic.FhemModule):
         d.load_url(url, force=True, reload_seconds=30)
 
     async def playYoutubeAudio(self, uri):
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            video_url = await self.loop.run_in_executor(
-                pool, functools.partial(self.getYoutubeAudioUrl, uri)
-            )
-            self.cast.play_media(video_url, "audio/mp4")
+        video_url = await utils.run_blocking(
+            functools.partial(self.getYoutubeAudioUrl, uri)
+        )
+        self.cast.play_media(video_url, "audio/mp4")
 
     def getYoutubeAudioUrl(self, uri):
         ydl = youtube_dl.YoutubeDL(
@@ -1,5 +1,4 @@
 import asyncio
-import functools
 import logging
 
 import bluepy.btle
@@ -8,7 +7,8 @@ from btlewrap import BluetoothBackendException
 from fhempy.lib.generic import FhemModule
 from miflora import miflora_poller
 
-from .. import fhem, utils
+from .. import fhem
+from ..core import ble_scheduler
 
 
 class miflora(FhemModule):
@@ -16,12 +16,12 @@ class miflora(FhemModule):
         super().__init__(logger)
         self.hash = None
         self.updateTask = None
-        self._poller = None
+        self._pollers = {}
         self._attr_update_interval = 1200
-        self._attr_hci_device = "hci0"
+        self._attr_hci_device = "auto"
         self._attr_list = {
             "update_interval": {"default": 1200, "format": "int"},
-            "hci_device": {"default": "hci0"},
+            "hci_device": {"default": "auto"},
             "poll_type": {"default": "interval", "options": "interval,manual"},
         }
         self.set_attr_config(self._attr_list)
@@ -38,13 +38,6 @@ class miflora(FhemModule):
         hash["MAC"] = args[3]
         self.logger.debug(f"Define miflora: {self._address}")
 
-        self._poller = miflora_poller.MiFloraPoller(
-            self._address,
-            btlewrap.BluepyBackend,
-            cache_timeout=60,
-            adapter=self._attr_hci_device,
-        )
-
         if self.updateTask:
             self.updateTask.cancel()
         self.updateTask = self.create_async_task(self.update_task())
@@ -54,41 +47,50 @@ class miflora(FhemModule):
             await self.do_update()
             await asyncio.sleep(self._attr_update_interval)
 
+    def get_poller(self, hci):
+        if hci not in self._pollers:
+            self._pollers[hci] = miflora_poller.MiFloraPoller(
+                self._address,
+                btlewrap.BluepyBackend,
+                cache_timeout=60,
+                adapter=f"hci{hci}",
+            )
+        return self._pollers[hci]
+
+    def blocking_update(self, hci):
+        poller = self.get_poller(hci)
+        values = {
+            "name": poller.name(),
+            "firmware": poller.firmware_version(),
+        }
+        for param in ("temperature", "light", "moisture", "conductivity", "battery"):
+            values[param] = poller.parameter_value(param)
+        values["fertility"] = values.pop("conductivity")
+        return values
+
+    def get_hci(self):
+        if self._attr_hci_device == "auto":
+            return None
+        return int(self._attr_hci_device[3:])
+
     async def do_update(self):
         self.logger.debug("Run update task")
         try:
-            # name
-            name = await utils.run_blocking(functools.partial(self._poller.name))
-            await fhem.readingsSingleUpdateIfChanged(self.hash, "name", name, 1)
-            # firmware_version
-            firmware_version = await utils.run_blocking(
-                functools.partial(self._poller.firmware_version)
+            values = await ble_scheduler.BLEConnectionScheduler.get_instance().run(
+                self._address, self.blocking_update, hci=self.get_hci()
             )
-            await fhem.readingsSingleUpdateIfChanged(
-                self.hash, "firmware", firmware_version, 1
-            )
-            for param in (
-                "temperature",
-                "light",
-                "moisture",
-                "conductivity",
-                "battery",
-            ):
-                # param
-                param_val = await utils.run_blocking(
-                    functools.partial(self._poller.parameter_value, param)
-                )
-                if param == "conductivity":
-                    param = "fertility"
-                await fhem.readingsSingleUpdateIfChanged(self.hash, param, param_val, 1)
-            await fhem.readingsSingleUpdateIfChanged(self.hash, "presence", "online", 1)
-            await fhem.readingsSingleUpdateIfChanged(self.hash, "state", "online", 1)
+            async with fhem.readings(self.hash) as r:
+                for reading, value in values.items():
+                    r.update_if_changed(reading, value)
+                r.update_if_changed("presence", "online")
+                r.update_if_changed("state", "online")
         except Exception:
             self.logger.error(f"Failed to get updates from miflora {self._address}")
             await fhem.readingsSingleUpdateIfChanged(
                 self.hash, "presence", "offline", 1
             )
             await fhem.readingsSingleUpdateIfChanged(self.hash, "state", "offline", 1)
+        await ble_scheduler.update_stats_readings(self.hash, self._address)
 
     async def set_update(self, hash, params):
         self.create_async_task(self.do_update())
@@ -113,9 +115,4 @@ class miflora(FhemModule):
 
     async def set_attr_hci_device(self, hash):
         self.logger.debug("attr change of hci device")
-        self._poller = miflora_poller.MiFloraPoller(
-            self._address,
-            btlewrap.BluepyBackend,
-            cache_timeout=60,
-            adapter=self._attr_hci_device,
-        )
+        self._pollers = {}
@@ -1,5 +1,4 @@
 import asyncio
-import functools
 import logging
 
 import bluepy.btle
@@ -8,7 +7,8 @@ from btlewrap import BluetoothBackendException
 from fhempy.lib.generic import FhemModule
 from mitemp_bt import mitemp_bt_poller
 
-from .. import fhem, utils
+from .. import fhem
+from ..core import ble_scheduler
 
 
 class mitemp(FhemModule):
@@ -16,12 +16,12 @@ class mitemp(FhemModule):
         super().__init__(logger)
         self.hash = None
         self.updateTask = None
-        self._poller = None
+        self._pollers = {}
         self._attr_update_interval = 1200
-        self._attr_hci_device = "hci0"
+        self._attr_hci_device = "auto"
         self._attr_list = {
             "update_interval": {"default": 1200, "format": "int"},
-            "hci_device": {"default": "hci0"},
+            "hci_device": {"default": "auto"},
         }
         self.set_attr_config(self._attr_list)
         return
@@ -36,41 +36,47 @@ class mitemp(FhemModule):
         hash["MAC"] = args[3]
         self.logger.debug(f"Define mitemp: {self._address}")
 
-        self._poller = mitemp_bt_poller.MiTempBtPoller(
-            self._address,
-            cache_timeout=60,
-            adapter=self._attr_hci_device,
-            backend=btlewrap.BluepyBackend,
-        )
-
         if self.updateTask:
             self.updateTask.cancel()
         self.updateTask = self.create_async_task(self.update_task())
 
+    def get_poller(self, hci):
+        if hci not in self._pollers:
+            self._pollers[hci] = mitemp_bt_poller.MiTempBtPoller(
+                self._address,
+                cache_timeout=60,
+                adapter=f"hci{hci}",
+                backend=btlewrap.BluepyBackend,
+            )
+        return self._pollers[hci]
+
+    def blocking_update(self, hci):
+        poller = self.get_poller(hci)
+        values = {
+            "name": poller.name(),
+            "firmware": poller.firmware_version(),
+        }
+        for param in ("temperature", "humidity", "battery"):
+            values[param] = poller.parameter_value(param)
+        return values
+
+    def get_hci(self):
+        if self._attr_hci_device == "auto":
+            return None
+        return int(self._attr_hci_device[3:])
+
     async def update_task(self):
         while True:
             self.logger.debug(f"Run update task")
             try:
-                await fhem.readingsBeginUpdate(self.hash)
-                # name
-                name = await utils.run_blocking(functools.partial(self._poller.name))
-                await fhem.readingsBulkUpdateIfChanged(self.hash, "name", name)
-                # firmware_version
-                firmware_version = await utils.run_blocking(
-                    functools.partial(self._poller.firmware_version)
+                values = await ble_scheduler.BLEConnectionScheduler.get_instance().run(
+                    self._address, self.blocking_update, hci=self.get_hci()
                 )
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "firmware", firmware_version
-                )
-                for param in ("temperature", "humidity", "battery"):
-                    # param
-                    param_val = await utils.run_blocking(
-                        functools.partial(self._poller.parameter_value, param)
-                    )
-                    await fhem.readingsBulkUpdateIfChanged(self.hash, param, param_val)
-                await fhem.readingsBulkUpdateIfChanged(self.hash, "presence", "online")
-                await fhem.readingsBulkUpdateIfChanged(self.hash, "state", "online")
-                await fhem.readingsEndUpdate(self.hash, 1)
+                async with fhem.readings(self.hash) as r:
+                    for reading, value in values.items():
+                        r.update_if_changed(reading, value)
+                    r.update_if_changed("presence", "online")
+                    r.update_if_changed("state", "online")
             except Exception:
                 self.logger.error(f"Failed to get updates from mitemp {self._address}")
                 await fhem.readingsSingleUpdateIfChanged(
@@ -79,6 +85,7 @@ class mitemp(FhemModule):
                 await fhem.readingsSingleUpdateIfChanged(
                     self.hash, "state", "offline", 1
                 )
+            await ble_scheduler.update_stats_readings(self.hash, self._address)
             await asyncio.sleep(self._attr_update_interval)
 
     async def set_attr_update_interval(self, hash):
@@ -91,9 +98,4 @@ class mitemp(FhemModule):
 
     async def set_attr_hci_device(self, hash):
         self.logger.debug(f"attr change of hci device")
-        self._poller = mitemp_bt_poller.MiTempBtPoller(
-            self._address,
-            cache_timeout=60,
-            adapter=self._attr_hci_device,
-            backend=btlewrap.BluepyBackend,
-        )
+        self._pollers = {}
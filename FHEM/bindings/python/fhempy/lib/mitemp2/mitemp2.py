@@ -1,6 +1,10 @@
-from ..core.ble import BTLEConnection
+import asyncio
+import functools
+
 from .. import generic
 from .. import fhem
+from ..core import ble_scheduler
+from ..core.ble_async import AsyncBTLEConnection
 
 
 class mitemp2(generic.FhemModule):
@@ -14,22 +18,45 @@ class mitemp2(generic.FhemModule):
             return "Usage: define mitemp fhempy mitemp2 <MAC>"
         self._mac = args[3]
         self.hash["MAC"] = self._mac
-        self._conn = BTLEConnection(
+        self._conn = AsyncBTLEConnection(
             self._mac,
             keep_connected=True,
             connection_established_callback=self.connection_setup,
         )
+        self._conn.set_callback("all", self.received_notification)
+        self.create_async_task(self.connect_loop())
 
-    def connection_setup(self, mac):
-        self.create_async_task(self.async_connection_setup(mac))
+    async def Undefine(self, hash):
+        self._conn.set_keep_connected(False)
+        return await super().Undefine(hash)
 
-    async def async_connection_setup(self, mac):
+    async def connect_loop(self):
+        while True:
+            try:
+                if not self._conn.is_connected:
+                    await fhem.readingsSingleUpdateIfChanged(
+                        self.hash, "state", "connecting", 1
+                    )
+                    await ble_scheduler.BLEConnectionScheduler.get_instance().run_async(
+                        self._mac,
+                        functools.partial(self._conn.call_on_iface, self._conn.connect),
+                    )
+            except asyncio.CancelledError:
+                break
+            except Exception as ex:
+                self.logger.error(f"Failed to connect: {ex!r}")
+                await fhem.readingsSingleUpdateIfChanged(
+                    self.hash, "state", "disconnected", 1
+                )
+            await ble_scheduler.update_stats_readings(self.hash, self._mac)
+            await asyncio.sleep(60)
+
+    async def connection_setup(self, mac):
         await fhem.readingsSingleUpdate(self.hash, "state", "connected", 1)
         # enable notifications
-        self._conn.write_characteristic(0x0038, b"\x01\x00")
+        await self._conn.write_characteristic(0x0038, b"\x01\x00")
         # enable lower power mode
-        self._conn.write_characteristic(0x0046, b"\xf4\x01\x00")
-        self._conn.set_callback("all", self.received_notification)
+        await self._conn.write_characteristic(0x0046, b"\xf4\x01\x00")
 
     def received_notification(self, data):
         self.create_async_task(self.update_data(data))
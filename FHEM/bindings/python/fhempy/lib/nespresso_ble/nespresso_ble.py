@@ -3,8 +3,8 @@ import functools
 import logging
 
 from .. import fhem
-from .. import utils as fpyutils
 from .. import generic
+from ..core import ble_scheduler
 from .nespresso import NespressoDetect
 
 
@@ -90,9 +90,9 @@ class nespresso_ble(generic.FhemModule):
         try:
             coffee_type = params["coffee_type"]
             temp = params["temperature"]
-            fpyutils.run_blocking_task(
-                functools.partial(
-                    self.nespressodetect.make_coffee, self.mac, temp, coffee_type
+            self.create_async_task(
+                self.run_in_slot(
+                    functools.partial(self.blocking_make_coffee, temp, coffee_type)
                 )
             )
         except Exception:
@@ -101,8 +101,16 @@ class nespresso_ble(generic.FhemModule):
     async def set_updateStatus(self, hash, params):
         self.create_async_task(self.update_status())
 
+    async def run_in_slot(self, function):
+        try:
+            await ble_scheduler.BLEConnectionScheduler.get_instance().run(
+                self.mac, function, hci=0
+            )
+        finally:
+            await ble_scheduler.update_stats_readings(self.hash, self.mac)
+
     async def update_status(self):
-        await fpyutils.run_blocking(functools.partial(self.blocking_update_status))
+        await self.run_in_slot(self.blocking_update_status)
 
         if self.device_info:
             for mac, dev in self.device_info.items():
@@ -134,7 +142,11 @@ class nespresso_ble(generic.FhemModule):
                 for name, val in data.items():
                     await fhem.readingsSingleUpdateIfChanged(self.hash, name, val, 1)
 
-    def blocking_update_status(self):
+    # pygatt connects via the default adapter hci0
+    def blocking_make_coffee(self, temp, coffee_type, hci):
+        self.nespressodetect.make_coffee(self.mac, temp, coffee_type)
+
+    def blocking_update_status(self, hci):
         self.logger.debug("nespresso_ble updatestatus")
         try:
             self.device_info = self.nespressodetect.get_info()
@@ -1,5 +1,4 @@
 import asyncio
-import concurrent
 import functools
 import os
 import time
@@ -302,7 +301,7 @@ class object_detection(FhemModule):
             self.create_async_task(self.image_detect_objects_loop())
         else:
             self._detection_task = utils.run_blocking_task(
-                functools.partial(self.run_stream_object_detection)
+                functools.partial(self.run_stream_object_detection), pool="longrunning"
             )
         return ""
 
@@ -319,7 +318,7 @@ class object_detection(FhemModule):
 
     async def image_detect_objects(self):
         detected_objects = await utils.run_blocking(
-            functools.partial(self.run_image_object_detection)
+            functools.partial(self.run_image_object_detection), pool="cpu"
         )
         await self.update_readings(detected_objects)
 
@@ -332,38 +331,29 @@ class object_detection(FhemModule):
                     self.hash, self.hash["NAME"] + " object_.*"
                 )
 
-            await fhem.readingsBeginUpdate(self.hash)
-            for obj in detected_objects:
-                obj_name = obj["object"]
-                obj_score = obj["score"]
-                if obj_name not in all_objects:
-                    all_objects[obj_name] = 0
-                all_objects[obj_name] += 1
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "object_" + obj_name, obj_score
-                )
-            for obj_name in all_objects:
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "object_count_" + obj_name, all_objects[obj_name]
-                )
-                curr_objects[obj_name] = all_objects[obj_name]
-
-            # set readings to 0 for objects which were not found
-            if self._prev_objects is None:
-                set_0_readings = {}
-            else:
-                set_0_readings = set(self._prev_objects) - set(curr_objects)
-            for set_0_reading in set_0_readings:
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "object_" + set_0_reading, 0
-                )
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "object_count_" + set_0_reading, 0
-                )
-            await fhem.readingsBulkUpdateIfChanged(
-                self.hash, "objects_detected", ",".join(set(all_objects))
-            )
-            await fhem.readingsEndUpdate(self.hash, 1)
+            async with fhem.readings(self.hash) as r:
+                for obj in detected_objects:
+                    obj_name = obj["object"]
+                    obj_score = obj["score"]
+                    if obj_name not in all_objects:
+                        all_objects[obj_name] = 0
+                    all_objects[obj_name] += 1
+                    r.update_if_changed("object_" + obj_name, obj_score)
+                for obj_name in all_objects:
+                    r.update_if_changed(
+                        "object_count_" + obj_name, all_objects[obj_name]
+                    )
+                    curr_objects[obj_name] = all_objects[obj_name]
+
+                # set readings to 0 for objects which were not found
+                if self._prev_objects is None:
+                    set_0_readings = {}
+                else:
+                    set_0_readings = set(self._prev_objects) - set(curr_objects)
+                for set_0_reading in set_0_readings:
+                    r.update_if_changed("object_" + set_0_reading, 0)
+                    r.update_if_changed("object_count_" + set_0_reading, 0)
+                r.update_if_changed("objects_detected", ",".join(set(all_objects)))
 
             self._prev_objects = curr_objects
         except Exception:
@@ -396,8 +386,9 @@ class VideoStream:
         return self
 
     async def update_task(self):
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            return await self.loop.run_in_executor(pool, functools.partial(self.update))
+        return await utils.run_blocking(
+            functools.partial(self.update), pool="longrunning"
+        )
 
     def update(self):
         # Keep looping indefinitely until the thread is stopped
@@ -1,7 +1,6 @@
 # lot of parts copied from HomeAssistant, many thanks!
 
 import asyncio
-import concurrent
 import functools
 import inspect
 import json
@@ -14,6 +13,8 @@ from urllib.parse import urlparse
 
 import pkg_resources
 
+from . import utils
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -88,10 +89,9 @@ async def force_update_package(package):
     kwargs = pip_kwargs(None)
     ret = False
     async with pip_lock:
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            ret = await asyncio.get_event_loop().run_in_executor(
-                pool, functools.partial(install_package, package, **kwargs)
-            )
+        ret = await utils.run_blocking(
+            functools.partial(install_package, package, **kwargs)
+        )
     return ret
 
 
@@ -114,15 +114,9 @@ async def check_and_install_dependencies(module):
                         if is_installed(req) is False:
                             inst_tries = 0
                             while inst_tries < 3:
-                                with concurrent.futures.ThreadPoolExecutor() as pool:
-                                    ret = (
-                                        await asyncio.get_event_loop().run_in_executor(
-                                            pool,
-                                            functools.partial(
-                                                install_package, req, **kwargs
-                                            ),
-                                        )
-                                    )
+                                ret = await utils.run_blocking(
+                                    functools.partial(install_package, req, **kwargs)
+                                )
                                 if ret:
                                     break
                                 inst_tries += 1
@@ -259,79 +259,68 @@ class rct_power(generic.FhemModule):
             await asyncio.sleep(self._attr_interval)
 
     async def update_readings(self):
-        await fhem.readingsBeginUpdate(self.hash)
-        try:
-            object_ids = []
-            retrieve_objects = [
-                *self._attr_device_readings,
-                *list(self._attr_device_readings_json),
-            ]
-            if self._attr_default_device_readings == "on":
+        async with fhem.readings(self.hash) as r:
+            try:
+                object_ids = []
                 retrieve_objects = [
-                    *rct_power.DEFAULT_OBJECTS,
-                    *retrieve_objects,
+                    *self._attr_device_readings,
+                    *list(self._attr_device_readings_json),
                 ]
-            for val in retrieve_objects:
-                for object_info in REGISTRY.all():
-                    if object_info.name == val:
-                        object_ids.append(object_info.object_id)
-
-            response = await self.rctclient.async_get_data(object_ids)
-            for object_id in response:
-                if self._attr_error_reading == "on":
-                    await fhem.readingsBulkUpdateIfChanged(
-                        self.hash,
-                        "error",
-                        "",
-                    )
-                # set reading name from attribute config
-                reading = response[object_id].object_name
-                if reading in self._attr_device_readings_json:
-                    reading = self._attr_device_readings_json[reading].get(
-                        "reading", response[object_id].object_name
-                    )
+                if self._attr_default_device_readings == "on":
+                    retrieve_objects = [
+                        *rct_power.DEFAULT_OBJECTS,
+                        *retrieve_objects,
+                    ]
+                for val in retrieve_objects:
+                    for object_info in REGISTRY.all():
+                        if object_info.name == val:
+                            object_ids.append(object_info.object_id)
 
-                if isinstance(response[object_id], ValidApiResponse):
-                    # do factor calculation for float values
-                    value = response[object_id].value
-                    if isinstance(value, float):
-                        factor = self._attr_device_readings_json.get(
-                            response[object_id].object_name, {}
-                        ).get("factor", 1)
-                        value = value * factor
-                        format = self._attr_device_readings_json.get(
-                            response[object_id].object_name, {}
-                        ).get("format", ".2f")
-                        value = f"{value:{format}}"
-
-                    await self.readingsBulkUpdate(
-                        self.hash,
-                        reading,
-                        value,
-                    )
-                else:
+                response = await self.rctclient.async_get_data(object_ids)
+                for object_id in response:
                     if self._attr_error_reading == "on":
-                        await self.readingsBulkUpdate(
-                            self.hash,
-                            "error",
-                            f"{reading} failed with {response[object_id].cause}",
+                        r.update_if_changed("error", "")
+                    # set reading name from attribute config
+                    reading = response[object_id].object_name
+                    if reading in self._attr_device_readings_json:
+                        reading = self._attr_device_readings_json[reading].get(
+                            "reading", response[object_id].object_name
                         )
+
+                    if isinstance(response[object_id], ValidApiResponse):
+                        # do factor calculation for float values
+                        value = response[object_id].value
+                        if isinstance(value, float):
+                            factor = self._attr_device_readings_json.get(
+                                response[object_id].object_name, {}
+                            ).get("factor", 1)
+                            value = value * factor
+                            format = self._attr_device_readings_json.get(
+                                response[object_id].object_name, {}
+                            ).get("format", ".2f")
+                            value = f"{value:{format}}"
+
+                        self.readingsBulkUpdate(r, reading, value)
                     else:
-                        await self.readingsBulkUpdate(
-                            self.hash,
-                            reading,
-                            response[object_id].cause,
-                        )
+                        if self._attr_error_reading == "on":
+                            self.readingsBulkUpdate(
+                                r,
+                                "error",
+                                f"{reading} failed with {response[object_id].cause}",
+                            )
+                        else:
+                            self.readingsBulkUpdate(
+                                r, reading, response[object_id].cause
+                            )
 
-            await fhem.readingsBulkUpdateIfChanged(self.hash, "state", "connected")
+                r.update_if_changed("state", "connected")
 
-        except Exception:
-            await fhem.readingsBulkUpdateIfChanged(hash, "state", "connection error")
-            self.logger.exception("Failed to update_readings")
-        await fhem.readingsEndUpdate(self.hash, 1)
+            except Exception:
+                r.update_if_changed("state", "connection error")
+                self.logger.exception("Failed to update_readings")
 
-    async def readingsBulkUpdate(self, hash, reading, value):
+    def readingsBulkUpdate(self, r, reading, value):
         if self._attr_update_readings == "always":
-            await fhem.readingsBulkUpdate(hash, reading, value)
+            r.update(reading, value)
         else:
-            await fhem.readingsBulkUpdateIfChanged(hash, reading, value)
+            r.update_if_changed(reading, value)
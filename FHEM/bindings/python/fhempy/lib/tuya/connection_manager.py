@@ -0,0 +1,197 @@
+import asyncio
+import random
+import time
+
+from . import pytuya
+
+# reconnect delay: BACKOFF_BASE * 2^(failures-1) +/- 50%, max. BACKOFF_MAX seconds
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+CONNECT_TIMEOUT = 15
+
+
+class TuyaConnection(pytuya.TuyaListener):
+    def __init__(self, device, ip, device_id, local_key, version):
+        self.device = device
+        self.logger = device.logger
+        self.params = (ip, device_id, local_key, version)
+        self.device_id = device_id
+        self.protocol = None
+        self.closed = False
+        self.failures = 0
+        self.slot = 0
+        self.connected = asyncio.Event()
+        self.connect_task = None
+        self.heartbeat_task = None
+        self.stats = {
+            "connects": 0,
+            "connect_failures": 0,
+            "disconnects": 0,
+            "heartbeats": 0,
+            "heartbeat_failures": 0,
+            "last_connect": 0,
+            "next_backoff": 0,
+        }
+
+    def is_connected(self):
+        return self.protocol is not None and self.protocol.transport is not None
+
+    def get_backoff(self):
+        if self.failures == 0:
+            return 0
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+        # jitter prevents all devices from reconnecting at the same time
+        return delay * random.uniform(0.5, 1.5)
+
+    def start_connect(self):
+        if self.closed or (self.connect_task and not self.connect_task.done()):
+            return
+        self.connect_task = asyncio.create_task(self._connect())
+
+    async def _connect(self):
+        (ip, device_id, local_key, version) = self.params
+        while not self.closed:
+            delay = self.get_backoff()
+            self.stats["next_backoff"] = delay
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                self.protocol = await pytuya.connect(
+                    ip,
+                    device_id,
+                    local_key,
+                    version,
+                    self,
+                    timeout=CONNECT_TIMEOUT,
+                    heartbeat=False,
+                )
+            except Exception:
+                if self.failures == 0:
+                    self.logger.exception("Failed to connect to device")
+                self.failures += 1
+                self.stats["connect_failures"] += 1
+                continue
+            self.failures = 0
+            self.stats["connects"] += 1
+            self.stats["last_connect"] = time.time()
+            self.connected.set()
+            return
+
+    async def wait_connected(self):
+        await self.connected.wait()
+
+    def heartbeat(self):
+        if self.heartbeat_task and not self.heartbeat_task.done():
+            return
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def _heartbeat(self):
+        protocol = self.protocol
+        if protocol is None:
+            return
+        try:
+            await protocol.heartbeat()
+            self.stats["heartbeats"] += 1
+        except Exception:
+            self.stats["heartbeat_failures"] += 1
+            self.logger.debug("Heartbeat failed, disconnecting")
+            await protocol.close()
+
+    def on_tick(self):
+        if self.is_connected():
+            self.heartbeat()
+        else:
+            self.start_connect()
+
+    def status_updated(self, status):
+        self.device.status_updated(status)
+
+    def disconnected(self):
+        self.stats["disconnects"] += 1
+        self.protocol = None
+        self.connected.clear()
+        if self.closed:
+            return
+        self.device.disconnected()
+        self.failures = max(self.failures, 1)
+        self.start_connect()
+
+    async def close(self):
+        self.closed = True
+        for task in [self.connect_task, self.heartbeat_task]:
+            if task and not task.done():
+                task.cancel()
+        if self.protocol is not None:
+            protocol = self.protocol
+            self.protocol = None
+            await protocol.close()
+
+
+class TuyaConnectionManager:
+    # one instance for all tuya devices, heartbeats are sent from a single
+    # timer wheel with one slot per second of the heartbeat interval
+
+    instance = None
+
+    @staticmethod
+    def get_instance():
+        if TuyaConnectionManager.instance is None:
+            TuyaConnectionManager.instance = TuyaConnectionManager()
+        return TuyaConnectionManager.instance
+
+    def __init__(self):
+        self.connections = {}
+        self.wheel = [set() for _ in range(pytuya.HEARTBEAT_INTERVAL)]
+        self.wheel_task = None
+        self.tick = 0
+
+    def add_device(self, device, ip, device_id, local_key, version):
+        conn = self.connections.get(device_id)
+        if conn is not None:
+            if conn.device is device and conn.params == (
+                ip,
+                device_id,
+                local_key,
+                version,
+            ):
+                return conn
+            self._remove_connection(conn)
+            asyncio.create_task(conn.close())
+
+        conn = TuyaConnection(device, ip, device_id, local_key, version)
+        # spread heartbeats over all slots
+        conn.slot = min(range(len(self.wheel)), key=lambda i: len(self.wheel[i]))
+        self.wheel[conn.slot].add(conn)
+        self.connections[device_id] = conn
+        conn.start_connect()
+        if self.wheel_task is None or self.wheel_task.done():
+            self.wheel_task = asyncio.create_task(self._wheel_loop())
+        return conn
+
+    def _remove_connection(self, conn):
+        self.wheel[conn.slot].discard(conn)
+        if self.connections.get(conn.device_id) is conn:
+            del self.connections[conn.device_id]
+
+    async def remove_device(self, device_id):
+        conn = self.connections.get(device_id)
+        if conn is None:
+            return
+        self._remove_connection(conn)
+        await conn.close()
+        if len(self.connections) == 0 and self.wheel_task:
+            self.wheel_task.cancel()
+            self.wheel_task = None
+
+    async def _wheel_loop(self):
+        while True:
+            await asyncio.sleep(1)
+            self.tick = (self.tick + 1) % len(self.wheel)
+            for conn in list(self.wheel[self.tick]):
+                conn.on_tick()
+
+    def get_stats(self):
+        stats = {}
+        for device_id, conn in self.connections.items():
+            stats[device_id] = dict(conn.stats, connected=conn.is_connected())
+        return stats
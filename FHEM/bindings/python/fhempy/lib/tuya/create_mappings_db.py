@@ -0,0 +1,49 @@
+# creates mappings.db from ioBroker.tuya lib/schema.json
+# usage: python create_mappings_db.py schema.json [mappings.db]
+
+import json
+import os
+import sqlite3
+import sys
+import zlib
+
+
+def create_db(schemas, db_file):
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE schemas (product_id TEXT PRIMARY KEY, data BLOB NOT NULL)"
+        " WITHOUT ROWID"
+    )
+    for product_id, product in sorted(schemas.items()):
+        product = dict(product)
+        # ioBroker stores schema as JSON string
+        for key in ["schema", "schemaExt"]:
+            if isinstance(product.get(key), str):
+                product[key] = json.loads(product[key])
+        data = json.dumps(product, ensure_ascii=False, separators=(",", ":"))
+        conn.execute(
+            "INSERT INTO schemas VALUES (?, ?)",
+            (product_id, zlib.compress(data.encode("utf-8"), 9)),
+        )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python create_mappings_db.py schema.json [mappings.db]")
+        sys.exit(1)
+    db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mappings.db")
+    if len(sys.argv) > 2:
+        db_file = sys.argv[2]
+    with open(sys.argv[1], encoding="utf-8") as f:
+        schemas = json.load(f)
+    create_db(schemas, db_file)
+    print(f"{len(schemas)} schemas written to {db_file}")
+
+
+if __name__ == "__main__":
+    main()
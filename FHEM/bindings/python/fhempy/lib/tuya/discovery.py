@@ -0,0 +1,169 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+from hashlib import md5
+
+from .. import utils
+from . import pytuya
+
+logger = logging.getLogger(__name__)
+
+# 6666: unencrypted broadcasts (3.1), 6667: encrypted broadcasts (3.3)
+UDP_PORTS = [6666, 6667]
+UDP_KEY = md5(b"yGAdlopoPVldABfn").digest()
+INDEX_FILE = os.path.join(os.getcwd(), ".fhempy", "tuya_devices.json")
+SAVE_DELAY = 60
+
+
+class TuyaDiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, discovery):
+        self.discovery = discovery
+
+    def datagram_received(self, data, addr):
+        self.discovery.handle_broadcast(data)
+
+
+class TuyaDiscovery:
+    # listens continuously for tuya broadcasts and keeps an index
+    # gwId => {"ip", "version", "product_key", "last_seen"}
+
+    instance = None
+
+    @staticmethod
+    def get_instance():
+        if TuyaDiscovery.instance is None:
+            TuyaDiscovery.instance = TuyaDiscovery()
+        return TuyaDiscovery.instance
+
+    def __init__(self):
+        self.devices = {}
+        self.listeners = {}
+        self.transports = []
+        self.cipher = pytuya.AESCipher(UDP_KEY)
+        self.device_found = asyncio.Event()
+        self.start_lock = asyncio.Lock()
+        self.started = False
+        self.save_task = None
+
+    async def start(self):
+        async with self.start_lock:
+            if self.started:
+                return
+            self.started = True
+            devices = await utils.run_blocking(functools.partial(self._load_index))
+            for gwid, device in devices.items():
+                self.devices.setdefault(gwid, device)
+            loop = asyncio.get_running_loop()
+            for port in UDP_PORTS:
+                try:
+                    transport, _ = await loop.create_datagram_endpoint(
+                        lambda: TuyaDiscoveryProtocol(self),
+                        local_addr=("0.0.0.0", port),
+                        reuse_port=True,
+                    )
+                    self.transports.append(transport)
+                except Exception:
+                    logger.exception(f"Failed to listen on UDP port {port}")
+
+    def stop(self):
+        for transport in self.transports:
+            transport.close()
+        self.transports = []
+        self.started = False
+
+    def _load_index(self):
+        try:
+            with open(INDEX_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, devices):
+        try:
+            os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+            with open(INDEX_FILE, "w", encoding="utf-8") as f:
+                json.dump(devices, f)
+        except OSError:
+            logger.exception("Failed to save tuya device index")
+
+    async def _delayed_save(self):
+        await asyncio.sleep(SAVE_DELAY)
+        # changes from now on need a new save
+        self.save_task = None
+        await utils.run_blocking(
+            functools.partial(self._save_index, dict(self.devices))
+        )
+
+    def _schedule_save(self):
+        if self.save_task is None or self.save_task.done():
+            self.save_task = asyncio.create_task(self._delayed_save())
+
+    def decode_broadcast(self, data):
+        payload = pytuya.unpack_message(data).payload
+        if payload.startswith(b"{"):
+            return json.loads(payload)
+        return json.loads(self.cipher.decrypt(payload, False))
+
+    def handle_broadcast(self, data):
+        try:
+            msg = self.decode_broadcast(data)
+            gwid = msg["gwId"]
+            ip = msg["ip"]
+            version = msg["version"]
+        except Exception:
+            logger.debug(f"Failed to decode tuya broadcast: {data}")
+            return
+
+        device = self.devices.get(gwid)
+        changed = device is None or (device["ip"] != ip or device["version"] != version)
+        self.devices[gwid] = {
+            "ip": ip,
+            "version": version,
+            "product_key": msg.get("productKey", ""),
+            "last_seen": time.time(),
+        }
+
+        if changed:
+            self._schedule_save()
+            self.device_found.set()
+            self.device_found.clear()
+
+        listener = self.listeners.get(gwid)
+        if listener is None:
+            return
+        if listener["ip"] == ip and str(listener["version"]) == str(version):
+            return
+        logger.info(
+            f"Tuya device {gwid} changed from {listener['ip']} "
+            f"(version {listener['version']}) to {ip} (version {version})"
+        )
+        listener["ip"] = ip
+        listener["version"] = version
+        listener["callback"](ip, version)
+
+    def get_device(self, gwid):
+        return self.devices.get(gwid)
+
+    def register_listener(self, gwid, ip, version, callback):
+        # callback(ip, version) is called as soon as a broadcast of the device
+        # differs from the configured ip or version
+        self.listeners[gwid] = {"ip": ip, "version": version, "callback": callback}
+
+    def unregister_listener(self, gwid, callback):
+        if gwid in self.listeners and self.listeners[gwid]["callback"] == callback:
+            del self.listeners[gwid]
+
+    async def wait_for_devices(self, gwids, timeout):
+        # wait until all gwids were seen, returns immediately if all are known
+        end = time.time() + timeout
+        while not all(gwid in self.devices for gwid in gwids):
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self.device_found.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
@@ -76,7 +76,12 @@ MESSAGE_HEADER_FMT = ">4I"  # 4*uint32: prefix, seqno, cmd, length
 MESSAGE_RECV_HEADER_FMT = ">5I"  # 4*uint32: prefix, seqno, cmd, length, retcode
 MESSAGE_END_FMT = ">2I"  # 2*uint32: crc, suffix
 
+MESSAGE_HEADER = struct.Struct(MESSAGE_HEADER_FMT)
+MESSAGE_RECV_HEADER = struct.Struct(MESSAGE_RECV_HEADER_FMT)
+MESSAGE_END = struct.Struct(MESSAGE_END_FMT)
+
 PREFIX_VALUE = 0x000055AA
+PREFIX_BYTES = struct.pack(">I", PREFIX_VALUE)
 SUFFIX_VALUE = 0x0000AA55
 
 HEARTBEAT_INTERVAL = 10
@@ -154,32 +159,29 @@ def pack_message(msg):
     """Pack a TuyaMessage into bytes."""
     # Create full message excluding CRC and suffix
     buffer = (
-        struct.pack(
-            MESSAGE_HEADER_FMT,
+        MESSAGE_HEADER.pack(
             PREFIX_VALUE,
             msg.seqno,
             msg.cmd,
-            len(msg.payload) + struct.calcsize(MESSAGE_END_FMT),
+            len(msg.payload) + MESSAGE_END.size,
         )
         + msg.payload
     )
 
     # Calculate CRC, add it together with suffix
-    buffer += struct.pack(MESSAGE_END_FMT, binascii.crc32(buffer), SUFFIX_VALUE)
+    buffer += MESSAGE_END.pack(binascii.crc32(buffer), SUFFIX_VALUE)
 
     return buffer
 
 
 def unpack_message(data):
     """Unpack bytes into a TuyaMessage."""
-    header_len = struct.calcsize(MESSAGE_RECV_HEADER_FMT)
-    end_len = struct.calcsize(MESSAGE_END_FMT)
+    header_len = MESSAGE_RECV_HEADER.size
+    end_len = MESSAGE_END.size
 
-    _, seqno, cmd, _, retcode = struct.unpack(
-        MESSAGE_RECV_HEADER_FMT, data[:header_len]
-    )
+    _, seqno, cmd, _, retcode = MESSAGE_RECV_HEADER.unpack_from(data)
     payload = data[header_len:-end_len]
-    crc, _ = struct.unpack(MESSAGE_END_FMT, data[-end_len:])
+    crc, _ = MESSAGE_END.unpack_from(data, len(data) - end_len)
     return TuyaMessage(seqno, cmd, retcode, payload, crc)
 
 
@@ -224,7 +226,8 @@ class MessageDispatcher(ContextualLogger):
     def __init__(self, dev_id, listener):
         """Initialize a new MessageBuffer."""
         super().__init__()
-        self.buffer = b""
+        self.buffer = bytearray()
+        self.crc_errors = 0
         self.listeners = {}
         self.listener = listener
         self.set_logger(_LOGGER, dev_id)
@@ -257,36 +260,56 @@ class MessageDispatcher(ContextualLogger):
     def add_data(self, data):
         """Add new data to the buffer and try to parse messages."""
         self.buffer += data
-        header_len = struct.calcsize(MESSAGE_RECV_HEADER_FMT)
-
-        while self.buffer:
-            # Check if enough data for measage header
-            if len(self.buffer) < header_len:
-                break
-
-            # Parse header and check if enough data according to length in header
-            _, seqno, cmd, length, retcode = struct.unpack_from(
-                MESSAGE_RECV_HEADER_FMT, self.buffer
-            )
-            if len(self.buffer[header_len - 4 :]) < length:
-                break
-
-            # length includes payload length, retcode, crc and suffix
-            if (retcode & 0xFFFFFF00) != 0:
-                payload_start = header_len - 4
-                payload_length = length - struct.calcsize(MESSAGE_END_FMT)
-            else:
-                payload_start = header_len
-                payload_length = length - 4 - struct.calcsize(MESSAGE_END_FMT)
-            payload = self.buffer[payload_start : payload_start + payload_length]
+        header_len = MESSAGE_RECV_HEADER.size
+        end_len = MESSAGE_END.size
+        # parse all complete messages first and remove them at once from the buffer
+        offset = 0
+        try:
+            while len(self.buffer) - offset >= header_len:
+                # Parse header and check if enough data according to length in header
+                prefix, seqno, cmd, length, retcode = MESSAGE_RECV_HEADER.unpack_from(
+                    self.buffer, offset
+                )
+                if prefix != PREFIX_VALUE:
+                    offset = self._skip_to_prefix(offset)
+                    continue
 
-            crc, _ = struct.unpack_from(
-                MESSAGE_END_FMT,
-                self.buffer[payload_start + payload_length : payload_start + length],
-            )
+                # length includes payload length, retcode, crc and suffix
+                msg_end = offset + header_len - 4 + length
+                if len(self.buffer) < msg_end:
+                    break
 
-            self.buffer = self.buffer[header_len - 4 + length :]
-            self._dispatch(TuyaMessage(seqno, cmd, retcode, payload, crc))
+                if (retcode & 0xFFFFFF00) != 0:
+                    payload_start = offset + header_len - 4
+                    payload_length = length - end_len
+                else:
+                    payload_start = offset + header_len
+                    payload_length = length - 4 - end_len
+
+                crc, _ = MESSAGE_END.unpack_from(self.buffer, msg_end - end_len)
+                with memoryview(self.buffer) as view:
+                    crc_valid = binascii.crc32(view[offset : msg_end - end_len]) == crc
+                    payload = bytes(
+                        view[payload_start : payload_start + payload_length]
+                    )
+                offset = msg_end
+
+                if not crc_valid:
+                    self.crc_errors += 1
+                    self.warning("Dropping message %d with invalid CRC", seqno)
+                    continue
+                self._dispatch(TuyaMessage(seqno, cmd, retcode, payload, crc))
+        finally:
+            del self.buffer[:offset]
+
+    def _skip_to_prefix(self, offset):
+        """Skip invalid data until the next message prefix."""
+        next_prefix = self.buffer.find(PREFIX_BYTES, offset + 1)
+        if next_prefix == -1:
+            # keep bytes which might be the beginning of the next prefix
+            next_prefix = max(offset + 1, len(self.buffer) - len(PREFIX_BYTES) + 1)
+        self.warning("Skipping %d bytes of invalid data", next_prefix - offset)
+        return next_prefix
 
     def _dispatch(self, msg):
         """Dispatch a message to someone that is listening."""
@@ -341,7 +364,15 @@ class EmptyListener(TuyaListener):
 class TuyaProtocol(asyncio.Protocol, ContextualLogger):
     """Implementation of the Tuya protocol."""
 
-    def __init__(self, dev_id, local_key, protocol_version, on_connected, listener):
+    def __init__(
+        self,
+        dev_id,
+        local_key,
+        protocol_version,
+        on_connected,
+        listener,
+        heartbeat=True,
+    ):
         """
         Initialize a new TuyaInterface.
 
@@ -349,6 +380,8 @@ class TuyaProtocol(asyncio.Protocol, ContextualLogger):
             dev_id (str): The device id.
             address (str): The network address.
             local_key (str, optional): The encryption key. Defaults to None.
+            heartbeat (bool): Run own heartbeat loop, disable it if heartbeats
+                are sent by the caller.
 
         Attributes:
             port (int): The port to connect to.
@@ -367,6 +400,7 @@ class TuyaProtocol(asyncio.Protocol, ContextualLogger):
         self.listener = weakref.ref(listener)
         self.dispatcher = self._setup_dispatcher()
         self.on_connected = on_connected
+        self.heartbeat_enabled = heartbeat
         self.heartbeater = None
         self.dps_cache = {}
 
@@ -408,7 +442,8 @@ class TuyaProtocol(asyncio.Protocol, ContextualLogger):
 
         self.transport = transport
         self.on_connected.set_result(True)
-        self.heartbeater = self.loop.create_task(heartbeat_loop())
+        if self.heartbeat_enabled:
+            self.heartbeater = self.loop.create_task(heartbeat_loop())
 
     def data_received(self, data):
         """Received data from device."""
@@ -669,6 +704,7 @@ async def connect(
     listener=None,
     port=6668,
     timeout=5,
+    heartbeat=True,
 ):
     """Connect to a device."""
     loop = asyncio.get_running_loop()
@@ -680,6 +716,7 @@ async def connect(
             protocol_version,
             on_connected,
             listener or EmptyListener(),
+            heartbeat,
         ),
         address,
         port,
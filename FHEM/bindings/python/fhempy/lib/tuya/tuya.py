@@ -4,22 +4,26 @@ import functools
 import json
 import re
 
-from tinytuya import BulbDevice, Cloud, deviceScan
+from tinytuya import BulbDevice, Cloud
 
 from .. import fhem, generic, utils
 from . import mappings, pytuya
+from .connection_manager import TuyaConnectionManager
+from .discovery import TuyaDiscovery
 
 
 class tuya(generic.FhemModule, pytuya.TuyaListener):
     def __init__(self, logger):
         super().__init__(logger)
-        self._connected_device = None
+        self._connection = None
         self.tuya_cloud = None
         self.tt_key = ""
         self.tt_secret = ""
+        self.tt_did = ""
         self.last_status = None
         self.create_device_list = []
         self.update_lock = asyncio.Lock()
+        self.dp_decoders = {}
 
     # FHEM FUNCTION
     async def Define(self, hash, args, argsh):
@@ -73,6 +77,12 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
 
         # set internal
         hash["DEVICEID"] = self.tt_did
+        # reconnect immediately if the device gets a new IP or version
+        discovery = TuyaDiscovery.get_instance()
+        discovery.register_listener(
+            self.tt_did, self.tt_ip, self.tt_version, self.ip_changed
+        )
+        self.create_async_task(discovery.start())
         # set attributes
         self.attr_config = {
             "tuya_spec_functions": {"default": ""},
@@ -103,7 +113,7 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
     async def _create_mapping_dev(self):
         self.tuya_spec_functions = []
         self.tuya_spec_status = []
-        schema = mappings.knownSchemas[self.tt_type]["schema"]
+        schema = mappings.get_schema(self.tt_type)["schema"]
         for schema_part in schema:
             # rename to values
             schema_part["values"] = schema_part["property"]
@@ -147,7 +157,37 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
 
         await self._generate_set()
 
+    def _create_decoder(self, spec):
+        if spec["type"] == "Integer" and "scale" in spec["values"]:
+            divisor = 10 ** spec["values"]["scale"]
+            return lambda value: value / divisor
+        elif spec["type"] == "Boolean":
+            return lambda value: "on" if value is True else "off"
+        elif spec["type"] == "Json":
+            return functools.partial(self.convert_json, schema=spec)
+        return functools.partial(self.convert, schema=spec)
+
+    def _build_dp_decoders(self):
+        # dp_id => (reading, is_json, decoder)
+        dp_decoders = {}
+        for spec in self.tuya_spec_status:
+            if "dp_id" not in spec:
+                continue
+            dp = str(int(spec["dp_id"]))
+            if dp in dp_decoders:
+                continue
+            reading = spec["code"]
+            if reading == "switch_1":
+                reading = "state"
+            dp_decoders[dp] = (
+                reading,
+                spec["type"] == "Json",
+                self._create_decoder(spec),
+            )
+        self.dp_decoders = dp_decoders
+
     async def _generate_set(self):
+        self._build_dp_decoders()
         set_conf = {}
         for fct in self.tuya_spec_functions:
             if "id" not in fct:
@@ -380,6 +420,7 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
         await self.check_tuya_attributes()
         if len(self.tuya_spec_functions) == 0 and len(self.tuya_spec_status) == 0:
             await self.retrieve_tuya_specs()
+        self._build_dp_decoders()
 
         # create attributes dp_1...X
         # add options to attributes to select cloud codes
@@ -437,41 +478,26 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
                         )
         await self.set_attr_dp(self.hash)
 
-    async def connection_check_loop(self):
-        while True:
-            await asyncio.sleep(60)
-            if self._connected_device and self._connected_device.transport is None:
-                await self.setup_connection()
+    @property
+    def _connected_device(self):
+        if self._connection is None:
+            return None
+        return self._connection.protocol
 
     async def setup_connection(self):
-        state_set = False
-        while True:
-            try:
-                self._connected_device = await pytuya.connect(
-                    self.tt_ip,
-                    self.tt_did,
-                    self.tt_localkey,
-                    self.tt_version,
-                    self,
-                    timeout=15,
-                )
-                self.create_async_task(self.connection_check_loop())
-                break
-            except Exception:
-                if not state_set:
-                    await fhem.readingsSingleUpdateIfChanged(
-                        self.hash, "online", "0", 1
-                    )
-                    state_set = True
-                    self.logger.exception("Failed to connect to device")
-                # short sleep is required for passive devices
-                await asyncio.sleep(1)
+        # connection, heartbeat and reconnect are handled by the connection manager
+        self._connection = TuyaConnectionManager.get_instance().add_device(
+            self, self.tt_ip, self.tt_did, self.tt_localkey, self.tt_version
+        )
+        await self._connection.wait_connected()
 
     async def create_device(self):
         try:
             if self.tt_key != "" and self.tt_secret != "":
                 await self._create_cloudmapping_dev()
-            elif self.tt_type in mappings.knownSchemas:
+            elif await utils.run_blocking(
+                functools.partial(mappings.has_schema, self.tt_type)
+            ):
                 await self._create_mapping_dev()
             else:
                 await fhem.readingsSingleUpdateIfChanged(
@@ -482,9 +508,15 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
 
     async def async_disconnected(self):
         await fhem.readingsSingleUpdate(self.hash, "online", "0", 1)
-        self._connected_device = None
-        await asyncio.sleep(5)
-        await self.setup_connection()
+
+    def ip_changed(self, ip, version):
+        self.tt_ip = ip
+        try:
+            self.tt_version = float(version)
+        except ValueError:
+            self.logger.error(f"Unknown protocol version {version}")
+        if self._connection is not None:
+            self.create_async_task(self.setup_connection())
 
     def convert(self, value, schema):
         if schema["type"] == "Integer":
@@ -556,58 +588,37 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
 
     async def update_readings(self, status):
         state_set = False
-        await fhem.readingsBeginUpdate(self.hash)
-        try:
-            stateused = False
-            for dp in status:
-                found = False
-                for st in self.tuya_spec_status:
-                    if "dp_id" in st and st["dp_id"] == int(dp):
-                        found = True
-                        reading = st["code"]
-                        if st["code"] == "switch_1":
-                            reading = "state"
-                            stateused = True
-                        self.logger.debug(
-                            f"handle type {st['type']} for dp_id "
-                            f"{st['dp_id']} with value {status[dp]}"
-                        )
-                        if st["type"] == "Json":
-                            flat_json = self.convert_json(status[dp], st)
-                            for name in flat_json:
-                                await fhem.readingsBulkUpdateIfChanged(
-                                    self.hash,
-                                    reading + "_" + name,
-                                    flat_json[name],
-                                )
-                        else:
-                            if reading == "state":
-                                state_set = True
-                            await fhem.readingsBulkUpdateIfChanged(
-                                self.hash,
-                                reading,
-                                self.convert(status[dp], st),
-                            )
-                        break
-
-                if not found:
-                    await fhem.readingsBulkUpdateIfChanged(
-                        self.hash,
-                        f"dp_{int(dp):02d}",
-                        status[dp],
-                    )
-            if not stateused:
-                await fhem.readingsBulkUpdateIfChanged(self.hash, "online", "1")
-            if not state_set:
-                await fhem.readingsSingleUpdate(self.hash, "state", "ready", 1)
-        except Exception:
-            self.logger.exception("Failed to update readings")
-        await fhem.readingsEndUpdate(self.hash, 1)
+        async with fhem.readings(self.hash) as r:
+            try:
+                stateused = False
+                for dp, value in status.items():
+                    decoder = self.dp_decoders.get(str(dp))
+                    if decoder is None:
+                        r.update_if_changed(f"dp_{int(dp):02d}", value)
+                        continue
+                    (reading, is_json, decode) = decoder
+                    if reading == "state":
+                        stateused = True
+                    if is_json:
+                        flat_json = decode(value)
+                        for name in flat_json:
+                            r.update_if_changed(reading + "_" + name, flat_json[name])
+                    else:
+                        if reading == "state":
+                            state_set = True
+                        r.update_if_changed(reading, decode(value))
+                if not stateused:
+                    r.update_if_changed("online", "1")
+                if not state_set:
+                    r.update("state", "ready")
+            except Exception:
+                self.logger.exception("Failed to update readings")
 
     async def Undefine(self, hash):
-        if self._connected_device:
-            await self._connected_device.close()
-            self._connected_device = None
+        TuyaDiscovery.get_instance().unregister_listener(self.tt_did, self.ip_changed)
+        if self._connection:
+            await TuyaConnectionManager.get_instance().remove_device(self.tt_did)
+            self._connection = None
         await super().Undefine(hash)
 
     # The following code is only for setup/scan process via tuya cloud
@@ -662,15 +673,17 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
             1,
         )
 
-        # scan local devices to get IP
+        # get IPs from tuya broadcasts, wait only for devices not seen yet
         self.logger.debug("Scan local devices...")
-        devices = await utils.run_blocking(functools.partial(deviceScan, False, 20))
+        discovery = TuyaDiscovery.get_instance()
+        await discovery.start()
+        await discovery.wait_for_devices([i["id"] for i in tuyadevices], 20)
 
-        def getIP(d, gwid):
-            for ip in d:
-                if gwid == d[ip]["gwId"]:
-                    return (ip, d[ip]["version"])
-            return (0, 0)
+        def getIP(gwid):
+            device = discovery.get_device(gwid)
+            if device is None:
+                return (0, 0)
+            return (device["ip"], device["version"])
 
         self.logger.debug("Polling local devices...")
         count_found = 0
@@ -678,7 +691,7 @@ class tuya(generic.FhemModule, pytuya.TuyaListener):
         for i in tuyadevices:
             name = i["name"]
             id = i["id"]
-            (ip, ver) = getIP(devices, i["id"])
+            (ip, ver) = getIP(i["id"])
             local_key = i["key"]
             productid = i["product_id"]
 
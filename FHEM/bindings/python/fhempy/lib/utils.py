@@ -1,6 +1,5 @@
 import asyncio
 import binascii
-import concurrent.futures
 import json
 import socket
 from base64 import urlsafe_b64decode, urlsafe_b64encode
@@ -13,6 +12,7 @@ from Cryptodome.Hash import HMAC, SHA256
 from Cryptodome.Util.Padding import unpad
 
 from . import fhem
+from .core import executor
 
 
 def encrypt_string(plain_text, fhem_unique_id):
@@ -54,16 +54,45 @@ def decrypt_fernet(token_b64, key_str):
     return message
 
 
-async def run_blocking(function):
+# pool: io, cpu, ble, longrunning or process (see core/executor.py)
+async def run_blocking(function, pool="io"):
     if isinstance(function, partial) is False:
         raise Exception("Use functools.partial to call run_blocking")
 
-    with concurrent.futures.ThreadPoolExecutor() as pool:
-        return await asyncio.get_event_loop().run_in_executor(pool, function)
+    return await executor.run(function, pool)
 
 
-def run_blocking_task(function):
-    return asyncio.create_task(run_blocking(function))
+def run_blocking_task(function, pool="io"):
+    return asyncio.create_task(run_blocking(function, pool))
+
+
+html_parser = None
+
+
+def get_html_parser():
+    # lxml is much faster than html.parser, use it if installed
+    global html_parser
+    if html_parser is None:
+        try:
+            import lxml  # noqa: F401
+
+            html_parser = "lxml"
+        except ImportError:
+            html_parser = "html.parser"
+    return html_parser
+
+
+def _parse_html(html, function, parse_only):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, get_html_parser(), parse_only=parse_only)
+    return function(soup)
+
+
+# parse html and call function(soup) in the executor, returns the result of
+# function. parse_only (bs4.SoupStrainer) builds only the needed elements.
+async def parse_html(html, function, parse_only=None, pool="cpu"):
+    return await executor.run(partial(_parse_html, html, function, parse_only), pool)
 
 
 # example config
@@ -129,10 +158,14 @@ async def handle_define_attr(attr_list, obj, hash):
         else:
             attr_opt = attr
         add_to_list.append(attr_opt)
-    await fhem.setDevAttrList(hash["NAME"], " ".join(add_to_list))
+    # set attribute list and read all attributes without waiting in between
+    _, attr_values = await asyncio.gather(
+        fhem.setDevAttrList(hash["NAME"], " ".join(add_to_list)),
+        fhem.AttrValMany(hash["NAME"], {attr: "" for attr in attr_list}),
+    )
 
     for attr in attr_list:
-        curr_val = await fhem.AttrVal(hash["NAME"], attr, "")
+        curr_val = attr_values[attr]
         if curr_val == "" and "default" in attr_list[attr]:
             curr_val = attr_list[attr]["default"]
         setattr(obj, "_attr_" + attr, convert2format(curr_val, attr_list[attr]))
@@ -1,9 +1,7 @@
 import asyncio
 
-import aiohttp
-from bs4 import BeautifulSoup
-
-from .. import fhem, generic
+from .. import fhem, generic, utils
+from ..core import http_client
 
 
 class volvo_software_update(generic.FhemModule):
@@ -46,7 +44,7 @@ class volvo_software_update(generic.FhemModule):
                 "User-Agent": "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
             }
             try:
-                async with aiohttp.ClientSession(headers=headers) as session:
+                async with http_client.create_session(headers=headers) as session:
                     async with session.get(self.update_url) as resp:
                         if resp.status == 200:
                             await self.handle_response(await resp.text())
@@ -65,34 +63,42 @@ class volvo_software_update(generic.FhemModule):
                 self.logger.exception("Failed to update")
             await asyncio.sleep(self._attr_interval)
 
-    async def handle_response(self, response):
-        # bs4
-        soup = BeautifulSoup(response, "html.parser")
+    def extract_release(self, soup):
         entries = soup.findAll("div", {"class": "segment"})
         for entry in entries:
             if entry.find("h2"):
-                await fhem.readingsBeginUpdate(self.hash)
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "latest_release_notes", f"<html>{entry}</html>"
-                )
-                release_text = entry.find("h2").text
+                return {
+                    "notes": f"<html>{entry}</html>",
+                    "text": entry.find("h2").text,
+                    "latest_update": soup.findAll("em")[-1].text,
+                }
+        return None
+
+    async def handle_response(self, response):
+        release = await utils.parse_html(response, self.extract_release)
+        if release is None:
+            return
+
+        await fhem.readingsBeginUpdate(self.hash)
+        await fhem.readingsBulkUpdateIfChanged(
+            self.hash, "latest_release_notes", release["notes"]
+        )
+        release_text = release["text"]
 
-                if release_text.find(" V") > 0:
-                    release_number = release_text[release_text.find(" V") + 2 :]
-                    state_text = "Version "
-                else:
-                    release_number = release_text
-                    state_text = ""
+        if release_text.find(" V") > 0:
+            release_number = release_text[release_text.find(" V") + 2 :]
+            state_text = "Version "
+        else:
+            release_number = release_text
+            state_text = ""
 
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "latest_release", release_number
-                )
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "state", f"{state_text}{release_number}"
-                )
-                latest_update = soup.findAll("em")[-1].text
-                await fhem.readingsBulkUpdateIfChanged(
-                    self.hash, "latest_update", latest_update
-                )
-                await fhem.readingsEndUpdate(self.hash, 1)
-                break
+        await fhem.readingsBulkUpdateIfChanged(
+            self.hash, "latest_release", release_number
+        )
+        await fhem.readingsBulkUpdateIfChanged(
+            self.hash, "state", f"{state_text}{release_number}"
+        )
+        await fhem.readingsBulkUpdateIfChanged(
+            self.hash, "latest_update", release["latest_update"]
+        )
+        await fhem.readingsEndUpdate(self.hash, 1)
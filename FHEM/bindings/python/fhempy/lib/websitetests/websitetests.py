@@ -1,9 +1,8 @@
 import asyncio
 import time
 
-import aiohttp
-
 from .. import fhem, generic
+from ..core import http_client
 
 
 class websitetests(generic.FhemModule):
@@ -70,7 +69,7 @@ class websitetests(generic.FhemModule):
             status = 0
             response_contains = -1
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_client.create_session() as session:
                     async with session.get(
                         self.update_url, headers=self._attr_headers
                     ) as resp:
@@ -457,20 +457,28 @@ def parse_xiaomi_ble(event: dict, pdid: int) -> Optional[dict]:
     return None
 
 
+# pdid => DEVICES item, the first item wins if a pdid is listed twice
+MODELS = {}
+for _device in DEVICES:
+    for _pdid in _device:
+        if _pdid != "miot_spec":
+            MODELS.setdefault(_pdid, _device)
+
+
 def get_device(pdid: int, default_name: str) -> Optional[dict]:
-    for device in DEVICES:
-        if pdid in device:
-            desc = device[pdid]
-            return {
-                "device_manufacturer": desc[0],
-                "device_name": desc[0] + " " + desc[1],
-                "device_model": desc[2] if len(desc) > 2 else str(pdid),
-                "lumi_spec": None,
-                "miot_spec": device.get("miot_spec"),
-                # if color temp not default 2700..6500
-                "color_temp": COLOR_TEMP.get(pdid),
-                "max_brightness": MAX_BRIGHTNESS.get(pdid),
-            }
+    device = MODELS.get(pdid)
+    if device is not None:
+        desc = device[pdid]
+        return {
+            "device_manufacturer": desc[0],
+            "device_name": desc[0] + " " + desc[1],
+            "device_model": desc[2] if len(desc) > 2 else str(pdid),
+            "lumi_spec": None,
+            "miot_spec": device.get("miot_spec"),
+            # if color temp not default 2700..6500
+            "color_temp": COLOR_TEMP.get(pdid),
+            "max_brightness": MAX_BRIGHTNESS.get(pdid),
+        }
 
     return (
         {
@@ -13,13 +13,14 @@ import yaml
 from . import bluetooth, shell, utils, zigbee
 from .helpers import DevicesRegistry
 from .mini_miio import AsyncMiIO
-from .mini_mqtt import MiniMQTT, MQTTMessage
+from .mini_mqtt import MiniMQTT, MQTTMessage, TopicRouter
 from .unqlite import SQLite
 
 _LOGGER = logging.getLogger(__name__)
 
 RE_NWK_KEY = re.compile(r"lumi send-nwk-key (0x.+?) {(.+?)}")
 RE_SERIAL = re.compile(r"(tx|rx|oe|fe|brk):(\d+)")
+RE_DID = re.compile(rb'"did":\s*"([^"]+)"')
 
 TELNET_CMD = '{"method":"enable_telnet_service","params":""}'
 
@@ -377,15 +378,7 @@ class GatewayBLE(GatewayStats):
     async def process_ble_event_fix(self, data: dict):
         self.debug(f"Process BLE Fix {data}")
 
-        device = next(
-            (
-                device
-                for device in self.devices.values()
-                if device["did"] == data["did"]
-            ),
-            None,
-        )
-
+        device = self.dids.get(data["did"])
         if not device:
             self.debug(f"Unregistered BLE device {data}")
             return
@@ -537,6 +530,17 @@ class GatewayEntry(GatewayNetwork):
 
         self.setups = {}
 
+        self.router = TopicRouter()
+        self.router.add("zigbee/send", self.on_zigbee_send)
+        self.router.add("log/miio", self.on_miio_log)
+        self.router.add("log/ble", self.on_ble_log)
+        self.router.add("log/z3", self.on_z3_log)
+        self.router.add("gw/+/heartbeat", self.on_heartbeat)
+        self.router.add("gw/+/MessageReceived", self.on_zb_stats)
+        self.router.add("gw/+/devicestatechange", self.on_zb_stats)
+        self.router.add("gw/+/commands", self.on_commands)
+        self.router.add("ble/+", self.on_ble_retain)
+
     @property
     def ble_mode(self):
         return self.options.get("ble", True)
@@ -599,7 +603,10 @@ class GatewayEntry(GatewayNetwork):
     async def on_connect(self):
         self.debug("MQTT connected")
 
-        await self.mqtt.subscribe("#")
+        if "mqtt" in self.debug_mode:
+            await self.mqtt.subscribe("#")
+        else:
+            await self.mqtt.subscribe(*self.router.filters)
 
         self.available = True
         self.parent_scan_ts = int(self.stats_enable and not self.zha_mode)
@@ -615,59 +622,75 @@ class GatewayEntry(GatewayNetwork):
 
     async def on_message(self, msg: MQTTMessage):
         try:
-            topic = msg.topic
-
-            if topic == "broker/ping":
-                return
-
             if "mqtt" in self.debug_mode:
-                _LOGGER.debug(f"{self.host} | MQTT | {topic} {msg.payload}")
-
-            if topic == "zigbee/send":
-                await self.process_zigbee_message(msg.json)
-
-            elif topic == "log/miio":
-                # don't need to process another data
-                if b"ot_agent_recv_handler_one" not in msg.payload:
-                    return
-
-                for raw in utils.extract_jsons(msg.payload):
-                    if self.ble_mode and b"_async.ble_event" in raw:
-                        data = json.loads(raw)["params"]
-                        await self.process_ble_event(data)
-                    elif self.ble_mode and b"properties_changed" in raw:
-                        data = json.loads(raw)["params"]
-                        self.debug(f"Process props {data}")
-                        await self.process_mesh_data(data)
-                    elif b"event.gw.heartbeat" in raw:
-                        payload = json.loads(raw)["params"][0]
-                        await self.process_gw_stats(payload)
-                        # time offset may changed right after gw.heartbeat
-                        await self.update_time_offset()
-                        await self.update_serial_stats()
-
-            elif topic == "log/ble":
-                await self.process_ble_event_fix(msg.json)
-
-            elif topic == "log/z3":
-                await self.process_z3(msg.text)
-
-            elif topic.endswith("/heartbeat"):
-                await self.process_gw_stats(msg.json)
-
-            elif topic.endswith(("/MessageReceived", "/devicestatechange")):
-                await self.process_zb_stats(msg.json)
-
-            # read only retained ble
-            elif topic.startswith("ble") and msg.retain:
-                await self.process_ble_retain(topic[4:], msg.json)
-
-            elif self.pair_model and topic.endswith("/commands"):
-                await self.process_pair(msg.payload)
+                _LOGGER.debug(f"{self.host} | MQTT | {msg.topic} {msg.payload}")
+
+            for handler in self.router.match(msg.topic):
+                await handler(msg)
 
         except:
             _LOGGER.exception(f"Processing MQTT: {msg.topic} {msg.payload}")
 
+    def is_known_did(self, payload: bytes) -> bool:
+        # check dids before decoding JSON, messages without did are processed
+        dids = RE_DID.findall(payload)
+        return not dids or any(self.is_fhem_did(did.decode()) for did in dids)
+
+    def is_fhem_did(self, did: str) -> bool:
+        if did == "lumi.0" or did in self.fhem_dids:
+            return True
+        # let devices without FHEM device through, their setup defines it
+        device = self.dids.get(did)
+        return device is not None and "main" not in device["entities"]
+
+    async def on_zigbee_send(self, msg: MQTTMessage):
+        if self.is_known_did(msg.payload):
+            await self.process_zigbee_message(msg.json)
+
+    async def on_miio_log(self, msg: MQTTMessage):
+        # don't need to process another data
+        if b"ot_agent_recv_handler_one" not in msg.payload:
+            return
+
+        for raw in utils.extract_jsons(msg.payload):
+            if self.ble_mode and b"_async.ble_event" in raw:
+                data = json.loads(raw)["params"]
+                await self.process_ble_event(data)
+            elif self.ble_mode and b"properties_changed" in raw:
+                data = json.loads(raw)["params"]
+                self.debug(f"Process props {data}")
+                await self.process_mesh_data(data)
+            elif b"event.gw.heartbeat" in raw:
+                payload = json.loads(raw)["params"][0]
+                await self.process_gw_stats(payload)
+                # time offset may changed right after gw.heartbeat
+                await self.update_time_offset()
+                await self.update_serial_stats()
+
+    async def on_ble_log(self, msg: MQTTMessage):
+        if self.is_known_did(msg.payload):
+            await self.process_ble_event_fix(msg.json)
+        else:
+            self.debug(f"Unregistered BLE device {msg.payload}")
+
+    async def on_z3_log(self, msg: MQTTMessage):
+        await self.process_z3(msg.text)
+
+    async def on_heartbeat(self, msg: MQTTMessage):
+        await self.process_gw_stats(msg.json)
+
+    async def on_zb_stats(self, msg: MQTTMessage):
+        await self.process_zb_stats(msg.json)
+
+    async def on_commands(self, msg: MQTTMessage):
+        if self.pair_model:
+            await self.process_pair(msg.payload)
+
+    async def on_ble_retain(self, msg: MQTTMessage):
+        # read only retained ble
+        if msg.retain:
+            await self.process_ble_retain(msg.topic[4:], msg.json)
+
     async def on_disconnect(self):
         self.debug("MQTT disconnected")
 
@@ -946,6 +969,8 @@ class GatewayEntry(GatewayNetwork):
             self.debug(f"Setup {type_} device {device}")
 
             device = self.find_or_create_device(device)
+            if type_ in ("gateway", "zigbee"):
+                device["decoders"] = zigbee.compile_decoders(device)
 
             if type_ == "gateway":
                 self.did = device["did"]
@@ -993,6 +1018,10 @@ class GatewayEntry(GatewayNetwork):
         device = self.devices[did]
         payload = {}
 
+        decoders = device.get("decoders")
+        if decoders is None:
+            decoders = device["decoders"] = zigbee.compile_decoders(device)
+
         # convert codes to names
         for param in data[pkey]:
             if param.get("error_code", 0) != 0:
@@ -1008,49 +1037,16 @@ class GatewayEntry(GatewayNetwork):
                 _LOGGER.warning(f"Unsupported param: {data}")
                 return
 
-            if prop in zigbee.GLOBAL_PROP:
-                prop = zigbee.GLOBAL_PROP[prop]
-            else:
-                prop = next(
-                    (
-                        p[2]
-                        for p in (device["lumi_spec"] or device["miot_spec"])
-                        if p[0] == prop
-                    ),
-                    prop,
-                )
+            prop, convert = decoders.get(prop) or (prop, None)
 
-            # https://github.com/Koenkk/zigbee2mqtt/issues/798
-            # https://www.maero.dk/aqara-temperature-humidity-pressure-sensor-teardown/
-            if prop == "temperature" and device["model"] != "lumi.airmonitor.acn01":
-                if -4000 < param["value"] < 12500:
-                    payload[prop] = param["value"] / 100.0
-            elif prop == "humidity" and device["model"] != "lumi.airmonitor.acn01":
-                if 0 <= param["value"] <= 10000:
-                    payload[prop] = param["value"] / 100.0
-            elif prop == "pressure":
-                payload[prop] = param["value"] / 100.0
-            elif prop == "battery":
-                # I do not know if the formula is correct, so battery is more
-                # important than voltage
-                payload[prop] = zigbee.fix_xiaomi_battery(param["value"])
+            if convert is not None and "value" in param:
+                value = convert(param["value"])
+                if value is not zigbee.SKIP:
+                    payload[prop] = value
             elif prop == "alive" and param["value"]["status"] == "offline":
                 device["online"] = False
             elif prop in ("parent", "reset_cnt") and device.get("stats"):
                 await device["stats"].async_update({prop: param["value"]})
-            elif prop == "angle":
-                # xiaomi cube 100 points = 360 degrees
-                payload[prop] = param["value"] * 4
-            elif prop == "duration":
-                # xiaomi cube
-                payload[prop] = param["value"] / 1000.0
-            elif prop in ("consumption", "power"):
-                payload[prop] = round(param["value"], 2)
-            elif prop in ("voltage", "current"):
-                payload[prop] = round(param["value"] / 1000.0, 2)
-            elif prop == "energy":
-                # energy consumption Wh to kWh
-                payload[prop] = round(param["value"] / 1000.0, 3)
             elif prop == "fw_ver" and param["value"] != device["fw_ver"]:
                 device["fw_ver"] = param["value"]
                 self.update_device_fw_ver(device, param["value"])
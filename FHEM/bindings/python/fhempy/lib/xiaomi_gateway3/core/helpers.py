@@ -1,11 +1,14 @@
 import logging
 from dataclasses import dataclass, field
-from typing import *
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Set
 
 from .utils import DOMAIN
 
 from . import bluetooth, zigbee
 
+if TYPE_CHECKING:
+    from .gateway3 import GatewayEntry
+
 CONNECTION_NETWORK_MAC = "mac"
 
 _LOGGER = logging.getLogger(__name__)
@@ -32,7 +35,7 @@ class XiaomiDevice:
     # all device entities except stats
     entities: Dict[str, "XiaomiEntity"] = field(default_factory=dict)
 
-    gateways: List["Gateway3"] = field(default_factory=list)
+    gateways: List["GatewayEntry"] = field(default_factory=list)
 
 
 class DevicesRegistry:
@@ -44,7 +47,11 @@ class DevicesRegistry:
     """
 
     devices: Dict[str, dict] = {}
+    # same devices by Xiaomi did, BLE devices are stored by mac in devices
+    dids: Dict[str, dict] = {}
     setups: Dict[str, Callable] = None
+    # dids of devices defined in FHEM
+    fhem_dids: Set[str] = set()
 
     defaults: Dict[str, dict] = {}
 
@@ -71,6 +78,12 @@ class DevicesRegistry:
     def remove_entity(self, fhem_dev):
         fhem_dev.device["entities"].pop("main")
 
+    def add_device(self, did: str):
+        self.fhem_dids.add(did)
+
+    def remove_device(self, did: str):
+        self.fhem_dids.discard(did)
+
     def add_stats(self, device: dict):
         if "stats" in device:
             return
@@ -92,6 +105,8 @@ class DevicesRegistry:
             return self.devices[did]
 
         self.devices[did] = device
+        if device.get("did"):
+            self.dids[device["did"]] = device
 
         # update device with specs
         if type_ in ("gateway", "zigbee"):
@@ -122,7 +137,7 @@ class XiaomiEntity:
     _ignore_offline = None
     _state = None
 
-    def __init__(self, gateway: "Gateway3", device: dict, attr: str):
+    def __init__(self, gateway: "GatewayEntry", device: dict, attr: str):
         self.gw = gateway
         self.device = device
 
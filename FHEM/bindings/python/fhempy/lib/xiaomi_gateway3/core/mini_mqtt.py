@@ -5,6 +5,7 @@ import asyncio
 import json
 import random
 from asyncio import StreamReader, StreamWriter
+from collections import deque
 from typing import Optional
 
 CONNECT = 1
@@ -17,6 +18,8 @@ PINGREQ = 12
 PINGRESP = 13
 DISCONNECT = 14
 
+READ_SIZE = 65536
+
 
 class MQTTMessage:
     type: int
@@ -49,8 +52,9 @@ class RawMessage:
         return len(self.raw)
 
     def read(self, length: int) -> bytes:
-        self.pos += length
-        return self.raw[self.pos - length : self.pos]
+        (start, end) = (self.pos, self.pos + length)
+        self.pos = end
+        return self.raw[start:end]
 
     def read_int(self, length: int) -> int:
         return int.from_bytes(self.read(length), "big")
@@ -126,6 +130,10 @@ class RawMessage:
         msg.write_header(PUBLISH, qos=0, retain=retain)
         return msg.raw
 
+    @staticmethod
+    def puback(msg_id: int):
+        return bytes([PUBACK << 4, 2]) + msg_id.to_bytes(2, "big")
+
     @staticmethod
     def ping():
         # adds zero length after header
@@ -137,6 +145,38 @@ class RawMessage:
         return (DISCONNECT << 4).to_bytes(2, "little")
 
 
+class TopicRouter:
+    """Topic tree with handlers, filters support `+` and `#` wildcards."""
+
+    def __init__(self):
+        self.root = {}
+        self.filters = []
+
+    def add(self, topic_filter: str, handler):
+        node = self.root
+        for level in topic_filter.split("/"):
+            node = node.setdefault(level, {})
+        # None can't be a topic level, so it is used as key for the handlers
+        node.setdefault(None, []).append(handler)
+        if topic_filter not in self.filters:
+            self.filters.append(topic_filter)
+
+    def match(self, topic: str) -> list:
+        handlers = []
+        self._match(self.root, topic.split("/"), 0, handlers)
+        return handlers
+
+    def _match(self, node: dict, levels: list, i: int, handlers: list):
+        if "#" in node:
+            handlers += node["#"][None]
+        if i == len(levels):
+            handlers += node.get(None, [])
+            return
+        for level in (levels[i], "+"):
+            if level in node:
+                self._match(node[level], levels, i + 1, handlers)
+
+
 class MiniMQTT:
     msg_id: int = None
     reader: StreamReader = None
@@ -145,18 +185,14 @@ class MiniMQTT:
     def __init__(self, keepalive=15, timeout=5):
         self.keepalive = keepalive
         self.timeout = timeout
-
-    async def read_varlen(self) -> int:
-        var = 0
-        for i in range(4):
-            b = await self.reader.read(1)
-            var += (b[0] & 0x7F) << (7 * i)
-            if (b[0] & 0x80) == 0:
-                break
-        return var
+        # received data, parsed messages are removed after each read
+        self.buffer = bytearray()
+        self.messages = deque()
 
     async def _connect(self, host: str):
         self.reader, self.writer = await asyncio.open_connection(host, 1883)
+        self.buffer = bytearray()
+        self.messages = deque()
 
         msg = RawMessage.connect()
         self.writer.write(msg)
@@ -180,9 +216,11 @@ class MiniMQTT:
         self.writer.write(msg)
         await self.writer.drain()
 
-    async def subscribe(self, topic: str):
+    async def subscribe(self, *topics: str, qos=0):
+        # QoS 2 handshake (PUBREC, PUBREL, PUBCOMP) is not supported
+        assert qos <= 1
         self.msg_id += 1
-        msg = RawMessage.subscribe(self.msg_id, topic)
+        msg = RawMessage.subscribe(self.msg_id, *topics, qos=qos)
         self.writer.write(msg)
         await self.writer.drain()
 
@@ -198,37 +236,83 @@ class MiniMQTT:
         await self.writer.drain()
 
     async def read(self) -> Optional[MQTTMessage]:
-        raw = await self.reader.read(1)
-        if raw == b"":
-            # disconnected
-            return None
-
-        msg = RawMessage.read_header(raw[0])
-        if msg.type == PUBLISH:
-            varlen = await self.read_varlen()
-            raw = await self.reader.readexactly(varlen)
+        while not self.messages:
+            raw = await self.reader.read(READ_SIZE)
+            if raw == b"":
+                # disconnected
+                return None
+            self.buffer += raw
+            self.parse_buffer()
+
+        return self.messages.popleft()
+
+    def parse_buffer(self):
+        """Parse all complete packets from the buffer."""
+        buf = self.buffer
+        pos = 0
+        try:
+            while len(buf) - pos >= 2:
+                header = self.read_remaining_length(buf, pos)
+                if header is None:
+                    return
 
-            pr = RawMessage(raw)
-            msg.topic = pr.read_str()
+                (varlen, i) = header
+                end = i + varlen
+                if end > len(buf):
+                    return
 
-            if msg.qos > 0:
-                _ = pr.read_int(2)  # msg ID
-                raise NotImplementedError
+                msg = RawMessage.read_header(buf[pos])
+                pos = end
 
-            msg.payload = pr.read_all()
+                parser = self.PARSERS.get(msg.type)
+                if parser is None:
+                    raise NotImplementedError
+                parser(self, msg, buf, i, end)
 
-        elif msg.type == PINGRESP:
-            await self.reader.readexactly(1)
+                self.messages.append(msg)
+        finally:
+            del buf[:pos]
 
-        elif msg.type == SUBACK:
-            # 1b header, 1b len, 2b msgID, 1b QOS
-            varlen = await self.reader.readexactly(1)
-            await self.reader.readexactly(varlen[0])
-
-        else:
-            raise NotImplementedError
+    @staticmethod
+    def read_remaining_length(buf: bytearray, pos: int) -> Optional[tuple]:
+        """Return remaining length and its end, None if it is incomplete."""
+        varlen = 0
+        i = pos + 1
+        for shift in range(0, 28, 7):
+            if i >= len(buf):
+                return None
+            varlen |= (buf[i] & 0x7F) << shift
+            i += 1
+            if (buf[i - 1] & 0x80) == 0:
+                return (varlen, i)
+        raise ValueError("Malformed remaining length")
+
+    def parse_publish(self, msg: MQTTMessage, buf: bytearray, i: int, end: int):
+        with memoryview(buf) as view:
+            j = i + 2
+            slen = int.from_bytes(view[i:j], "big")
+            i = j + slen
+            msg.topic = str(view[j:i], "utf-8")
 
-        return msg
+            if msg.qos > 0:
+                j = i + 2
+                msg_id = int.from_bytes(view[i:j], "big")
+                i = j
+                if msg.qos == 1:
+                    self.writer.write(RawMessage.puback(msg_id))
+
+            msg.payload = bytes(view[i:end])
+
+    def parse_ack(self, msg: MQTTMessage, buf: bytearray, i: int, end: int):
+        # PINGRESP, SUBACK and PUBACK have no fields we are interested in
+        pass
+
+    PARSERS = {
+        PUBLISH: parse_publish,
+        PINGRESP: parse_ack,
+        SUBACK: parse_ack,
+        PUBACK: parse_ack,
+    }
 
     async def close(self):
         if self.writer:
@@ -606,25 +606,43 @@ CLUSTERS = {
 
 RE_ZIGBEE_MODEL_TAIL = re.compile(r"\.v\d$")
 
+# zigbee model => DEVICES item, the first item wins if a model is listed twice
+MODELS = {}
+for _device in DEVICES:
+    for _model in _device:
+        if _model not in ("lumi_spec", "miot_spec"):
+            MODELS.setdefault(_model, _device)
+
+# same as MODELS, but only items with a spec, as get_buttons skips the others
+SPEC_MODELS = {}
+for _device in DEVICES:
+    if "lumi_spec" in _device or "miot_spec" in _device:
+        for _model in _device:
+            if _model not in ("lumi_spec", "miot_spec"):
+                SPEC_MODELS.setdefault(_model, _device)
+
+# zigbee model => button attr names, filled on first use by get_buttons
+BUTTONS = {}
+
 
 def get_device(zigbee_model: str) -> Optional[dict]:
     # the model has an extra tail when added (v1, v2, v3)
     if RE_ZIGBEE_MODEL_TAIL.search(zigbee_model):
         zigbee_model = zigbee_model[:-3]
 
-    for device in DEVICES:
-        if zigbee_model in device:
-            desc = device[zigbee_model]
-            return {
-                # 'model': zigbee_model,
-                "device_manufacturer": desc[0],
-                "device_name": f"{desc[0]} {desc[1]}",
-                "device_model": (
-                    zigbee_model + " " + desc[2] if len(desc) > 2 else zigbee_model
-                ),
-                "lumi_spec": device.get("lumi_spec"),
-                "miot_spec": device.get("miot_spec"),
-            }
+    device = MODELS.get(zigbee_model)
+    if device is not None:
+        desc = device[zigbee_model]
+        return {
+            # 'model': zigbee_model,
+            "device_manufacturer": desc[0],
+            "device_name": f"{desc[0]} {desc[1]}",
+            "device_model": (
+                zigbee_model + " " + desc[2] if len(desc) > 2 else zigbee_model
+            ),
+            "lumi_spec": device.get("lumi_spec"),
+            "miot_spec": device.get("miot_spec"),
+        }
 
     return {
         "device_name": "Zigbee",
@@ -675,24 +693,86 @@ def fix_xiaomi_battery(value: int) -> int:
     return int((value - 2700) / 5)
 
 
+# returned by a converter if the value should be skipped
+SKIP = object()
+
+
+def _temperature(value):
+    return value / 100.0 if -4000 < value < 12500 else SKIP
+
+
+def _humidity(value):
+    return value / 100.0 if 0 <= value <= 10000 else SKIP
+
+
+# attr name => converter(value) for process_zigbee_message
+PROP_CONVERTERS = {
+    # https://github.com/Koenkk/zigbee2mqtt/issues/798
+    # https://www.maero.dk/aqara-temperature-humidity-pressure-sensor-teardown/
+    "temperature": _temperature,
+    "humidity": _humidity,
+    "pressure": lambda value: value / 100.0,
+    # I do not know if the formula is correct, so battery is more important than
+    # voltage
+    "battery": fix_xiaomi_battery,
+    # xiaomi cube 100 points = 360 degrees
+    "angle": lambda value: value * 4,
+    # xiaomi cube
+    "duration": lambda value: value / 1000.0,
+    "consumption": lambda value: round(value, 2),
+    "power": lambda value: round(value, 2),
+    "voltage": lambda value: round(value / 1000.0, 2),
+    "current": lambda value: round(value / 1000.0, 2),
+    # energy consumption Wh to kWh
+    "energy": lambda value: round(value / 1000.0, 3),
+}
+
+# models which report these attrs without conversion
+RAW_PROPS = {"lumi.airmonitor.acn01": ("temperature", "humidity")}
+
+
+def compile_decoders(device: dict) -> dict:
+    """Compile device spec and global props to {prop: (attr name, converter)}."""
+    raw_props = RAW_PROPS.get(device["model"], ())
+
+    def decoder(attr: str):
+        if attr in raw_props:
+            return (attr, None)
+        return (attr, PROP_CONVERTERS.get(attr))
+
+    decoders = {}
+    for param in device["lumi_spec"] or device["miot_spec"] or []:
+        if param[0] not in decoders:
+            decoders[param[0]] = decoder(param[2])
+    # global props have priority
+    for prop, attr in GLOBAL_PROP.items():
+        decoders[prop] = decoder(attr)
+    return decoders
+
+
 def get_buttons(device_model: str):
     zigbee_model, _ = device_model.split(" ", 1)
-    for device in DEVICES:
-        if zigbee_model not in device:
-            continue
-        if "lumi_spec" in device:
-            return [
-                param[2]
-                for param in device["lumi_spec"]
-                if param[2].startswith("button")
-            ]
-        elif "miot_spec" in device:
-            buttons = []
-            for _, _, param, _ in device["miot_spec"]:
-                if not param.startswith("button"):
-                    continue
-                param, _ = param.split(":", 1)
-                if param not in buttons:
-                    buttons.append(param)
-            return buttons
+    if zigbee_model not in BUTTONS:
+        BUTTONS[zigbee_model] = _find_buttons(zigbee_model)
+    buttons = BUTTONS[zigbee_model]
+    return list(buttons) if buttons is not None else None
+
+
+def _find_buttons(zigbee_model: str):
+    device = SPEC_MODELS.get(zigbee_model)
+    if device is None:
+        return None
+    if "lumi_spec" in device:
+        return [
+            param[2] for param in device["lumi_spec"] if param[2].startswith("button")
+        ]
+    elif "miot_spec" in device:
+        buttons = []
+        for _, _, param, _ in device["miot_spec"]:
+            if not param.startswith("button"):
+                continue
+            param, _ = param.split(":", 1)
+            if param not in buttons:
+                buttons.append(param)
+        return buttons
     return None
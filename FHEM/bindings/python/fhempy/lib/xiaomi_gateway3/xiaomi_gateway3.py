@@ -108,12 +108,19 @@ class xiaomi_gateway3(generic.FhemModule):
         # wait till gateway is ready
         while self.gw is None:
             await asyncio.sleep(3)
+        self.gateway3.add_device(did)
         # if did == "lumi.0":
         #    self.gw.add_stats(did, handler)
         await asyncio.sleep(3)
         if did in self.devices and "init" in self.devices[did]:
             await fhempy_device.initialize(self.devices[did])
 
+    def unregister_device(self, fhempy_device):
+        did = fhempy_device.did
+        self.fhempy_devices.pop(did, None)
+        if self.gw is not None:
+            self.gateway3.remove_device(did)
+
     async def connect_gw(self):
         await asyncio.sleep(0)
         self.gw = FhempyGateway(self.logger)
@@ -130,5 +130,7 @@ class xiaomi_gateway3_device(generic.FhemModule):
 
     async def Undefine(self, hash):
         await super().Undefine(hash)
+        if self._fhempy_gateway is not None:
+            self._fhempy_gateway.unregister_device(self)
         if self._fhempy_device is not None:
             await self._fhempy_device.Undefine(hash)
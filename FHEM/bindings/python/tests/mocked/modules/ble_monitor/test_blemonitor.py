@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+import pytest
+from fhempy.lib.ble_monitor import blemonitor
+from fhempy.lib.core import ble_scanner
+
+
+class FakeDevice:
+    def __init__(self, mac, key=None):
+        self._mac = mac
+        self._key = key
+
+    def mac(self):
+        return self._mac
+
+    def hci(self):
+        return 0
+
+    def encryption_key(self):
+        return self._key
+
+    def duplicate_window(self):
+        return 5
+
+
+async def wait_for(condition):
+    for i in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+@pytest.mark.asyncio
+async def test_reconfigure(mocker):
+    mocker.patch.object(blemonitor, "RECONFIGURE_DELAY", 0.05)
+    mocker.patch.object(blemonitor, "BT_INTERFACES", {0: "00:11:22:33:44:55"})
+    mocker.patch.object(ble_scanner.HCIAdapter, "start")
+    mocker.patch.object(ble_scanner.BLEScanner, "instance", ble_scanner.BLEScanner())
+    hcidump = mocker.spy(blemonitor, "HCIdump")
+    monitor = blemonitor.BLEmonitor(logging.getLogger(__name__))
+
+    devices = [FakeDevice(f"A4:C1:38:00:00:0{i}") for i in range(5)]
+    for device in devices:
+        monitor.register_device(device)
+    await wait_for(lambda: monitor.dumpthread is not None)
+    # all devices are applied with one start of the thread
+    assert hcidump.call_count == 1
+    dumpthread = monitor.dumpthread
+    assert len(dumpthread.prefilter.whitelist) == 5
+    subscription = monitor.subscriptions[0]
+
+    key = "00112233445566778899aabbccddeeff"
+    device = FakeDevice("A4:C1:38:00:00:09", key)
+    monitor.register_device(device)
+    monitor.unregister_device(devices[0])
+    await wait_for(
+        lambda: bytes.fromhex("a4c138000009") in dumpthread.ble_parser.aeskeys
+    )
+    # thread and scanner subscription are kept
+    assert hcidump.call_count == 1
+    assert monitor.dumpthread is dumpthread
+    assert monitor.subscriptions == {0: subscription}
+    assert len(dumpthread.ble_parser.sensor_whitelist) == 5
+    assert bytes.fromhex("a4c138000000") not in dumpthread.ble_parser.sensor_whitelist
+    assert len(dumpthread.prefilter.whitelist) == 5
+
+    monitor.stop()
+    monitor.task_measuring.cancel()
+    monitor.task_tracker.cancel()
+    assert not dumpthread.is_alive()
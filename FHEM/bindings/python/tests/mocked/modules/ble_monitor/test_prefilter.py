@@ -0,0 +1,88 @@
+import logging
+
+import janus
+import pytest
+from fhempy.lib.ble_monitor import const
+from fhempy.lib.ble_monitor.hcidump import HCIdump
+from fhempy.lib.ble_monitor.prefilter import PreFilter
+from fhempy.lib.core import ble_scanner
+
+from ...test_ble_scanner import adv_report
+
+MAC = "A4:C1:38:00:00:01"
+
+
+def atc_report(mac, temp, packet_id):
+    # ATC1441 format in service data 0x181A
+    service_data = (
+        bytes([0x10, 0x16, 0x1A, 0x18])
+        + bytes.fromhex(mac.replace(":", ""))
+        + temp.to_bytes(2, "big")
+        + bytes([50, 90, 0x0B, 0xB8, packet_id])
+    )
+    return adv_report(mac, service_data)
+
+
+def test_whitelist_and_duplicates(mocker):
+    now = mocker.patch("time.monotonic", return_value=100)
+    prefilter = PreFilter.from_devices(
+        [
+            {const.CONF_MAC: MAC, const.CONF_DEVICE_DUPLICATE_WINDOW: 5},
+            {
+                const.CONF_MAC: "A4:C1:38:00:00:02",
+                const.CONF_DEVICE_DUPLICATE_WINDOW: 0,
+            },
+        ]
+    )
+
+    assert prefilter.check(atc_report(MAC, 215, 1))
+    assert not prefilter.check(atc_report("11:22:33:44:55:66", 215, 1))
+    # same payload with another RSSI is a duplicate
+    assert not prefilter.check(adv_report(MAC, atc_report(MAC, 215, 1)[14:-1], -80))
+    assert prefilter.check(atc_report(MAC, 216, 2))
+    now.return_value = 106
+    assert prefilter.check(atc_report(MAC, 216, 2))
+    # duplicate window disabled
+    assert prefilter.check(atc_report("A4:C1:38:00:00:02", 215, 1))
+    assert prefilter.check(atc_report("A4:C1:38:00:00:02", 215, 1))
+
+    assert prefilter.stats == {
+        "received": 7,
+        "filtered": 1,
+        "duplicates": 1,
+        "passed": 5,
+    }
+    # discovery lets all devices pass
+    assert PreFilter.from_devices([], discovery=True).check(
+        atc_report("11:22:33:44:55:66", 215, 1)
+    )
+
+
+@pytest.mark.asyncio
+async def test_batched_delivery():
+    config = {
+        const.CONF_DEVICES: [{const.CONF_MAC: MAC}],
+        const.CONF_DISCOVERY: False,
+        const.CONF_REPORT_UNKNOWN: False,
+    }
+    dataqueue = {"measuring": janus.Queue(), "tracker": janus.Queue()}
+    dump = HCIdump(logging.getLogger(__name__), config, dataqueue)
+    calls = []
+    dump._event_loop.call_soon_threadsafe = lambda *args: calls.append(args)
+
+    for packet_id in range(1, 4):
+        dump.feed(ble_scanner.parse_advertisement(0, atc_report(MAC, 215, packet_id)))
+    dump.feed(
+        ble_scanner.parse_advertisement(0, atc_report("11:22:33:44:55:66", 215, 1))
+    )
+    # parser thread is woken up once for all pending events
+    assert calls == [(dump.process_hci_events,)]
+    assert len(dump._pending) == 3
+
+    dump.process_hci_events()
+    batch = dataqueue["measuring"].sync_q.get_nowait()
+    assert [msg["packet"] for msg in batch] == [1, 2, 3]
+    assert batch[0]["mac"] == MAC.replace(":", "")
+    assert batch[0]["temperature"] == 21.5
+    assert dump.prefilter.stats["filtered"] == 1
+    dump._event_loop.close()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+
+import pytest
+from fhempy.lib.tuya import connection_manager
+
+
+class FakeProtocol:
+    def __init__(self, listener):
+        self.listener = listener
+        self.transport = object()
+        self.heartbeats = 0
+
+    async def heartbeat(self):
+        self.heartbeats += 1
+
+    async def close(self):
+        self.transport = None
+        self.listener.disconnected()
+
+
+class FakeDevice:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.disconnects = 0
+
+    def status_updated(self, status):
+        pass
+
+    def disconnected(self):
+        self.disconnects += 1
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_reconnect(mocker):
+    mocker.patch.object(connection_manager, "BACKOFF_BASE", 0.01)
+    attempts = []
+
+    async def connect(ip, device_id, local_key, version, listener, **kwargs):
+        attempts.append(kwargs)
+        if len(attempts) < 3:
+            raise ConnectionRefusedError()
+        return FakeProtocol(listener)
+
+    mocker.patch("fhempy.lib.tuya.pytuya.connect", connect)
+
+    manager = connection_manager.TuyaConnectionManager()
+    device = FakeDevice()
+    conn = manager.add_device(device, "1.2.3.4", "did", "key", 3.3)
+    assert manager.add_device(device, "1.2.3.4", "did", "key", 3.3) is conn
+    await asyncio.wait_for(conn.wait_connected(), 1)
+    assert len(attempts) == 3
+    assert attempts[0]["heartbeat"] is False
+    assert manager.get_stats()["did"]["connect_failures"] == 2
+    assert manager.get_stats()["did"]["connected"]
+
+    # heartbeats are sent by the manager
+    conn.on_tick()
+    await asyncio.sleep(0)
+    assert conn.protocol.heartbeats == 1
+
+    # reconnect after disconnect
+    await conn.protocol.close()
+    assert device.disconnects == 1
+    await asyncio.wait_for(conn.wait_connected(), 1)
+    assert manager.get_stats()["did"]["connects"] == 2
+
+    await manager.remove_device("did")
+    assert manager.connections == {}
+    assert manager.wheel_task is None
+    assert device.disconnects == 1
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from fhempy.lib.tuya import discovery, pytuya
+
+
+def create_broadcast(gwid, ip, encrypt=True, version="3.3"):
+    payload = json.dumps({"gwId": gwid, "ip": ip, "version": version}).encode()
+    if encrypt:
+        payload = pytuya.AESCipher(discovery.UDP_KEY).encrypt(payload, False)
+    return pytuya.pack_message(
+        pytuya.TuyaMessage(0, 0x13, 0, b"\x00\x00\x00\x00" + payload, 0)
+    )
+
+
+@pytest.mark.asyncio
+async def test_discovery_index(mocker, tmp_path):
+    mocker.patch.object(discovery, "INDEX_FILE", str(tmp_path / "tuya.json"))
+    mocker.patch.object(discovery, "SAVE_DELAY", 0)
+    changes = []
+
+    tuya_discovery = discovery.TuyaDiscovery()
+    tuya_discovery.register_listener(
+        "dev1", "192.168.1.10", 3.3, lambda ip, ver: changes.append((ip, ver))
+    )
+    tuya_discovery.handle_broadcast(create_broadcast("dev1", "192.168.1.10"))
+    tuya_discovery.handle_broadcast(create_broadcast("dev2", "192.168.1.11", False))
+    tuya_discovery.handle_broadcast(b"invalid")
+    assert tuya_discovery.get_device("dev1")["ip"] == "192.168.1.10"
+    assert tuya_discovery.get_device("dev2")["version"] == "3.3"
+    assert changes == []
+
+    # known devices don't wait for broadcasts
+    await tuya_discovery.wait_for_devices(["dev1", "dev2"], 10)
+
+    tuya_discovery.handle_broadcast(create_broadcast("dev1", "192.168.1.20"))
+    save_task = tuya_discovery.save_task
+    assert changes == [("192.168.1.20", "3.3")]
+
+    await save_task
+    assert tuya_discovery._load_index()["dev1"]["ip"] == "192.168.1.20"
+
+    tuya_discovery.handle_broadcast(create_broadcast("dev1", "192.168.1.20"))
+    tuya_discovery.handle_broadcast(
+        create_broadcast("dev1", "192.168.1.20", version="3.4")
+    )
+    assert changes == [("192.168.1.20", "3.3"), ("192.168.1.20", "3.4")]
+
+
+@pytest.mark.asyncio
+async def test_discovery_first_broadcast(mocker, tmp_path):
+    mocker.patch.object(discovery, "INDEX_FILE", str(tmp_path / "tuya.json"))
+    changes = []
+
+    # device got a new IP while fhempy wasn't running
+    tuya_discovery = discovery.TuyaDiscovery()
+    tuya_discovery.register_listener(
+        "dev1", "192.168.1.10", 3.3, lambda ip, ver: changes.append((ip, ver))
+    )
+    tuya_discovery.handle_broadcast(create_broadcast("dev1", "192.168.1.30"))
+    assert changes == [("192.168.1.30", "3.3")]
+    tuya_discovery.save_task.cancel()
@@ -0,0 +1,15 @@
+from fhempy.lib.tuya import mappings
+
+
+def test_get_schema():
+    assert mappings.has_schema("8FAPq5h6gdV51Vcr")
+    assert not mappings.has_schema("unknown")
+    assert mappings.get_schema("unknown") is None
+
+    schema = mappings.get_schema("8FAPq5h6gdV51Vcr")["schema"]
+    assert schema[0]["code"] == "switch_on"
+    assert schema[0]["property"] == {"type": "bool"}
+
+    # every call returns a new dict which can be modified
+    schema[0]["code"] = "changed"
+    assert mappings.get_schema("8FAPq5h6gdV51Vcr")["schema"][0]["code"] == "switch_on"
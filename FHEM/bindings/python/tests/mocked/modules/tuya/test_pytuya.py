@@ -0,0 +1,36 @@
+from fhempy.lib.tuya import pytuya
+
+
+def create_message(seqno, payload, cmd=0x08):
+    # received messages contain a retcode in front of the payload
+    return pytuya.pack_message(
+        pytuya.TuyaMessage(seqno, cmd, 0, b"\x00\x00\x00\x00" + payload, 0)
+    )
+
+
+def test_message_dispatcher_framing():
+    received = []
+    dispatcher = pytuya.MessageDispatcher("012345678901234567", received.append)
+
+    data = create_message(1, b"first") + create_message(2, b"second")
+    # split messages in the middle of the header and the payload
+    dispatcher.add_data(data[:10])
+    dispatcher.add_data(data[10:40])
+    assert [msg.payload for msg in received] == [b"first"]
+    dispatcher.add_data(data[40:])
+    assert [msg.payload for msg in received] == [b"first", b"second"]
+    assert dispatcher.buffer == bytearray()
+
+
+def test_message_dispatcher_invalid_data():
+    received = []
+    dispatcher = pytuya.MessageDispatcher("012345678901234567", received.append)
+
+    corrupt = bytearray(create_message(1, b"corrupt"))
+    corrupt[22] ^= 0xFF
+    dispatcher.add_data(
+        b"garbage" + bytes(corrupt) + create_message(2, b"valid") + b"\x00\x00"
+    )
+    assert [msg.payload for msg in received] == [b"valid"]
+    assert dispatcher.crc_errors == 1
+    assert dispatcher.buffer == bytearray(b"\x00\x00")
@@ -67,3 +67,27 @@ async def test_setup(mocker):
     assert mock_fhem.readings["testdevice"]["state"] == "ready"
 
     await fhempy_device.Undefine(testhash)
+
+
+@pytest.mark.asyncio
+async def test_update_readings(mocker):
+    mock_fhem.mock_module(mocker)
+    testhash = {"NAME": "testdevice", "FHEMPYTYPE": "tuya"}
+    await check_and_install_dependencies("tuya")
+    from fhempy.lib.tuya.tuya import tuya
+
+    fhempy_device = tuya(logging.getLogger(__name__))
+    fhempy_device.hash = testhash
+    fhempy_device.tuya_spec_status = [
+        {"code": "switch_1", "dp_id": 1, "type": "Boolean", "values": {}},
+        {"code": "cur_power", "dp_id": 19, "type": "Integer", "values": {"scale": 1}},
+        {"code": "mode", "dp_id": 4, "type": "Enum", "values": {}},
+    ]
+    fhempy_device._build_dp_decoders()
+
+    await fhempy_device.update_readings({"1": True, "19": 125, "4": "auto", "7": 3})
+    assert mock_fhem.readings["testdevice"]["state"] == "on"
+    assert mock_fhem.readings["testdevice"]["cur_power"] == 12.5
+    assert mock_fhem.readings["testdevice"]["mode"] == "auto"
+    assert mock_fhem.readings["testdevice"]["dp_07"] == 3
+    assert "online" not in mock_fhem.readings["testdevice"]
@@ -0,0 +1,67 @@
+import pytest
+from fhempy.lib.xiaomi_gateway3.core import mini_mqtt
+from fhempy.lib.xiaomi_gateway3.core.gateway3 import GatewayEntry
+
+
+def mqtt_message(topic, payload, retain=False):
+    msg = mini_mqtt.MQTTMessage()
+    msg.type = mini_mqtt.PUBLISH
+    msg.retain = retain
+    msg.topic = topic
+    msg.payload = payload
+    return msg
+
+
+@pytest.mark.asyncio
+async def test_on_message_dispatch(mocker):
+    gw = GatewayEntry("127.0.0.1", "00000000000000000000000000000000")
+    device = {
+        "did": "blt.3.known",
+        "mac": "a4c138000001",
+        "type": "ble",
+        "entities": {"main": None},
+    }
+    new_device = {
+        "did": "blt.3.new",
+        "mac": "a4c138000002",
+        "type": "ble",
+        "entities": {},
+    }
+    mocker.patch.dict(gw.devices, {device["mac"]: device}, clear=True)
+    mocker.patch.dict(
+        gw.dids, {device["did"]: device, new_device["did"]: new_device}, clear=True
+    )
+    mocker.patch.object(gw, "fhem_dids", set())
+    process_fix = mocker.patch.object(gw, "process_ble_event_fix")
+    process_zigbee = mocker.patch.object(gw, "process_zigbee_message")
+    process_retain = mocker.patch.object(gw, "process_ble_retain")
+    process_gw_stats = mocker.patch.object(gw, "process_gw_stats")
+
+    await gw.on_message(mqtt_message("log/ble", b'{"did":"blt.3.other","seq":1}'))
+    await gw.on_message(mqtt_message("log/ble", b'{"did":"blt.3.known","seq":1}'))
+    process_fix.assert_not_called()
+    gw.add_device("blt.3.known")
+    await gw.on_message(mqtt_message("log/ble", b'{"did":"blt.3.known","seq":1}'))
+    process_fix.assert_called_once_with({"did": "blt.3.known", "seq": 1})
+    gw.remove_device("blt.3.known")
+    await gw.on_message(mqtt_message("log/ble", b'{"did":"blt.3.known","seq":2}'))
+    process_fix.assert_called_once()
+    await gw.on_message(mqtt_message("log/ble", b'{"did":"blt.3.new","seq":1}'))
+    process_fix.assert_called_with({"did": "blt.3.new", "seq": 1})
+
+    await gw.on_message(mqtt_message("zigbee/send", b'{"cmd":"report","did":"x"}'))
+    process_zigbee.assert_not_called()
+    await gw.on_message(mqtt_message("zigbee/send", b'{"cmd":"report","did":"lumi.0"}'))
+    process_zigbee.assert_called_once()
+
+    await gw.on_message(mqtt_message("ble/a4c138000001", b'{"temperature":21}'))
+    process_retain.assert_not_called()
+    await gw.on_message(mqtt_message("ble/a4c138000001", b'{"temp":21}', True))
+    process_retain.assert_called_once_with("a4c138000001", {"temp": 21})
+
+    await gw.on_message(mqtt_message("gw/AABBCC/heartbeat", b'{"free_mem":1}'))
+    process_gw_stats.assert_called_once_with({"free_mem": 1})
+    await gw.on_message(mqtt_message("broker/ping", b""))
+
+    assert "gw/+/heartbeat" in gw.router.filters
+    assert "#" not in gw.router.filters
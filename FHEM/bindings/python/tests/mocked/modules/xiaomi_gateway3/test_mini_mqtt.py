@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fhempy.lib.xiaomi_gateway3.core import mini_mqtt
+
+
+class FakeWriter:
+    def __init__(self):
+        self.sent = []
+
+    def write(self, data):
+        self.sent.append(bytes(data))
+
+
+def publish(topic, payload, qos=0, msg_id=1):
+    raw = len(topic).to_bytes(2, "big") + topic.encode()
+    if qos > 0:
+        raw += msg_id.to_bytes(2, "big")
+    raw += payload
+    # remaining length as variable length integer
+    varlen = b""
+    length = len(raw)
+    while True:
+        b = length & 0x7F
+        length >>= 7
+        varlen += bytes([b | 0x80 if length else b])
+        if not length:
+            break
+    return bytes([(mini_mqtt.PUBLISH << 4) | (qos << 1)]) + varlen + raw
+
+
+@pytest.mark.asyncio
+async def test_read_buffered():
+    mqtt = mini_mqtt.MiniMQTT()
+    mqtt.reader = asyncio.StreamReader()
+    mqtt.writer = FakeWriter()
+
+    big = b"x" * 300
+    data = (
+        publish("zigbee/send", b'{"cmd":"report"}')
+        + publish("log/ble", big, qos=1, msg_id=0x1234)
+        + bytes([mini_mqtt.SUBACK << 4, 3, 0, 1, 0])
+        + publish("split", b"abc")
+    )
+    # last packet arrives in two reads
+    mqtt.reader.feed_data(data[:-3])
+
+    msg = await mqtt.read()
+    assert msg.topic == "zigbee/send"
+    assert msg.json == {"cmd": "report"}
+
+    msg = await mqtt.read()
+    assert msg.topic == "log/ble"
+    assert msg.qos == 1
+    assert msg.payload == big
+    assert mqtt.writer.sent == [bytes([mini_mqtt.PUBACK << 4, 2, 0x12, 0x34])]
+
+    msg = await mqtt.read()
+    assert msg.type == mini_mqtt.SUBACK
+
+    read_task = asyncio.create_task(mqtt.read())
+    await asyncio.sleep(0)
+    assert not read_task.done()
+    mqtt.reader.feed_data(data[-3:])
+    msg = await asyncio.wait_for(read_task, 1)
+    assert msg.topic == "split"
+    assert msg.payload == b"abc"
+    assert len(mqtt.buffer) == 0
+
+    mqtt.reader.feed_eof()
+    assert await mqtt.read() is None
+
+
+def test_topic_router():
+    router = mini_mqtt.TopicRouter()
+    router.add("log/ble", "ble")
+    router.add("gw/+/heartbeat", "heartbeat")
+    router.add("gw/#", "gw")
+    router.add("gw/+/heartbeat", "heartbeat2")
+
+    assert router.match("log/ble") == ["ble"]
+    assert router.match("log/ble/x") == []
+    assert router.match("gw/AABB/heartbeat") == ["gw", "heartbeat", "heartbeat2"]
+    assert router.match("gw/AABB/commands") == ["gw"]
+    assert router.match("broker/ping") == []
+    assert router.filters == ["log/ble", "gw/+/heartbeat", "gw/#"]
@@ -0,0 +1,55 @@
+import pytest
+from fhempy.lib.xiaomi_gateway3.core import bluetooth, zigbee
+from fhempy.lib.xiaomi_gateway3.core.gateway3 import GatewayEntry
+
+
+@pytest.mark.asyncio
+async def test_process_zigbee_message(mocker):
+    gw = GatewayEntry("127.0.0.1", "00000000000000000000000000000000")
+    device = {
+        "did": "lumi.weather",
+        "mac": "0x158d0001",
+        "type": "zigbee",
+        "model": "lumi.weather",
+        "fw_ver": 1,
+        "entities": {},
+    }
+    device.update(zigbee.get_device(device["model"]))
+    mocker.patch.dict(gw.devices, {device["did"]: device})
+
+    payload = await gw.process_zigbee_message(
+        {
+            "cmd": "report",
+            "did": "lumi.weather",
+            "params": [
+                {"res_name": "0.1.85", "value": 2345},
+                {"res_name": "0.2.85", "value": 99999},
+                {"res_name": "0.3.85", "value": 100120},
+                {"res_name": "8.0.2007", "value": 80},
+                {"res_name": "9.9.9", "value": 1},
+            ],
+        }
+    )
+    assert payload == {
+        "temperature": 23.45,
+        "pressure": 1001.2,
+        "lqi": 80,
+        "9.9.9": 1,
+    }
+    assert device["decoders"]["0.1.85"] == ("temperature", zigbee._temperature)
+
+
+def test_get_device():
+    device = zigbee.get_device("lumi.sensor_ht.agl02.v1")
+    assert device["device_model"] == "lumi.sensor_ht.agl02 WSDCGQ12LM"
+    assert device["lumi_spec"][0][2] == "temperature"
+    assert zigbee.get_device("lumi.unknown")["device_name"] == "Zigbee"
+
+    buttons = zigbee.get_buttons("lumi.remote.b286acn01 WXKG02LM")
+    assert buttons[:2] == ["button_1", "button_2"]
+    buttons.append("changed")
+    assert zigbee.get_buttons("lumi.remote.b286acn01 WXKG02LM")[-1] != "changed"
+    assert zigbee.get_buttons("lumi.unknown x") is None
+
+    assert bluetooth.get_device(152, "BLE")["device_model"] == "HHCCJCY01"
+    assert bluetooth.get_device(1, "BLE")["device_model"] == "1"
@@ -0,0 +1,95 @@
+import asyncio
+import sys
+
+import pytest
+from fhempy.lib.core import ble_async
+
+FAKE_HELPER = r"""
+import sys
+
+def send(*items):
+    sys.stdout.write("\x1e".join(items) + "\n")
+    sys.stdout.flush()
+
+for line in sys.stdin:
+    cmd = line.split()
+    if cmd[0] == "conn":
+        send("rsp=$stat", "state=$tryconn")
+        send("rsp=$stat", "state=$conn", "dst=$" + cmd[1], "mtu=h17")
+    elif cmd[0] == "rd" and cmd[1] == "15":
+        send("rsp=$rd", "d=b0102")
+    elif cmd[0] == "rd" and cmd[1] == "16":
+        send("rsp=$err", "code=$atterr", "estat=h2")
+    elif cmd[0] == "wrr":
+        send("rsp=$wr")
+        send("rsp=$ntfy", "hnd=h" + cmd[1], "d=b" + cmd[2])
+    elif cmd[0] == "disc":
+        send("rsp=$stat", "state=$disc")
+"""
+
+
+@pytest.fixture
+def helper(mocker, tmp_path):
+    script = tmp_path / "bluepy-helper"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_HELPER)
+    script.chmod(0o755)
+    mocker.patch("fhempy.lib.core.ble_async.helper_exe", lambda: str(script))
+    mocker.patch("fhempy.lib.core.ble_async.get_hci_interfaces", lambda: [0])
+
+
+def test_parse_response():
+    assert ble_async.parse_response("rsp=$stat\x1estate=$conn\x1emtu=h17\n") == {
+        "rsp": ["stat"],
+        "state": ["conn"],
+        "mtu": [0x17],
+    }
+    assert ble_async.parse_response("rsp=$rd\x1ed=b0a0b") == {
+        "rsp": ["rd"],
+        "d": [b"\x0a\x0b"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_write_notify(helper):
+    established = []
+
+    async def on_connect(mac):
+        established.append(mac)
+
+    conn = ble_async.AsyncBTLEConnection(
+        "AA:BB:CC:DD:EE:FF",
+        keep_connected=True,
+        connection_established_callback=on_connect,
+    )
+    notifications = []
+    conn.set_callback(0x12, notifications.append)
+
+    assert await conn.read_characteristic(0x15) == b"\x01\x02"
+    assert conn.is_connected
+    assert established == ["AA:BB:CC:DD:EE:FF"]
+
+    assert await conn.write_characteristic(0x12, b"\x01", timeout=1)
+    assert notifications == [b"\x01"]
+
+    with pytest.raises(ble_async.BLEGattError):
+        await conn.read_characteristic(0x16)
+    # connection stays usable after a GATT error
+    assert conn.is_connected
+
+    await conn.disconnect()
+    assert not conn.is_connected
+
+
+@pytest.mark.asyncio
+async def test_cancel(helper):
+    conn = ble_async.AsyncBTLEConnection("AA:BB:CC:DD:EE:FF", keep_connected=True)
+    await conn.connect()
+
+    # no response for this handle, the helper is killed on timeout
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(conn.read_characteristic(0x99), 0.2)
+    assert not conn.is_connected
+
+    # next request connects again
+    assert await conn.read_characteristic(0x15) == b"\x01\x02"
+    await conn.disconnect()
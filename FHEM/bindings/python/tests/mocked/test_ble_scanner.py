@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+from fhempy.lib.core import ble_scanner
+
+
+def adv_report(mac, ad, rssi=-60):
+    # HCI event, LE meta event, legacy advertising report
+    report = (
+        bytes([0x02, 0x01, 0x00, 0x00])
+        + bytes.fromhex(mac.replace(":", ""))[::-1]
+        + bytes([len(ad)])
+        + ad
+        + bytes([rssi & 0xFF])
+    )
+    return bytes([0x04, 0x3E, len(report)]) + report
+
+
+AD = (
+    bytes([0x02, 0x01, 0x06])
+    + bytes([0x05, 0x09]) + b"Test"
+    + bytes([0x05, 0x16, 0x95, 0xFE, 0x01, 0x02])
+    + bytes([0x04, 0xFF, 0x4C, 0x00, 0x07])
+)  # fmt: skip
+
+
+def test_parse_advertisement():
+    adv = ble_scanner.parse_advertisement(0, adv_report("AA:BB:CC:DD:EE:01", AD))
+    assert adv.mac == "aa:bb:cc:dd:ee:01"
+    assert adv.rssi == -60
+    assert adv.name == "Test"
+    assert adv.service_uuids == ["fe95"]
+    assert adv.service_data == {"fe95": b"\x01\x02"}
+    assert adv.manufacturer_data == {0x4C: b"\x07"}
+
+    # wrong length and other HCI events
+    assert (
+        ble_scanner.parse_advertisement(0, adv_report("aa:bb:cc:dd:ee:01", AD)[:-1])
+        is None
+    )
+    assert ble_scanner.parse_advertisement(0, bytes([0x04, 0x0E] + [0] * 12)) is None
+
+
+@pytest.mark.asyncio
+async def test_dispatch(mocker):
+    mocker.patch.object(ble_scanner.HCIAdapter, "start")
+    scanner = ble_scanner.BLEScanner()
+    by_mac = []
+    by_uuid = []
+    everything = []
+    sub_mac = scanner.subscribe(by_mac.append, macs=["AA:BB:CC:DD:EE:01"])
+    scanner.subscribe(by_uuid.append, service_uuids=["FE95"])
+    scanner.subscribe(everything.append, active=True)
+    adapter = scanner.adapters[0]
+    assert adapter.active
+
+    adapter.process(adv_report("aa:bb:cc:dd:ee:01", AD))
+    adapter.process(adv_report("aa:bb:cc:dd:ee:02", bytes([0x02, 0x01, 0x06])))
+    assert [adv.mac for adv in by_mac] == ["aa:bb:cc:dd:ee:01"]
+    assert [adv.mac for adv in by_uuid] == ["aa:bb:cc:dd:ee:01"]
+    assert len(everything) == 2
+    assert scanner.get_stats()["hci0"]["dispatched"] == 4
+
+    scanner.unsubscribe(sub_mac)
+    adapter.process(adv_report("aa:bb:cc:dd:ee:01", AD))
+    assert len(by_mac) == 1
+    assert len(by_uuid) == 2
+
+
+@pytest.mark.asyncio
+async def test_scan_restart(mocker):
+    mocker.patch.object(ble_scanner, "WATCHDOG_TIMEOUT", 0.05)
+    adapter = ble_scanner.HCIAdapter(ble_scanner.BLEScanner(), 0)
+    starts = []
+
+    async def start_scan():
+        starts.append(asyncio.Event())
+        adapter.btctrl = mocker.Mock(lost=starts[-1])
+        adapter.last_event = time.monotonic()
+
+    mocker.patch.object(adapter, "_start_scan", start_scan)
+    adapter.start()
+    await asyncio.sleep(0.01)
+    assert len(starts) == 1
+
+    # connection lost, e.g. the adapter was reset
+    starts[0].set()
+    await asyncio.sleep(0.01)
+    assert len(starts) == 2
+
+    # no events received
+    await asyncio.sleep(0.06)
+    assert len(starts) == 3
+    assert adapter.stats["restarts"] == 2
+
+    adapter.task.cancel()
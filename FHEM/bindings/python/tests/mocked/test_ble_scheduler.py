@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fhempy.lib.core import ble_scheduler
+
+
+@pytest.mark.asyncio
+async def test_slots_per_adapter(mocker):
+    mocker.patch("fhempy.lib.core.ble_scheduler.get_hci_interfaces", lambda: [0, 1])
+    scheduler = ble_scheduler.BLEConnectionScheduler()
+    active = {0: 0, 1: 0}
+    max_active = {0: 0, 1: 0}
+    lock = threading.Lock()
+
+    def poll(hci):
+        with lock:
+            active[hci] += 1
+            max_active[hci] = max(max_active[hci], active[hci])
+        time.sleep(0.05)
+        with lock:
+            active[hci] -= 1
+        return hci
+
+    used = await asyncio.gather(
+        *[scheduler.run(f"AA:BB:CC:DD:EE:0{i}", poll) for i in range(6)]
+    )
+    # polls are spread over both adapters, one connection per adapter
+    assert sorted(used) == [0, 0, 0, 1, 1, 1]
+    assert max_active == {0: 1, 1: 1}
+
+    stats = scheduler.get_stats("aa:bb:cc:dd:ee:00")
+    assert stats["success"] == 1
+    assert stats["hci"] == used[0]
+    assert scheduler.get_stats()["adapters"]["hci0"]["slots"] == 3
+
+
+@pytest.mark.asyncio
+async def test_slot_timeout(mocker):
+    mocker.patch("fhempy.lib.core.ble_scheduler.get_hci_interfaces", lambda: [0])
+    scheduler = ble_scheduler.BLEConnectionScheduler()
+    release = threading.Event()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.run("aa:bb", lambda hci: release.wait(1), timeout=0.01)
+    assert scheduler.get_stats("aa:bb")["failed"] == 1
+
+    # adapter is locked until the blocking call returns
+    assert scheduler.adapters[0].lock.locked()
+    release.set()
+    assert await scheduler.run("aa:cc", lambda hci: "ok", hci=0) == "ok"
+    assert not scheduler.adapters[0].lock.locked()
+
+
+@pytest.mark.asyncio
+async def test_run_async_timeout(mocker):
+    mocker.patch("fhempy.lib.core.ble_scheduler.get_hci_interfaces", lambda: [0])
+    scheduler = ble_scheduler.BLEConnectionScheduler()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await scheduler.run_async("aa:bb", lambda hci: asyncio.sleep(1), timeout=0.01)
+    # coroutine is cancelled, slot is free again
+    assert not scheduler.adapters[0].lock.locked()
+    assert scheduler.get_stats("aa:bb")["failed"] == 1
+
+    async def poll(hci):
+        return hci
+
+    assert await scheduler.run_async("aa:cc", poll) == 0
+
+
+@pytest.mark.asyncio
+async def test_update_stats_readings(mocker):
+    mocker.patch("fhempy.lib.core.ble_scheduler.get_hci_interfaces", lambda: [0])
+    scheduler = ble_scheduler.BLEConnectionScheduler()
+    mocker.patch.object(ble_scheduler.BLEConnectionScheduler, "instance", scheduler)
+    sent_cmds = []
+
+    async def _sendCommandName(name, cmd):
+        sent_cmds.append(cmd)
+        return (True, "")
+
+    mocker.patch("fhempy.lib.fhem._sendCommandName", _sendCommandName)
+    mocker.patch.dict("fhempy.lib.fhem.readings_cache", clear=True)
+
+    # no readings before the first slot
+    await ble_scheduler.update_stats_readings({"NAME": "test"}, "AA:BB")
+    assert sent_cmds == []
+
+    await scheduler.run("AA:BB", lambda hci: None)
+    await ble_scheduler.update_stats_readings({"NAME": "test"}, "AA:BB")
+    assert len(sent_cmds) == 1
+    assert "'ble_success','1'" in sent_cmds[0]
+    assert "'ble_failed','0'" in sent_cmds[0]
+    assert "'ble_latency'" in sent_cmds[0]
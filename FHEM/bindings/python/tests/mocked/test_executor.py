@@ -0,0 +1,57 @@
+import asyncio
+import functools
+import threading
+
+import pytest
+from fhempy.lib.core import executor
+
+
+@pytest.mark.asyncio
+async def test_named_pools():
+    io_thread = await executor.run(
+        functools.partial(lambda: threading.current_thread().name)
+    )
+    ble_thread = await executor.run(
+        functools.partial(lambda: threading.current_thread().name), "ble"
+    )
+    assert io_thread.startswith("fhempy_io")
+    assert ble_thread.startswith("fhempy_ble")
+    assert executor.get_executor("io") is executor.get_executor("io")
+    assert executor.get_stats()["io"]["pending"] == 0
+    assert executor.get_stats()["io"]["submitted"] >= 1
+
+
+def test_process_pool_fallback(mocker):
+    mocker.patch.dict(executor.pool_sizes, {"process": 0})
+    assert executor.get_executor("process") is executor.get_executor("cpu")
+
+
+def test_set_pool_sizes(mocker):
+    mocker.patch.dict(executor.pool_sizes)
+    executor.set_pool_sizes("io=8,ble=1")
+    assert executor.pool_sizes["io"] == 8
+    assert executor.pool_sizes["ble"] == 1
+    with pytest.raises(ValueError):
+        executor.set_pool_sizes("gpu=1")
+
+
+@pytest.mark.asyncio
+async def test_longrunning_own_threads():
+    release = threading.Event()
+    running = executor.get_stats()["longrunning"]["running"]
+
+    def loop():
+        release.wait(5)
+        return threading.current_thread().name
+
+    # more endless loops than any pool has workers
+    tasks = [
+        asyncio.create_task(executor.run(functools.partial(loop), "longrunning"))
+        for _ in range(40)
+    ]
+    await asyncio.sleep(0.1)
+    assert executor.get_stats()["longrunning"]["running"] == running + 40
+    release.set()
+    names = await asyncio.gather(*tasks)
+    assert all(name == "fhempy_longrunning" for name in names)
+    assert executor.get_stats()["longrunning"]["running"] == running
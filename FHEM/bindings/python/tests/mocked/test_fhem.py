@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import pytest
+from fhempy.lib import fhem, fhem_pythonbinding
+
+from ..utils.mock_websocket import FakeWebsocket
+
+
+@pytest.mark.asyncio
+async def test_readings_single_command(mocker):
+    sent_cmds = []
+
+    async def _sendCommandName(name, cmd):
+        sent_cmds.append(cmd)
+        return (True, "")
+
+    mocker.patch("fhempy.lib.fhem._sendCommandName", _sendCommandName)
+    mocker.patch.dict("fhempy.lib.fhem.readings_cache", clear=True)
+
+    hash = {"NAME": "test"}
+    async with fhem.readings(hash) as r:
+        r.update_if_changed("state", "on")
+        r.update("power", 12.5)
+        r.update("energy", True, 0)
+
+    assert len(sent_cmds) == 1
+    assert sent_cmds[0] == (
+        "readingsBeginUpdate($defs{'test'});;"
+        "readingsBulkUpdateIfChanged($defs{'test'},'state','on');;"
+        "readingsBulkUpdate($defs{'test'},'power','12.5');;"
+        "readingsBulkUpdate($defs{'test'},'energy','1', 0);;"
+        "readingsEndUpdate($defs{'test'},1);;"
+    )
+
+
+@pytest.mark.asyncio
+async def test_readings_nothing_to_send(mocker):
+    _sendCommandName = mocker.patch("fhempy.lib.fhem._sendCommandName")
+
+    async with fhem.readings({"NAME": "test"}):
+        pass
+
+    _sendCommandName.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_readings_cache_skips_unchanged(mocker):
+    sent_cmds = []
+
+    async def _sendCommandName(name, cmd):
+        sent_cmds.append(cmd)
+        return (True, {"state": "on", "power": "10"})
+
+    mocker.patch("fhempy.lib.fhem._sendCommandName", _sendCommandName)
+    mocker.patch.dict("fhempy.lib.fhem.readings_cache", clear=True)
+
+    hash = {"NAME": "test"}
+    await fhem.seedReadingsCache(hash)
+    sent_cmds.clear()
+
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "on")
+    await fhem.readingsSingleUpdateIfChanged(hash, "power", 10, 1)
+    async with fhem.readings(hash) as r:
+        r.update_if_changed("state", "on")
+    assert len(sent_cmds) == 0
+
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "off")
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "off")
+    assert len(sent_cmds) == 1
+
+    fhem.updateReadingsCache("test", "state", "on")
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "off")
+    assert len(sent_cmds) == 2
+
+    # readings of devices not handled by fhempy are not cached
+    fhem.updateReadingsCache("other", "state", "on")
+    assert "other" not in fhem.readings_cache
+
+    # entries expire
+    mocker.patch("fhempy.lib.fhem.READINGS_CACHE_TTL", 0)
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "off")
+    assert len(sent_cmds) == 3
+
+
+@pytest.mark.asyncio
+async def test_readings_cache_invalidated_on_failure(mocker):
+    sent_cmds = []
+    success = True
+
+    async def _sendCommandName(name, cmd):
+        sent_cmds.append(cmd)
+        return (success, "")
+
+    mocker.patch("fhempy.lib.fhem._sendCommandName", _sendCommandName)
+    mocker.patch.dict("fhempy.lib.fhem.readings_cache", clear=True)
+
+    hash = {"NAME": "test"}
+    await fhem.readingsSingleUpdateIfChanged(hash, "state", "on", 1)
+    assert fhem.readings_cache["test"]["state"][0] == "on"
+
+    success = False
+    async with fhem.readings(hash) as r:
+        r.update_if_changed("state", "off")
+        r.update("power", 10)
+    assert len(sent_cmds) == 2
+    assert fhem.readings_cache["test"] == {}
+
+    success = True
+    await fhem.readingsBulkUpdateIfChanged(hash, "state", "off")
+    assert len(sent_cmds) == 3
+    assert fhem.readings_cache["test"]["state"][0] == "off"
+
+
+@pytest.mark.asyncio
+async def test_command_waits_for_active_function(mocker):
+    mocker.patch("fhempy.lib.fhem.function_active", [])
+
+    fhem.setFunctionActive({"NAME": "other"})
+    own_task = asyncio.create_task(fhem._waitForCommandSlot("other"))
+    wait_task = asyncio.create_task(fhem._waitForCommandSlot("test"))
+    await asyncio.sleep(0)
+    assert own_task.done()
+    assert not wait_task.done()
+    assert fhem.getCommandStats()["waiting"] == 1
+
+    fhem.setFunctionInactive({"NAME": "other"})
+    await asyncio.wait_for(wait_task, 1)
+    assert fhem.getCommandStats()["waiting"] == 0
+    assert fhem.command_waiters == {}
+
+
+@pytest.mark.asyncio
+async def test_send_and_wait_reply_dispatch():
+    ws = FakeWebsocket()
+    pb = fhem_pythonbinding.fhempy(ws)
+    fhem.updateConnection(pb)
+
+    task1 = asyncio.create_task(fhem.send_and_wait("test", "cmd1"))
+    task2 = asyncio.create_task(fhem.send_and_wait("test", "cmd2"))
+    await asyncio.sleep(0)
+    assert len(ws.sent) == 2
+    id1 = ws.sent[0]["awaitId"]
+    id2 = ws.sent[1]["awaitId"]
+    assert id2 > id1
+
+    # replies arrive out of order
+    reply2 = json.dumps({"awaitId": id2, "error": 0, "result": "res2"})
+    await pb.handle_message(reply2, json.loads(reply2))
+    reply1 = json.dumps({"awaitId": id1, "error": 0, "result": "res1"})
+    await pb.handle_message(reply1, json.loads(reply1))
+    assert json.loads(await task1)["result"] == "res1"
+    assert json.loads(await task2)["result"] == "res2"
+    assert pb._msg_listeners == {}
+
+
+@pytest.mark.asyncio
+async def test_send_and_wait_timeout_removes_listener():
+    pb = fhem_pythonbinding.fhempy(FakeWebsocket())
+    fhem.updateConnection(pb)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(fhem.send_and_wait("test", "cmd"), 0.01)
+    assert pb._msg_listeners == {}
+
+
+@pytest.mark.asyncio
+async def test_attrval_many_one_command(mocker):
+    sent_cmds = []
+
+    async def sendCommandName(name, cmd):
+        sent_cmds.append(cmd)
+        return ["on", "5"]
+
+    mocker.patch("fhempy.lib.fhem.sendCommandName", sendCommandName)
+
+    res = await fhem.AttrValMany("test", {"disable": "off", "interval": 10})
+    assert res == {"disable": "on", "interval": "5"}
+    assert sent_cmds == [
+        "return [AttrVal('test', 'disable', 'off'),"
+        "AttrVal('test', 'interval', '10')];;"
+    ]
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fhempy.lib import fhem_pythonbinding
+
+from ..utils.mock_websocket import FakeWebsocket
+
+
+@pytest.mark.asyncio
+async def test_event_listener_registry():
+    ws = FakeWebsocket()
+    pb = fhem_pythonbinding.fhempy(ws)
+    received = []
+
+    async def dev_listener(device, name, value):
+        received.append(("dev", device, name, value))
+
+    async def all_listener(device, name, value):
+        received.append(("all", device, name, value))
+
+    pb.register_event_listener("lamp", "state", dev_listener)
+    await asyncio.sleep(0)
+    assert ws.sent[-1] == {
+        "msgtype": "event_subscriptions",
+        "devices": ["lamp"],
+        "all": False,
+    }
+
+    await pb.handle_event({"NAME": "lamp", "args": ["on"]}, "")
+    await pb.handle_event({"NAME": "lamp", "args": ["power: 10"]}, "")
+    await pb.handle_event({"NAME": "other", "args": ["on"]}, "")
+    assert received == [("dev", "lamp", "state", "on")]
+
+    pb.register_event_listener(None, "power", all_listener)
+    await asyncio.sleep(0)
+    assert ws.sent[-1]["all"] is True
+    await pb.handle_event({"NAME": "other", "args": ["power: 5"]}, "")
+    assert received[-1] == ("all", "other", "power", "5")
+
+    pb.unregister_event_listener(None, "power", all_listener)
+    pb.unregister_event_listener("lamp", "state", dev_listener)
+    await asyncio.sleep(0)
+    assert ws.sent[-1] == {
+        "msgtype": "event_subscriptions",
+        "devices": [],
+        "all": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_module_type_once(mocker):
+    mocker.patch.dict(fhem_pythonbinding.loadedModuleTypes, clear=True)
+    pb = fhem_pythonbinding.fhempy(FakeWebsocket())
+    calls = []
+
+    async def check_and_install_dependencies(hash):
+        calls.append(("deps", hash["NAME"]))
+        await asyncio.sleep(0.01)
+
+    async def import_module(hash):
+        calls.append(("import", hash["NAME"]))
+        return "module_" + hash["FHEMPYTYPE"]
+
+    mocker.patch.object(
+        pb, "check_and_install_dependencies", check_and_install_dependencies
+    )
+    mocker.patch.object(pb, "import_module", import_module)
+
+    res = await asyncio.gather(
+        pb.load_module_type({"NAME": "dev1", "FHEMPYTYPE": "tuya"}),
+        pb.load_module_type({"NAME": "dev2", "FHEMPYTYPE": "tuya"}),
+    )
+    assert res == ["module_tuya", "module_tuya"]
+    assert calls == [("deps", "dev1"), ("import", "dev1")]
+
+    await pb.load_module_type({"NAME": "dev3", "FHEMPYTYPE": "tuya"})
+    assert len(calls) == 2
+    assert pb._module_type_loads == {}
+
+
+@pytest.mark.asyncio
+async def test_preload_module_types(mocker):
+    mocker.patch.dict(fhem_pythonbinding.loadedModuleTypes, clear=True)
+    pb = fhem_pythonbinding.fhempy(FakeWebsocket())
+    imported = []
+
+    async def import_module(hash):
+        imported.append(hash["FHEMPYTYPE"])
+        if hash["FHEMPYTYPE"] == "broken":
+            raise ImportError()
+        return "module_" + hash["FHEMPYTYPE"]
+
+    mocker.patch.object(pb, "import_module", import_module)
+    mocker.patch(
+        "fhempy.lib.fhem_pythonbinding.pkg_installer.check_dependencies",
+        lambda fhempytype: fhempytype != "missing_deps",
+    )
+
+    await pb.handle_message(
+        "", {"msgtype": "preload", "args": ["tuya", "broken", "missing_deps"]}
+    )
+    await asyncio.sleep(0.1)
+    # missing dependencies are installed by the Define
+    assert sorted(imported) == ["broken", "tuya"]
+    assert fhem_pythonbinding.loadedModuleTypes == {"tuya": "module_tuya"}
+    assert pb._module_type_loads == {}
+
+
+def test_limit_options(mocker):
+    mocker.patch.object(fhem_pythonbinding, "max_concurrent_defines", 10)
+    mocker.patch.object(fhem_pythonbinding, "max_pending_commands", 1000)
+    (ip, port, local) = fhem_pythonbinding.handle_cmdline_options(
+        [("--max-defines", "5"), ("--max-pending", "200"), ("--port", "15000")]
+    )
+    assert (ip, port, local) == (None, 15000, False)
+    assert fhem_pythonbinding.max_concurrent_defines == 5
+    assert fhem_pythonbinding.max_pending_commands == 200
@@ -0,0 +1,115 @@
+import asyncio
+import collections
+import time
+
+import pytest
+from aiohttp import web
+from fhempy.lib.core import http_client
+
+
+@pytest.mark.asyncio
+async def test_shared_connection_pool():
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+
+    async with http_client.create_session() as own_session:
+        assert own_session.connector is session.connector
+    # closing an own session keeps the pool open
+    assert not session.connector.closed
+    assert not session.closed
+
+    await http_client.close()
+    assert session.closed
+    assert session.connector is None or session.connector.closed
+    assert http_client.get_session() is not session
+    await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_cache_and_coalescing(mocker):
+    mocker.patch.dict(http_client._cache, clear=True)
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text='{"name": "v1"}', headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/data", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/data"
+
+    try:
+        # two concurrent fetches share one request
+        resp1, resp2 = await asyncio.gather(
+            http_client.fetch(url, ttl=60), http_client.fetch(url, ttl=60)
+        )
+        assert len(requests) == 1
+        assert resp1.json() == resp2.json() == {"name": "v1"}
+
+        # within ttl no request is sent
+        resp = await http_client.fetch(url, ttl=60)
+        assert resp.from_cache
+        assert len(requests) == 1
+
+        # expired entries are revalidated with the ETag
+        http_client._cache[http_client._cache_key(url, None)]["expires"] = 0
+        resp = await http_client.fetch(url, ttl=60)
+        assert len(requests) == 2
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+        assert resp.from_cache
+        assert resp.json() == {"name": "v1"}
+        assert http_client._inflight == {}
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def test_cache_size_and_expiry(mocker):
+    mocker.patch.object(http_client, "_cache", collections.OrderedDict())
+    mocker.patch.object(http_client, "cache_size", 2)
+    now = time.time()
+
+    http_client._cache_put("a", {"expires": now + 60})
+    http_client._cache_put("b", {"expires": now + 60})
+    http_client._cache_get("a")
+    # least recently used entry is dropped
+    http_client._cache_put("c", {"expires": now + 60})
+    assert list(http_client._cache) == ["a", "c"]
+
+    # entries expired longer than cache_max_stale are dropped
+    http_client._cache["a"]["expires"] = now - http_client.cache_max_stale - 1
+    http_client._cache_put("d", {"expires": now + 60})
+    assert list(http_client._cache) == ["c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_trust_env(mocker):
+    mocker.patch.dict(http_client._cache, clear=True)
+    create_session = mocker.spy(http_client, "create_session")
+
+    async def handler(request):
+        return web.Response(text='{"name": "v1"}')
+
+    app = web.Application()
+    app.router.add_get("/data", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    try:
+        resp = await http_client.fetch(f"http://127.0.0.1:{port}/data", trust_env=True)
+        assert resp.json() == {"name": "v1"}
+        assert create_session.call_args.kwargs["trust_env"] is True
+    finally:
+        await http_client.close()
+        await runner.cleanup()
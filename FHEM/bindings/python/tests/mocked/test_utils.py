@@ -43,13 +43,13 @@ async def test_handle_define_attr(mocker):
         assert hashname == "test"
         assert str(attrlist) == "attr1 attr2 attr3 attr4 attr5:on,off,test"
 
-    async def AttrVal(hashname, attr, default):
-        if attr == "attr3":
-            return "test33"
-        return ""
+    async def AttrValMany(hashname, attr_defaults):
+        assert hashname == "test"
+        assert list(attr_defaults) == ["attr1", "attr2", "attr3", "attr4", "attr5"]
+        return {attr: "test33" if attr == "attr3" else "" for attr in attr_defaults}
 
     mocker.patch("fhempy.lib.fhem.setDevAttrList", setDevAttrList)
-    mocker.patch("fhempy.lib.fhem.AttrVal", AttrVal)
+    mocker.patch("fhempy.lib.fhem.AttrValMany", AttrValMany)
 
     class TestClass:
         async def set_attr(self, hash):
@@ -319,3 +319,21 @@ async def test_handle_set():
     )
     assert retval == None
     assert newstate == {"seconds": 300}
+
+
+@pytest.mark.asyncio
+async def test_parse_html():
+    from bs4 import SoupStrainer
+
+    html = (
+        "<html><body><div class='x'>skipped</div>"
+        "<table><tbody><tr><td>a</td></tr><tr><td>b</td></tr></tbody></table>"
+        "</body></html>"
+    )
+
+    def get_cells(soup):
+        assert soup.find("div") is None
+        return [td.text for td in soup.find_all("td")]
+
+    cells = await utils.parse_html(html, get_cells, SoupStrainer("tbody"))
+    assert cells == ["a", "b"]
@@ -20,6 +20,7 @@ def mock_module(mocker):
     mocker.patch("fhempy.lib.fhem.getUniqueId", getUniqueId)
     mocker.patch("fhempy.lib.fhem.ReadingsVal", ReadingsVal)
     mocker.patch("fhempy.lib.fhem.AttrVal", AttrVal)
+    mocker.patch("fhempy.lib.fhem.AttrValMany", AttrValMany)
     mocker.patch("fhempy.lib.fhem.InternalVal", InternalVal)
     mocker.patch("fhempy.lib.fhem.addToDevAttrList", addToDevAttrList)
     mocker.patch("fhempy.lib.fhem.setDevAttrList", setDevAttrList)
@@ -33,6 +34,7 @@ def mock_module(mocker):
     mocker.patch(
         "fhempy.lib.fhem.readingsSingleUpdateIfChanged", readingsSingleUpdateIfChanged
     )
+    mocker.patch("fhempy.lib.fhem.readings", ReadingsUpdate)
     mocker.patch("fhempy.lib.fhem.CommandDefine", CommandDefine)
     mocker.patch("fhempy.lib.fhem.CommandAttr", CommandAttr)
     mocker.patch("fhempy.lib.fhem.CommandDeleteReading", CommandDeleteReading)
@@ -83,6 +85,12 @@ async def AttrVal(name, attr, default):
     return default
 
 
+async def AttrValMany(name, attr_defaults):
+    return {
+        attr: await AttrVal(name, attr, attr_defaults[attr]) for attr in attr_defaults
+    }
+
+
 async def InternalVal(name, internal, default):
     if name in internals and internal in internals[name]:
         return internals[name][internal]
@@ -129,6 +137,25 @@ async def readingsSingleUpdateIfChanged(hash, reading, value, do_trigger):
     readings[hash["NAME"]][reading] = value
 
 
+class ReadingsUpdate:
+    def __init__(self, hash, do_trigger=1):
+        self.hash = hash
+
+    def update_if_changed(self, reading, value):
+        if self.hash["NAME"] not in readings:
+            readings[self.hash["NAME"]] = {}
+        readings[self.hash["NAME"]][reading] = value
+
+    def update(self, reading, value, changed=None):
+        self.update_if_changed(reading, value)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
 async def CommandDefine(hash, definition):
     command_define.append(definition)
 
@@ -0,0 +1,9 @@
+import json
+
+
+class FakeWebsocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(json.loads(msg))